@@ -1,5 +1,9 @@
 import pygmo as pg
+import numpy as np
 import win32com.client
+from SystemSetup_module import SystemSetup
+from SessionPool_module import SessionPool
+from BatchFitness_module import DesignEvaluator
 import time
 import re
 from tqdm import tqdm
@@ -46,28 +50,20 @@ system_setup.surfaces[5].make_thickness_variable()
 system_setup.surfaces[2].make_material_variable()
 system_setup.surfaces[4].make_material_variable()
 
-def apply_parameters_to_com(parameters):
-    # Apply parameters to the surfaces
-    system_setup.surfaces[2].set_radius(parameters[0])
-    system_setup.surfaces[2].set_thickness(parameters[1])
-    system_setup.surfaces[3].set_radius(parameters[2])
-    system_setup.surfaces[3].set_thickness(parameters[3])
-    system_setup.surfaces[4].set_radius(parameters[4])
-    system_setup.surfaces[4].set_thickness(parameters[5])
-    system_setup.surfaces[5].set_radius(parameters[6])
-    system_setup.surfaces[5].set_thickness(parameters[7])
-
-    # Map integer parameters to material names
-    material_2_index = int(parameters[8])
-    material_4_index = int(parameters[9])
-    material_2 = materials_list[material_2_index]
-    material_4 = materials_list[material_4_index]
-
-    system_setup.surfaces[2].set_material(material_2)
-    system_setup.surfaces[4].set_material(material_4)
-
-    # Calculate and return the error function value
-    return system_setup.error_fct(efl)
+def design_surfaces(parameters):
+    # Map the decision vector to the radius, thickness and material of surfaces 2 to 5
+    material_2 = materials_list[int(round(parameters[8]))]
+    material_4 = materials_list[int(round(parameters[9]))]
+    return {
+        2: (parameters[0], parameters[1], material_2),
+        3: (parameters[2], parameters[3], None),
+        4: (parameters[4], parameters[5], material_4),
+        5: (parameters[6], parameters[7], None),
+    }
+
+# Evaluator of the populations, set in main(). It is a module global because
+# pygmo works on copies of the problem and the cache must be shared by all of them
+evaluator = None
 
 # Define the PyGMO Optimization Problem
 class CodeVOptimization():
@@ -80,8 +76,17 @@ class CodeVOptimization():
         x[9] = round(x[9])  # Or use int(x[9]) for flooring
         global global_parameters
         global_parameters = x
-        error_value = apply_parameters_to_com(x)
-        return [error_value]
+        return [evaluator.evaluate(x)[0]]
+
+    def has_batch_fitness(self):
+        return True
+
+    def batch_fitness(self, dvs):
+        # Whole population in one call: designs already evaluated come from the cache,
+        # the others are spread over the session pool
+        designs = np.array(dvs, dtype=float).reshape(-1, 10)
+        designs[:, 8:] = np.round(designs[:, 8:])
+        return evaluator.evaluate(designs)
 
     def get_nix(self):
       # Number of integer dimensions
@@ -117,6 +122,15 @@ class CodeVOptimization():
 
 
 def main():
+    global evaluator
+
+    workers = 4  # CodeV sessions evaluating the population
+    batch_algorithm = False  # True: gaco evaluating whole generations through batch_fitness instead of the study's de (different results)
+
+    pool = None
+    if workers > 1:
+        pool = SessionPool(system_setup.system_data(), workers=workers)
+    evaluator = DesignEvaluator(system_setup, design_surfaces, efl, pool=pool, failure_value=1e10)
 
     # Create and configure the optimization problem
     prob = CodeVOptimization()
@@ -125,11 +139,16 @@ def main():
     initial_solution = [22.63216, 7.0, -144.99525, 22.022504, 4.77927, 6.998062, 5.73415, 0.212388, 1, 8]
 
     # Initialize Population with the initial solution
-    pop = pg.population(prob, size=200)
+    pop = pg.population(prob, size=200, b=pg.bfe(pg.member_bfe()))
     pop.push_back(initial_solution)  # Add the initial solution to the population
 
     # Choose an Algorithm for PyGMO
-    algo = pg.algorithm(pg.de(gen=1))  # Set generations to 1 for manual iteration
+    if batch_algorithm:
+      uda = pg.gaco(gen=1, memory=True)  # Keeps its archive between the manual iterations
+      uda.set_bfe(pg.bfe(pg.member_bfe()))
+      algo = pg.algorithm(uda)
+    else:
+      algo = pg.algorithm(pg.de(gen=1))  # Set generations to 1 for manual iteration
     # à tester : gaco ihs sga nsga2 maco
 
 
@@ -159,6 +178,9 @@ def main():
 
     print("Best solution:", best_solution)
     print(f"Best merit: {best_merit}")
+    print(f"Designs evaluated: {evaluator.evaluations} of {evaluator.requests} requested")
+    if pool is not None:
+        pool.close()
 
     # Apply the best solution to your CODE V system
     system_setup.surfaces[2].set_parameters(best_solution[0], best_solution[1])
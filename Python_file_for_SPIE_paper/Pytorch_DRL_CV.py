@@ -2,21 +2,30 @@ import gym
 from gym import spaces
 import numpy as np
 from stable_baselines3 import PPO
+from stable_baselines3.common.vec_env import VecEnv
+from SystemSetup_module import SystemSetup
+from SessionPool_module import SessionPool
+from BatchFitness_module import DesignEvaluator
+
+def lens_action_space(materials_list):
+    # [radius_2, thickness_2, material_2, radius_3, thickness_3, radius_4, thickness_4, material_4, radius_5, thickness_5]
+    return spaces.Box(
+    low=np.array([-100, 0, -100, 0, 0, -100, 0, 0, -100, 0]),
+    high=np.array([100, 7, 100, 7, len(materials_list)-1, 100, 7, len(materials_list)-1, 100, 7]),
+    dtype=np.float32
+    )
 
 class LensOptimizationEnv(gym.Env):
-    def __init__(self, system_setup, materials_list, efl=15):
+    def __init__(self, system_setup, materials_list, efl=15, verbose=False):
         super(LensOptimizationEnv, self).__init__()
         self.system_setup = system_setup
         self.materials_list = materials_list
         self.efl = efl
+        self.verbose = verbose
 
         # Define action and observation space
         # Action space: [radius, thickness, material index] for each surface
-        self.action_space = spaces.Box(
-        low=np.array([-100, 0, -100, 0, 0, -100, 0, 0, -100, 0]),
-        high=np.array([100, 7, 100, 7, len(materials_list)-1, 100, 7, len(materials_list)-1, 100, 7]),
-        dtype=np.float32
-        )
+        self.action_space = lens_action_space(materials_list)
 
         # Observation space: the same as action space for simplicity
         self.observation_space = self.action_space
@@ -26,11 +35,13 @@ class LensOptimizationEnv(gym.Env):
       self.apply_action_to_system(action)
 
       # Debugging: Print the current state of the system
-      print("Current System State:", [self.system_setup.surfaces[i].get_parameters() for i in range(2, 6)])
+      if self.verbose:
+        print("Current System State:", [self.system_setup.surfaces[i].get_parameters() for i in range(2, 6)])
 
       # Calculate the error (reward is negative error)
       error = self.system_setup.error_fct(self.efl)
-      print("Error:", error)  # Debugging print
+      if self.verbose:
+        print("Error:", error)  # Debugging print
 
       if error is None:
           raise ValueError("Error function returned None. Check system state.")
@@ -70,6 +81,86 @@ class LensOptimizationEnv(gym.Env):
         self.system_setup.surfaces[5].set_parameters(radius_5, thickness_5)
 
 
+class LensOptimizationVecEnv(VecEnv):
+    """
+    num_envs lens states stepped in one call. The errors of a step are computed together by a
+    DesignEvaluator: across the sessions of a SessionPool (one CodeV session per worker process),
+    or without pool one after the other on system_setup. The reward is -error_fct.
+    As in LensOptimizationEnv, the observation is the last action and episodes never end.
+    """
+
+    def __init__(self, system_setup, materials_list, num_envs, efl=15, pool=None, failure_error=1e3):
+        """
+        :param system_setup: SystemSetup holding the starting lens (surfaces 2 to 5 are set by the actions).
+        :param pool: Optional SessionPool evaluating the lenses.
+        :param failure_error: Error of the lenses that cannot be evaluated (reward -failure_error).
+        """
+        space = lens_action_space(materials_list)
+        super(LensOptimizationVecEnv, self).__init__(num_envs, space, space)
+        self.system_setup = system_setup
+        self.materials_list = materials_list
+        self.evaluator = DesignEvaluator(system_setup, self.action_surfaces, efl, pool=pool, failure_value=failure_error)
+        self.initial_state = self.current_state()
+        self.actions = None
+
+    def material(self, index):
+        return self.materials_list[max(0, min(int(index), len(self.materials_list) - 1))]
+
+    def action_surfaces(self, action):
+        # Same mapping as LensOptimizationEnv.apply_action_to_system
+        radius_2, thickness_2, material_2, radius_3, thickness_3, radius_4, thickness_4, material_4, radius_5, thickness_5 = action
+        return {
+            2: (radius_2, thickness_2, self.material(material_2)),
+            3: (radius_3, thickness_3, None),
+            4: (radius_4, thickness_4, self.material(material_4)),
+            5: (radius_5, thickness_5, None),
+        }
+
+    def current_state(self):
+        # Action reproducing the lens of system_setup (index 0 for a material out of the list)
+        surfaces = self.system_setup.surfaces
+        def material_index(surface):
+            return self.materials_list.index(surface.material) if surface.material in self.materials_list else 0
+        state = [surfaces[2].radius, surfaces[2].thickness, material_index(surfaces[2]),
+                 surfaces[3].radius, surfaces[3].thickness,
+                 surfaces[4].radius, surfaces[4].thickness, material_index(surfaces[4]),
+                 surfaces[5].radius, surfaces[5].thickness]
+        return np.clip(np.array(state, dtype=np.float32), self.action_space.low, self.action_space.high)
+
+    def reset(self):
+        return np.tile(self.initial_state, (self.num_envs, 1))
+
+    def step_async(self, actions):
+        self.actions = np.asarray(actions, dtype=np.float32).reshape(self.num_envs, -1)
+
+    def step_wait(self):
+        errors = self.evaluator.evaluate(self.actions)
+        # The actions are rarely evaluated twice: keep the cache from growing over the training
+        self.evaluator.cache.clear()
+        rewards = -errors.astype(np.float32)
+        dones = np.zeros(self.num_envs, dtype=bool)
+        infos = [{} for _ in range(self.num_envs)]
+        return self.actions.copy(), rewards, dones, infos
+
+    def close(self):
+        if self.evaluator.pool is not None:
+            self.evaluator.pool.close()
+
+    def seed(self, seed=None):
+        return [None] * self.num_envs
+
+    def get_attr(self, attr_name, indices=None):
+        return [getattr(self, attr_name)] * len(self._get_indices(indices))
+
+    def set_attr(self, attr_name, value, indices=None):
+        setattr(self, attr_name, value)
+
+    def env_method(self, method_name, *method_args, indices=None, **method_kwargs):
+        return [getattr(self, method_name)(*method_args, **method_kwargs)] * len(self._get_indices(indices))
+
+    def env_is_wrapped(self, wrapper_class, indices=None):
+        return [False] * len(self._get_indices(indices))
+
 
 def train_drl_agent(env):
     model = PPO("MlpPolicy", env, verbose=1)
@@ -78,6 +169,7 @@ def train_drl_agent(env):
 
 def main():
     efl = 15
+    num_envs = 8  # Lens states stepped together, one CodeV session each
 
     system_setup = SystemSetup()  # Assuming SystemSetup is already defined
     system_setup.start_session()
@@ -117,7 +209,8 @@ def main():
     system_setup.surfaces[4].make_material_variable()
 
     # Initialize the environment
-    env = LensOptimizationEnv(system_setup, materials_list, efl)
+    pool = SessionPool(system_setup.system_data(), workers=num_envs, processes=True)
+    env = LensOptimizationVecEnv(system_setup, materials_list, num_envs, efl, pool=pool)
 
     # Train the DRL agent
     model = train_drl_agent(env)
@@ -127,11 +220,12 @@ def main():
     for _ in range(1000):
         action, _states = model.predict(obs, deterministic=True)
         obs, rewards, dones, info = env.step(action)
-        if dones:
+        if dones.any():
             break
 
     # Save the trained model for later use
     model.save("lens_optimization_model")
+    env.close()
 
 if __name__ == '__main__':
     main()
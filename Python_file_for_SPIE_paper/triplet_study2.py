@@ -1,6 +1,11 @@
 from SystemSetup_module import SystemSetup
+from SessionPool_module import SessionPool
+from GlassStudy_module import study_jobs, run_study
 import csv
 
+# Number of CodeV sessions sharing the glass combination study
+workers = 4
+
 # Initialize SystemSetup and start a session
 optical_system = SystemSetup()
 optical_system.start_session()
@@ -72,64 +77,18 @@ for index, triplet in enumerate(triplets_data):
     
 
 # Comparison results
-comparison_results = []
 
 
 # Assuming we have a list of .seq file paths and a dictionary mapping lens numbers to materials
 seq_file_paths = ["C:/CVUSER/FinalOptimized_Node15.seq", "C:/CVUSER/FinalOptimized_Node16.seq", "C:/CVUSER/FinalOptimized_Node12.seq", "C:/CVUSER/FinalOptimized_Node10.seq", "C:/CVUSER/FinalOptimized_Node9.seq"] 
 
 
-# Loop over each triplet material combination
-for triplet in triplets_data:
-    glass1, glass2, glass3, r1, r1_prime, r2, r2_prime, r3 = triplet
-
-    # Loop over each seq file path
-    for seq_file_path in seq_file_paths:
-        # Load the .seq file into the system
-        load_command = f'run "{seq_file_path}"; GO'
-        optical_system.cv.Command(load_command)
-        
-        # Change the material of the three lenses using the current triplet combination
-        optical_system.cv.Command(f"GL1 S1 {glass1}")
-        optical_system.cv.Command(f"GL1 S3 {glass2}")
-        optical_system.cv.Command(f"GL1 S5 {glass3}")
-        
-        # Make all thicknesses and radii variable
-        for i in range(1, 6):
-            optical_system.cv.Command(f"CCY S{i} 0")    
-            i+=1
-
-        for i in range(1, 6):
-            optical_system.cv.Command(f"THC S{i} 0")
-
-        # Fix all materials
-        for i in range(1, 6):
-            optical_system.cv.Command(f"GC1 S{i} 100")
-
-        # Perform optimization
-        optical_system.optimize_system(efl=1, mnt=0.02)  # Replace 'efl=1' with the desired effective focal length
-        
-        # Calculate the optimized merit function
-        optimized_merit = optical_system.error_fct(efl=1)
-        
-        # Record the comparison
-        comparison_results.append({
-            'Seq_File_Path': seq_file_path,
-            'Triplet': f"{glass1}_{glass2}_{glass3}",
-            'Optimized_Merit': optimized_merit,
-        })
-
-         # Save the system with a new file name indicating the materials used
-        base_name = seq_file_path.split('/')[-1].split('.')[0]  # Extract base name of the file without extension
-        optimized_file_path = f"C:/CVUSER/{base_name}_optimized_{glass1}_{glass2}_{glass3}.seq"
-        optical_system.save_system(optimized_file_path, seq=True)
-
-# Save the comparison results to a CSV
-csv_file_path = "comparison_results.csv"
-with open(csv_file_path, mode='w', newline='') as file:
-    writer = csv.DictWriter(file, fieldnames=comparison_results[0].keys())
-    writer.writeheader()
-    writer.writerows(comparison_results)
+# Every glass combination from every starting point, spread over the sessions; the rows are
+# written to the CSV as the jobs complete
+glass_combinations = [triplet[:3] for triplet in triplets_data]
+jobs = study_jobs(glass_combinations, seq_file_paths)
+with SessionPool(optical_system.system_data(), workers=workers) as pool:
+    comparison_results = run_study(jobs, "comparison_results.csv", pool=pool, output_directory="C:/CVUSER", efl=1, mnt=0.02)
 
 # Stop session after all files have been processed
 optical_system.stop_session()
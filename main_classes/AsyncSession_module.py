@@ -0,0 +1,189 @@
+# ==============================================================================
+# PROJECT INFORMATION
+# ==============================================================================
+# Project Title: ODAI
+# Version: v1.0.0
+# Description: Optical System Design Optimization: Saddle Point Application
+#
+# AUTHORS
+# ==============================================================================
+# Aurélien Argy, Florin Baumann, Jelil Belheine, Pierre-Gabriel Bibal-Sobeaux,
+# Benoit Brouillet
+# Institution: Télécom Physique Strasbourg, Université de Strasbourg,
+# Illkirch-Graffenstaden, France
+#
+# LICENSE
+# ==============================================================================
+# This project is licensed under the GPL 3.0 License.
+# For more details, see the LICENSE file in the project root.
+#
+# DATE
+# ==============================================================================
+# Date of Creation: 04/04/2024
+#
+# ==============================================================================
+# NOTES
+# ==============================================================================
+# The code is developed using CodeV version 2022.03 and is intended for use under
+# the guidelines of the GPL 3.0 License.
+# ==============================================================================
+
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from Backend_module import CodeVBackend
+from SessionPool_module import open_session, com_initialize
+from SystemSetup_module import SystemSetup
+
+
+class AsyncSystemSetup:
+    """
+    asyncio front-end of a SystemSetup. Every call runs on the session's own thread (CodeV is driven
+    from the thread that opened it), so that a coroutine can await a GO of one session while other
+    sessions compute and the event loop parses, writes files or plots.
+    Any SystemSetup method is available as a coroutine: `await setup.error_fct(efl)`.
+    """
+
+    def __init__(self, setup, executor):
+        """
+        Use open() to create the session on its thread.
+        :param setup: The SystemSetup, created on the executor thread.
+        :param executor: Single-thread executor owning the session.
+        """
+        self.setup = setup
+        self.executor = executor
+
+    @classmethod
+    async def open(cls, backend_factory=CodeVBackend, system_data=None):
+        """
+        Start a session on a new thread.
+        :param backend_factory: Callable returning the backend of the session.
+        :param system_data: Optional dictionary of SystemSetup.system_data to set the new lens up with.
+        """
+        executor = ThreadPoolExecutor(1, initializer=com_initialize)
+        loop = asyncio.get_running_loop()
+        if system_data is None:
+            def start():
+                setup = SystemSetup(backend_factory())
+                setup.start_session()
+                return setup
+            setup = await loop.run_in_executor(executor, start)
+        else:
+            setup = await loop.run_in_executor(executor, open_session, backend_factory, system_data)
+        return cls(setup, executor)
+
+    async def run(self, function, *args, **kwargs):
+        """
+        Run function(setup, *args, **kwargs) on the session thread.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, partial(function, self.setup, *args, **kwargs))
+
+    def __getattr__(self, name):
+        method = getattr(SystemSetup, name)
+        if not callable(method):
+            raise AttributeError(name)
+
+        async def call(*args, **kwargs):
+            return await self.run(method, *args, **kwargs)
+        call.__name__ = name
+        return call
+
+    async def load_state(self, saved_params):
+        # Restore a state saved by save_state (see SystemSetup.load_system_parameters)
+        return await self.run(SystemSetup.load_system_parameters, saved_params)
+
+    async def save_state(self):
+        return await self.run(SystemSetup.save_system_parameters)
+
+    async def close(self):
+        # Stop the session and its thread
+        await self.run(SystemSetup.stop_session)
+        self.executor.shutdown(wait=False)
+
+
+class AsyncSystemTree:
+    """
+    Asynchronous node expansion of a SystemTree over several AsyncSystemSetup sessions.
+    Each (node, reference surface) expansion takes the next free session; the children are grafted
+    on the tree in the order of the serial exploration.
+    """
+
+    def __init__(self, system_tree, sessions, efl, base_file_path):
+        self.system_tree = system_tree
+        self.sessions = list(sessions)
+        self.efl = efl
+        self.base_file_path = base_file_path
+        self.free_sessions = asyncio.Queue()
+        for session in self.sessions:
+            self.free_sessions.put_nowait(session)
+
+    async def expand_at(self, node, surface):
+        """
+        Saddle point nodes found from one reference surface of node, not yet grafted on the tree.
+        """
+        session = await self.free_sessions.get()
+        try:
+            return await session.run(SystemSetup.expand_detached_node, node.detached(), surface,
+                                     self.efl, self.base_file_path, node.depth)
+        finally:
+            self.free_sessions.put_nowait(session)
+
+    async def expansions(self, node):
+        # [(node, children)] for every viable reference surface of node
+        last_surface_number = max(node.optical_system_state['surfaces'], default=0)
+        surfaces = self.sessions[0].setup.identify_viable_surfaces(last_surface_number)
+        results = await asyncio.gather(*(self.expand_at(node, surface) for surface in surfaces))
+        return [(node, children) for children in results]
+
+    async def expand(self, node):
+        """
+        Expand node from all its viable surfaces and graft the results.
+        :return: The children of node.
+        """
+        for parent, children in await self.expansions(node):
+            self.system_tree.graft(parent, children)
+        return node.children
+
+    async def evolve(self, starting_depth, target_depth):
+        """
+        Asynchronous counterpart of SystemSetup.evolve_optimized_systems.
+        """
+        for depth in range(starting_depth, target_depth + 1):
+            nodes = self.system_tree.find_optimized_nodes_at_depth(depth)
+            results = await asyncio.gather(*(self.expansions(node) for node in nodes))
+            for expansions in results:
+                for parent, children in expansions:
+                    self.system_tree.graft(parent, children)
+        return self.system_tree
+
+
+class BackgroundLoop:
+    """
+    asyncio event loop running on a daemon thread, for synchronous callers such as the Tk main loop.
+    Coroutines are submitted with submit(); a Tk widget polls the returned future with poll().
+    """
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+
+    def submit(self, coroutine):
+        # Schedule a coroutine; returns a concurrent.futures.Future
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+
+    def poll(self, widget, future, callback, interval=100):
+        """
+        Call callback(future) from the Tk loop once future is done, checking every interval ms.
+        """
+        if future.done():
+            callback(future)
+        else:
+            widget.after(interval, self.poll, widget, future, callback, interval)
+
+    def stop(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
@@ -0,0 +1,612 @@
+# ==============================================================================
+# PROJECT INFORMATION
+# ==============================================================================
+# Project Title: ODAI
+# Version: v1.0.0
+# Description: Optical System Design Optimization: Saddle Point Application
+#
+# AUTHORS
+# ==============================================================================
+# Aurélien Argy, Florin Baumann, Jelil Belheine, Pierre-Gabriel Bibal-Sobeaux,
+# Benoit Brouillet
+# Institution: Télécom Physique Strasbourg, Université de Strasbourg,
+# Illkirch-Graffenstaden, France
+#
+# LICENSE
+# ==============================================================================
+# This project is licensed under the GPL 3.0 License.
+# For more details, see the LICENSE file in the project root.
+#
+# DATE
+# ==============================================================================
+# Date of Creation: 04/04/2024
+#
+# ==============================================================================
+# NOTES
+# ==============================================================================
+# The code is developed using CodeV version 2022.03 and is intended for use under
+# the guidelines of the GPL 3.0 License.
+# ==============================================================================
+
+import re
+import os
+import gzip
+import json
+import hashlib
+from collections import Counter, defaultdict, deque
+import numpy as np
+from GlassCatalog_module import GlassCatalog
+from Paraxial_module import first_order_properties
+from RayTrace_module import system_merit
+
+
+############## Output parsing helpers ##############
+
+
+def parse_error_function(output):
+    """
+    Extract the error function value printed by an AUT GO.
+    :param output: Text returned by the GO command.
+    :return: The error function value, or None if it is not in the output.
+    """
+    match = re.search(r'ERR\. F\.\s*=\s*([+-]?[0-9]*\.?[0-9]+(?:[Ee][+-]?[0-9]+)?)', output or "")
+    if match:
+        return float(match.group(1))
+    return None
+
+
+def parse_efl(listing):
+    """
+    Extract the EFL from a LIS output.
+    :param listing: Text returned by the LIS command.
+    :return: The EFL value, or None if it is not in the listing.
+    """
+    match = re.search(r"\s+EFL\s+([-\d\.Ee\+\-]+)", listing or "")
+    if match:
+        return float(match.group(1))
+    return None
+
+
+def command_verb(command):
+    """
+    Return the upper-case verb of a single CodeV command (e.g. 'RDY' for 'RDY S3 12.5',
+    'MXT' for 'MXT1E10', 'GL1' for 'GL1 S2 NBK7_SCHOTT').
+    """
+    match = re.match(r"\s*([A-Za-z]+[0-9]?(?![\w.])|[A-Za-z]+)", command)
+    return match.group(1).upper() if match else ""
+
+
+############## Backend interface ##############
+
+
+class OpticsBackend:
+    """
+    Interface between SystemSetup and the engine that holds the lens.
+    A driver only has to implement Command(); the queries (LIS, merit, EFL) and the
+    save/load helpers are written on top of it so that every driver answers them the same way.
+    Command() keeps the name of the CodeV COM method so that `system.cv.Command(...)` keeps working.
+    """
+
+    def start(self):
+        # Start the engine session
+        pass
+
+    def stop(self):
+        # Stop the engine session
+        pass
+
+    def Command(self, command):
+        raise NotImplementedError("Backends must implement Command().")
+
+    def list_system(self):
+        # Full LIS output of the current lens
+        return self.Command("LIS")
+
+    def get_efl(self):
+        return parse_efl(self.list_system())
+
+    def get_merit(self):
+        # Run the current AUT definition and return the error function
+        return parse_error_function(self.Command("GO"))
+
+    def rerun_merit(self):
+        # Re-enter AUT with the settings kept from the last run, and return the error function
+        return parse_error_function(self.Command("AUT; GO"))
+
+    def save(self, file_path, seq=True):
+        # Save the lens system as a sequence file (WRL) or a binary lens file (SAV)
+        if seq:
+            return self.Command(f"WRL {file_path}")
+        return self.Command(f"SAV {file_path}")
+
+    def load(self, file_path):
+        # Load a sequence file
+        return self.Command(f'run "{file_path}"; GO')
+
+
+class CodeVBackend(OpticsBackend):
+    """
+    Driver for a CodeV session reached through the COM server "CodeV.Application".
+    win32com is only imported here so that the rest of the package can be used on machines without CodeV.
+    """
+
+    def __init__(self, prog_id="CodeV.Application"):
+        import win32com.client
+        self._dispatch = win32com.client.Dispatch
+        self.prog_id = prog_id
+        self.app = self._dispatch(self.prog_id)
+
+    def start(self):
+        self.app = self._dispatch(self.prog_id)
+        self.app.StartCodeV()
+
+    def stop(self):
+        self.app.StopCodeV()
+
+    def Command(self, command):
+        return self.app.Command(command)
+
+
+class LocalBackend(OpticsBackend):
+    """
+    In-process stand-in for a CodeV session.
+    It interprets the subset of the CodeV command language used by SystemSetup (lens data,
+    system data, option blocks such as AUT/SPO/MTF, WRL/SAV/run) and answers LIS in the CodeV layout,
+    so that SystemSetup and its parsers run unchanged on any platform.
+    GO in AUT evaluates the error function with the local ray tracer (or `merit_function` when one is given);
+    the variables are never moved, there is no local optimizer. That error function is a stand-in for tests and
+    benchmarks, not CodeV's ERR. F. (see transverse_aberration_merit).
+    """
+
+    # Option blocks entered with a command and closed by GO or CAN
+    OPTION_VERBS = ('AUT', 'SPO', 'MTF')
+
+    def __init__(self, merit_function=None):
+        """
+        :param merit_function: Callable taking the backend and returning the error function value.
+                               Defaults to the transverse aberration merit of the local ray tracer.
+        """
+        self.merit_function = merit_function
+        self.catalog = GlassCatalog()  # Index tables at the lens wavelengths
+        self.options = {}
+        self.new_lens()
+
+    def new_lens(self):
+        # Empty lens: object and image surfaces only
+        self.surfaces = []  # S1..Sn, S1 is the stop
+        self.fields = []
+        self.wavelengths = []
+        self.catalog.set_wavelengths(self.wavelengths)
+        self.epd = None
+        self.fno = None
+        self.dimension = 'M'
+        self.paraxial_image = False
+        self.radius_mode = True
+        self.option = None  # Option block currently open
+        self.options = {verb: {} for verb in self.OPTION_VERBS}
+
+    ############## Command interpreter ##############
+
+    def Command(self, command):
+        outputs = []
+        for statement in command.split(';'):
+            if statement.strip():
+                output = self.execute(statement.strip())
+                if output:
+                    outputs.append(output)
+        return "\n".join(outputs)
+
+    def execute(self, statement):
+        verb = command_verb(statement)
+        args = statement[len(verb):].split()
+
+        # Inside an option block every command except GO/CAN is an option setting
+        if self.option is not None:
+            if verb == 'GO':
+                return self.run_option()
+            if verb == 'CAN':
+                self.options[self.option] = {}
+                self.option = None
+                return ""
+            self.options[self.option][verb] = " ".join(args)
+            return ""
+
+        if verb in self.OPTION_VERBS:
+            self.option = verb
+            return ""
+
+        handler = getattr(self, f"_cmd_{verb.lower()}", None)
+        if handler is None:
+            return ""
+        try:
+            return handler(args)
+        except (IndexError, ValueError) as e:
+            return f"ERROR: {statement}: {e}"
+
+    def run_option(self):
+        option = self.option
+        self.option = None
+        if option == 'AUT':
+            self.apply_solves()
+            merit = self.merit_function(self) if self.merit_function is not None else self.transverse_merit()
+            if merit is not None:
+                return f"ERR. F. = {merit:.6E}"
+        return ""
+
+    def _surface_index(self, token):
+        # 'S3' -> index 2 in self.surfaces
+        number = int(token.upper().lstrip('S'))
+        if number < 1 or number > len(self.surfaces):
+            raise ValueError(f"surface {number} does not exist")
+        return number - 1
+
+    def _cmd_new(self, args):
+        self.new_lens()
+        return ""
+
+    def _cmd_ins(self, args):
+        target = args[0].upper()
+        if target.startswith('F'):
+            index = int(target[1:]) - 1
+            self.fields.insert(index, (float(args[1]), float(args[2]) if len(args) > 2 else 0.0))
+            return ""
+        number = int(target.lstrip('S'))
+        if number < 1 or number > len(self.surfaces) + 1:
+            raise ValueError(f"cannot insert surface {number}")
+        radius = float(args[1]) if len(args) > 1 else 0.0
+        surface = {
+            'curvature': 1 / radius if radius != 0 else 0.0,
+            'thickness': float(args[2]) if len(args) > 2 else 0.0,
+            'glass': args[3] if len(args) > 3 else None,
+            'ccy': 100, 'thc': 100, 'gc1': 100,
+        }
+        self.surfaces.insert(number - 1, surface)
+        return ""
+
+    def _cmd_del(self, args):
+        del self.surfaces[self._surface_index(args[0])]
+        return ""
+
+    def _cmd_rdy(self, args):
+        radius = float(args[1])
+        self.surfaces[self._surface_index(args[0])]['curvature'] = 1 / radius if radius != 0 else 0.0
+        return ""
+
+    def _cmd_cuy(self, args):
+        self.surfaces[self._surface_index(args[0])]['curvature'] = float(args[1])
+        return ""
+
+    def _cmd_thi(self, args):
+        self.surfaces[self._surface_index(args[0])]['thickness'] = float(args[1])
+        return ""
+
+    def _cmd_gl1(self, args):
+        self.surfaces[self._surface_index(args[0])]['glass'] = args[1]
+        return ""
+
+    def _cmd_ccy(self, args):
+        self.surfaces[self._surface_index(args[0])]['ccy'] = int(float(args[1]))
+        return ""
+
+    def _cmd_thc(self, args):
+        self.surfaces[self._surface_index(args[0])]['thc'] = int(float(args[1]))
+        return ""
+
+    def _cmd_gc1(self, args):
+        self.surfaces[self._surface_index(args[0])]['gc1'] = int(float(args[1]))
+        return ""
+
+    def _cmd_wl(self, args):
+        self.wavelengths = [float(wl) for wl in args]
+        self.catalog.set_wavelengths(self.wavelengths)
+        return ""
+
+    def _cmd_epd(self, args):
+        self.epd, self.fno = float(args[0]), None
+        return ""
+
+    def _cmd_fno(self, args):
+        self.fno, self.epd = float(args[0]), None
+        return ""
+
+    def _cmd_dim(self, args):
+        self.dimension = args[0].upper()
+        return ""
+
+    def _cmd_pim(self, args):
+        self.paraxial_image = not args or args[0].upper().startswith('Y')
+        return ""
+
+    def _cmd_rdm(self, args):
+        self.radius_mode = not args or args[0].upper().startswith('Y')
+        return ""
+
+    def _cmd_lis(self, args):
+        self.apply_solves()
+        return self.listing()
+
+    def _cmd_wrl(self, args):
+        self.apply_solves()
+        self.write_sequence(args[0].strip('"'))
+        return ""
+
+    def _cmd_sav(self, args):
+        self.apply_solves()
+        self.write_sequence(args[0].strip('"'))
+        return ""
+
+    def _cmd_run(self, args):
+        file_path = " ".join(args).strip().strip('"')
+        if not os.path.exists(file_path) and os.path.exists(file_path + ".seq"):
+            file_path += ".seq"
+        with open(file_path) as file:
+            for line in file:
+                if line.strip():
+                    self.Command(line.strip())
+        return ""
+
+    ############## First-order data ##############
+
+    def first_order(self):
+        """
+        Paraxial data of the lens at the reference wavelength, or None if the lens is empty
+        or uses a glass without known index.
+        """
+        if not self.surfaces:
+            return None
+        try:
+            indices = self.catalog.reference_indices([surface['glass'] for surface in self.surfaces])
+        except KeyError:
+            return None
+        properties = first_order_properties([surface['curvature'] for surface in self.surfaces],
+                                            [surface['thickness'] for surface in self.surfaces],
+                                            indices, epd=self.epd, fno=self.fno)
+        return {key: float(value) for key, value in properties.items()}
+
+    def transverse_merit(self):
+        # Error function of the current AUT definition traced locally (ray grid from DEL)
+        try:
+            delta = float(self.options['AUT'].get('DEL', 0.15))
+        except ValueError:
+            delta = 0.15
+        try:
+            indices = self.catalog.index_table([surface['glass'] for surface in self.surfaces])
+        except KeyError:
+            return None
+        return system_merit([surface['curvature'] for surface in self.surfaces],
+                            [surface['thickness'] for surface in self.surfaces],
+                            indices, self.fields, epd=self.epd, fno=self.fno, delta=delta)
+
+    def apply_solves(self):
+        # Paraxial image solve on the last thickness (PIM)
+        if self.paraxial_image:
+            properties = self.first_order()
+            if properties is not None and np.isfinite(properties['pim']):
+                self.surfaces[-1]['thickness'] = properties['pim']
+
+    ############## Outputs ##############
+
+    def listing(self):
+        """ LIS output in the CodeV layout: surface table, then the specification data. """
+        value_header = 'RDY' if self.radius_mode else 'CUY'
+        lines = [f"{'':10}{value_header:>14}{'THI':>18}{'RMD':>8}{'GLA':>14}{'CCY':>10}{'THC':>6}",
+                 f"> OBJ:{'INFINITY':>19}{'INFINITY':>18}{'':>22}{'100':>10}{'100':>6}"]
+        for number, surface in enumerate(self.surfaces, start=1):
+            label = "STO" if number == 1 else str(number)
+            curvature = surface['curvature']
+            if self.radius_mode:
+                value = f"{1 / curvature:.6f}" if curvature != 0 else "INFINITY"
+            else:
+                value = f"{curvature:.10E}"
+            glass = surface['glass'] or ""
+            lines.append(f"{label:>5}:{value:>19}{surface['thickness']:>18.6f}{'':>8}{glass:>14}"
+                         f"{surface['ccy']:>10}{surface['thc']:>6}")
+        lines.append(f"  IMG:{'INFINITY':>19}{0:>18.6f}{'':>22}{'100':>10}{'100':>6}")
+        lines.append(" ")
+        lines.append(" SPECIFICATION DATA")
+        if self.epd is not None:
+            lines.append(f" EPD{self.epd:>17.5f}")
+        if self.fno is not None:
+            lines.append(f" FNO{self.fno:>17.5f}")
+        lines.append(f" DIM{self.dimension:>9}")
+        if self.wavelengths:
+            lines.append(" WL " + "".join(f"{wl:>12.2f}" for wl in self.wavelengths))
+        if self.fields:
+            lines.append(" XAN" + "".join(f"{x:>12.5f}" for x, y in self.fields))
+            lines.append(" YAN" + "".join(f"{y:>12.5f}" for x, y in self.fields))
+
+        properties = self.first_order()
+        if properties is not None:
+            lines.append(" ")
+            lines.append(" INFINITE CONJUGATES")
+            lines.append(f" EFL{properties['efl']:>17.4f}")
+            lines.append(f" BFL{properties['bfl']:>17.4f}")
+            lines.append(f" FFL{properties['ffl']:>17.4f}")
+            if properties['efl'] != 0 and np.isfinite(properties['entrance_pupil_diameter']):
+                lines.append(f" FNO{abs(properties['efl']) / properties['entrance_pupil_diameter']:>17.4f}")
+            lines.append(" PARAXIAL IMAGE")
+            lines.append(f"  THI{properties['pim']:>16.4f}")
+            lines.append(" ENTRANCE PUPIL")
+            lines.append(f"  DIA{properties['entrance_pupil_diameter']:>16.4f}")
+            lines.append(f"  THI{properties['entrance_pupil_position']:>16.4f}")
+            lines.append(" EXIT PUPIL")
+            lines.append(f"  DIA{properties['exit_pupil_diameter']:>16.4f}")
+            lines.append(f"  THI{properties['exit_pupil_position']:>16.4f}")
+        return "\n".join(lines)
+
+    def write_sequence(self, file_path):
+        # Write the lens as a sequence of commands that `run` can replay
+        if not os.path.splitext(file_path)[1]:
+            file_path += ".seq"
+        directory = os.path.dirname(file_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        lines = ["new", f"DIM {self.dimension}"]
+        if self.wavelengths:
+            lines.append("WL " + " ".join(map(str, self.wavelengths)))
+        if self.epd is not None:
+            lines.append(f"EPD {self.epd}")
+        if self.fno is not None:
+            lines.append(f"FNO {self.fno}")
+        for index, (x, y) in enumerate(self.fields, start=1):
+            lines.append(f"INS F{index} {x} {y}")
+        for number, surface in enumerate(self.surfaces, start=1):
+            radius = 1 / surface['curvature'] if surface['curvature'] != 0 else 0
+            lines.append(f"INS S{number} {radius!r} {surface['thickness']!r} {surface['glass'] or ''}".rstrip())
+            lines.append(f"CCY S{number} {surface['ccy']}")
+            lines.append(f"THC S{number} {surface['thc']}")
+            lines.append(f"GC1 S{number} {surface['gc1']}")
+        if self.paraxial_image:
+            lines.append("PIM Yes")
+        lines.append(f"RDM {'Y' if self.radius_mode else 'N'}")
+        with open(file_path, 'w') as file:
+            file.write("\n".join(lines) + "\n")
+
+
+############## Record and replay ##############
+
+
+def text_digest(output):
+    # Short content hash of a command or of its output
+    return hashlib.sha1((output or "").encode('utf-8')).hexdigest()[:16]
+
+
+def read_recording(file_path):
+    """
+    Read a session written by RecordingBackend.
+    :param file_path: Path of the gzip JSON-lines recording.
+    :return: List of (command, output) pairs in the order they were sent.
+    """
+    outputs = {}
+    exchanges = []
+    with gzip.open(file_path, 'rt', encoding='utf-8') as file:
+        for line in file:
+            entry = json.loads(line)
+            if 'o' in entry:
+                outputs[entry['h']] = entry['o']
+            exchanges.append((entry['c'], outputs[entry['h']]))
+    return exchanges
+
+
+def command_counts(exchanges):
+    """
+    Number of statements sent per verb.
+    :param exchanges: List of (command, output) pairs, or the path of a recording.
+    :return: Counter verb -> statements, with the total number of round trips under 'round trips'.
+    """
+    if isinstance(exchanges, str):
+        exchanges = read_recording(exchanges)
+    counts = Counter()
+    for command, _ in exchanges:
+        counts['round trips'] += 1
+        counts.update(command_verb(statement) for statement in command.split(';') if statement.strip())
+    return counts
+
+
+def diff_command_counts(before, after):
+    """
+    Compare the commands sent by two runs (e.g. two versions of the code on the same exploration).
+    :param before: Recording path or list of (command, output) pairs of the reference run.
+    :param after: Same for the new run.
+    :return: Dict verb -> (before count, after count, difference) for the verbs whose count changed,
+             largest change first.
+    """
+    counts_before, counts_after = command_counts(before), command_counts(after)
+    diff = {verb: (counts_before[verb], counts_after[verb], counts_after[verb] - counts_before[verb])
+            for verb in set(counts_before) | set(counts_after)
+            if counts_before[verb] != counts_after[verb]}
+    return dict(sorted(diff.items(), key=lambda item: -abs(item[1][2])))
+
+
+class RecordingBackend(OpticsBackend):
+    """
+    Driver wrapper logging every command sent to another driver, with its textual output,
+    to a gzip JSON-lines file that ReplayBackend can serve back without the engine.
+    Each line holds the command 'c' and the hash 'h' of its output; the output text 'o'
+    is only written the first time it appears, so repeated listings cost a few bytes.
+    """
+
+    def __init__(self, backend, file_path):
+        """
+        :param backend: The driver actually answering the commands (CodeVBackend, LocalBackend, ...).
+        :param file_path: Path of the recording, overwritten if it exists.
+        """
+        self.backend = backend
+        self.file_path = file_path
+        directory = os.path.dirname(file_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.file = gzip.open(file_path, 'wt', encoding='utf-8')
+        self.seen = set()
+        self.count = 0
+
+    def start(self):
+        self.backend.start()
+
+    def stop(self):
+        self.backend.stop()
+        self.close()
+
+    def close(self):
+        # Write the end of the gzip stream; later commands are still sent but no longer recorded
+        if not self.file.closed:
+            self.file.close()
+
+    def Command(self, command):
+        output = self.backend.Command(command)
+        if not self.file.closed:
+            digest = text_digest(output)
+            entry = {'c': command, 'h': digest}
+            if digest not in self.seen:
+                self.seen.add(digest)
+                entry['o'] = output or ""
+            self.file.write(json.dumps(entry, separators=(',', ':')) + "\n")
+        self.count += 1
+        return output
+
+
+class ReplayMismatch(Exception):
+    """
+    Raised by ReplayBackend when a command has no recorded answer.
+    """
+
+
+class ReplayBackend(OpticsBackend):
+    """
+    Driver answering commands from a RecordingBackend file, without any engine.
+    With key='sequence' the n-th command must be the n-th recorded one (the run is replayed exactly,
+    any divergence raises ReplayMismatch). With key='hash' outputs are looked up by the content of
+    the command: the recorded answers of each distinct command are served in order, the last one
+    being repeated, so that a version of the code sending fewer or reordered commands can still run.
+    """
+
+    def __init__(self, file_path, key='sequence'):
+        """
+        :param file_path: Path of the recording.
+        :param key: 'sequence' or 'hash'.
+        """
+        if key not in ('sequence', 'hash'):
+            raise ValueError("key must be 'sequence' or 'hash'.")
+        self.key = key
+        self.exchanges = read_recording(file_path)
+        self.position = 0
+        self.sent = []  # Commands served, for command_counts / diff_command_counts
+        self.answers = defaultdict(deque)
+        for command, output in self.exchanges:
+            self.answers[text_digest(command)].append(output)
+
+    def Command(self, command):
+        self.sent.append((command, None))
+        if self.key == 'sequence':
+            if self.position >= len(self.exchanges):
+                raise ReplayMismatch(f"Command {self.position + 1} ({command!r}) is past the end of the recording.")
+            recorded, output = self.exchanges[self.position]
+            if recorded != command:
+                raise ReplayMismatch(f"Command {self.position + 1} is {command!r}, the recording has {recorded!r}.")
+            self.position += 1
+            return output
+
+        answers = self.answers.get(text_digest(command))
+        if not answers:
+            raise ReplayMismatch(f"Command {command!r} is not in the recording.")
+        return answers.popleft() if len(answers) > 1 else answers[0]
@@ -0,0 +1,100 @@
+# ==============================================================================
+# PROJECT INFORMATION
+# ==============================================================================
+# Project Title: ODAI
+# Version: v1.0.0
+# Description: Optical System Design Optimization: Saddle Point Application
+#
+# AUTHORS
+# ==============================================================================
+# Aurélien Argy, Florin Baumann, Jelil Belheine, Pierre-Gabriel Bibal-Sobeaux,
+# Benoit Brouillet
+# Institution: Télécom Physique Strasbourg, Université de Strasbourg,
+# Illkirch-Graffenstaden, France
+#
+# LICENSE
+# ==============================================================================
+# This project is licensed under the GPL 3.0 License.
+# For more details, see the LICENSE file in the project root.
+#
+# DATE
+# ==============================================================================
+# Date of Creation: 04/04/2024
+#
+# ==============================================================================
+# NOTES
+# ==============================================================================
+# The code is developed using CodeV version 2022.03 and is intended for use under
+# the guidelines of the GPL 3.0 License.
+# ==============================================================================
+
+
+import numpy as np
+
+
+def evaluate_design(session, base_state, surfaces, efl):
+    """
+    Merit of one design on a session (a SessionPool job or the coordinating SystemSetup).
+    :param base_state: State saved by save_system_parameters; it is only restored when the session
+                       does not hold the same surfaces yet, the design values are set over it.
+    :param surfaces: {surface number: (radius, thickness, material)} of the design.
+    :return: error_fct value, or None if it cannot be computed.
+    """
+    if sorted(session.surfaces) != sorted(base_state['surfaces']):
+        session.load_system_parameters(base_state)
+    with session.batch():
+        for number, (radius, thickness, material) in surfaces.items():
+            surface = session.get_surface(number)
+            surface.set_radius(radius)
+            surface.set_thickness(thickness)
+            if material is not None:
+                surface.set_material(material)
+    return session.error_fct(efl)
+
+
+class DesignEvaluator:
+    """
+    Merit values of populations of designs given as decision vectors, for population-based optimizers
+    such as pygmo (batch_fitness). Designs already evaluated are served from a cache, and the new ones
+    of a population are evaluated at once, as SessionPool jobs or one after the other on the coordinating
+    session. The merit is always error_fct.
+    """
+
+    def __init__(self, system_setup, design_surfaces, efl, pool=None, failure_value=np.inf):
+        """
+        :param system_setup: Coordinating SystemSetup, holding the base system the designs modify.
+        :param design_surfaces: Function mapping a decision vector to {surface number: (radius, thickness, material)}.
+        :param efl: EFL target of error_fct.
+        :param pool: Optional SessionPool evaluating the designs.
+        :param failure_value: Merit given to the designs that cannot be evaluated.
+        """
+        self.system_setup = system_setup
+        self.design_surfaces = design_surfaces
+        self.efl = efl
+        self.pool = pool
+        self.failure_value = failure_value
+        self.base_state = system_setup.save_system_parameters()
+        self.cache = {}
+        self.evaluations = 0  # Designs actually evaluated
+        self.requests = 0  # Designs asked for
+
+    def evaluate(self, designs):
+        """
+        :param designs: Array (designs, dimension) of decision vectors.
+        :return: Array (designs,) of merit values.
+        """
+        keys = [tuple(float(value) for value in design) for design in np.atleast_2d(designs)]
+        new_keys = list(dict.fromkeys(key for key in keys if key not in self.cache))
+        if new_keys:
+            if self.pool is not None:
+                futures = [self.pool.submit(evaluate_design, self.base_state, self.design_surfaces(np.array(key)), self.efl)
+                           for key in new_keys]
+                merits = [future.result() for future in futures]
+            else:
+                merits = [evaluate_design(self.system_setup, self.base_state, self.design_surfaces(np.array(key)), self.efl)
+                          for key in new_keys]
+            for key, merit in zip(new_keys, merits):
+                self.cache[key] = self.failure_value if merit is None or not np.isfinite(merit) else float(merit)
+            self.evaluations += len(new_keys)
+        self.requests += len(keys)
+        return np.array([self.cache[key] for key in keys])
@@ -0,0 +1,415 @@
+# ==============================================================================
+# PROJECT INFORMATION
+# ==============================================================================
+# Project Title: ODAI
+# Version: v1.0.0
+# Description: Optical System Design Optimization: Saddle Point Application
+#
+# AUTHORS
+# ==============================================================================
+# Aurélien Argy, Florin Baumann, Jelil Belheine, Pierre-Gabriel Bibal-Sobeaux,
+# Benoit Brouillet
+# Institution: Télécom Physique Strasbourg, Université de Strasbourg,
+# Illkirch-Graffenstaden, France
+#
+# LICENSE
+# ==============================================================================
+# This project is licensed under the GPL 3.0 License.
+# For more details, see the LICENSE file in the project root.
+#
+# DATE
+# ==============================================================================
+# Date of Creation: 04/04/2024
+#
+# ==============================================================================
+# NOTES
+# ==============================================================================
+# The code is developed using CodeV version 2022.03 and is intended for use under
+# the guidelines of the GPL 3.0 License.
+# ==============================================================================
+
+import re
+import warnings
+import numpy as np
+
+
+############## LIS ##############
+
+
+# Surface rows of a LIS: surface number (STO is 1), radius or curvature (0 for a flat surface),
+# thickness, glass ('' for air) and the mode of the value column ('radius' or 'curvature')
+LIS_SURFACE_DTYPE = np.dtype([('surface', 'i4'), ('value', 'f8'), ('thickness', 'f8'), ('glass', 'U40'), ('mode', 'U9')])
+
+# Headings that open the first-order data following the specification data
+FIRST_ORDER_HEADINGS = ('INFINITE CONJUGATES', 'FINITE CONJUGATES')
+
+# Words of the RMD column, which are not glasses
+RMD_WORDS = ('REFL', 'REFR')
+
+# Solve and pickup codes printed in the code columns (CCY, THC, GLC) in place of a variable code
+SOLVE_CODES = ('PIM', 'PUX', 'PUY', 'PUC', 'PCX', 'PCY', 'UMX', 'UMY', 'UCX', 'UCY', 'IMX', 'IMY', 'EDG', 'P')
+
+
+def lis_number(token):
+    """
+    Value of a numeric LIS token ('INFINITY' is inf).
+    :return: The float, or None if the token is not a number.
+    """
+    if token == 'INFINITY':
+        return np.inf
+    try:
+        return float(token)
+    except ValueError:
+        return None
+
+
+def is_integer_token(token):
+    # Variable codes (CCY, THC, ...) are printed as integers
+    return token.lstrip('-').isdigit()
+
+
+def lis_glass(tokens):
+    """
+    Glass of a surface row, from the tokens following its thickness.
+    The glass comes before the code columns: reading stops at the first variable or solve code.
+    :return: The glass name without quotes, catalog suffix kept (e.g. 'N-BK7_SCHOTT'), '' for air.
+    """
+    for token in tokens:
+        if token in RMD_WORDS:
+            continue
+        if is_integer_token(token) or token in SOLVE_CODES:
+            return ''
+        return token.strip("'\"")
+    return ''
+
+
+def parse_lis(text):
+    """
+    Parse a LIS output in a single pass over its lines.
+    The lens data table ends at "SPECIFICATION DATA"; the specification data is skipped and the
+    first-order data that follows (INFINITE CONJUGATES and its blocks) is read as keyword/value pairs.
+    :param text: Output of the LIS command.
+    :return: (surfaces, system_data, mode): structured array of LIS_SURFACE_DTYPE rows for STO and
+             the numbered surfaces, dict of first-order values (e.g. 'EFL', 'BFL', 'FNO',
+             'PARAXIAL IMAGE THI', 'ENTRANCE PUPIL DIA'), and the mode of the value column.
+    """
+    mode = 'radius'
+    rows = []
+    system_data = {}
+    section = 'LENS'  # 'LENS', 'SPECIFICATION' or 'FIRST ORDER'
+    block = None  # Heading of the current first-order block
+
+    for line in (text or "").splitlines():
+        tokens = line.split()
+        if not tokens:
+            continue
+
+        if section == 'LENS':
+            # '>' marks a surface in the first column, alone or stuck to the label
+            if tokens[0].startswith('>'):
+                tokens = [tokens[0][1:]] + tokens[1:] if len(tokens[0]) > 1 else tokens[1:]
+            label = tokens[0] if tokens else ''
+            if label.endswith(':'):
+                label = label[:-1]
+                if (label == 'STO' or label.isdigit()) and len(tokens) >= 3:
+                    value, thickness = lis_number(tokens[1]), lis_number(tokens[2])
+                    if value is None or thickness is None:
+                        continue
+                    if np.isinf(value):
+                        value = 0.0  # Flat surface
+                    rows.append((1 if label == 'STO' else int(label), value, thickness, lis_glass(tokens[3:]), mode))
+            elif tokens[:2] == ['SPECIFICATION', 'DATA']:
+                section = 'SPECIFICATION'
+            elif 'CUY' in tokens and 'THI' in tokens:
+                mode = 'curvature'
+            elif 'RDY' in tokens and 'THI' in tokens:
+                mode = 'radius'
+            continue
+
+        heading = " ".join(tokens)
+        if heading in FIRST_ORDER_HEADINGS:
+            section, block = 'FIRST ORDER', None
+            continue
+        if section != 'FIRST ORDER':
+            continue
+
+        value = lis_number(tokens[-1])
+        if value is None:
+            block = heading
+        elif len(tokens) > 1:
+            key = " ".join(tokens[:-1])
+            system_data[f"{block} {key}" if block else key] = value
+
+    return np.array(rows, dtype=LIS_SURFACE_DTYPE), system_data, mode
+
+
+class LisSnapshot:
+    """
+    Parsed LIS output for one state of the lens.
+    The listing is parsed on first access and the results are kept, so that all the
+    read-back helpers of SystemSetup share a single LIS per state version.
+    """
+
+    def __init__(self, text, version=None):
+        """
+        :param text: Output of the LIS command.
+        :param version: State version of the command channel when the listing was taken.
+        """
+        self.text = text or ""
+        self.version = version
+        self._parsed = None
+
+    def parsed(self):
+        if self._parsed is None:
+            self._parsed = parse_lis(self.text)
+        return self._parsed
+
+    @property
+    def surfaces(self):
+        # Structured array of the surface rows (LIS_SURFACE_DTYPE), in listing order
+        return self.parsed()[0]
+
+    @property
+    def system_data(self):
+        # First-order data of the listing
+        return self.parsed()[1]
+
+    @property
+    def is_curvature_mode(self):
+        return self.parsed()[2] == 'curvature'
+
+    @property
+    def surface_count(self):
+        # Number of surfaces (including STO)
+        return len(self.surfaces)
+
+    @property
+    def thicknesses(self):
+        # {surface number: thickness}
+        return dict(zip(self.surfaces['surface'].tolist(), self.surfaces['thickness'].tolist()))
+
+    @property
+    def efl(self):
+        # EFL of the listing, None if it is not found
+        return self.system_data.get('EFL')
+
+    def lens_data(self):
+        # Lines of the listing before the specification data
+        lines = []
+        for line in self.text.split('\n'):
+            if "SPECIFICATION DATA" in line:
+                break
+            lines.append(line)
+        return "\n".join(lines)
+
+
+############## SPO ##############
+
+
+SPOT_FIELD_PATTERN = re.compile(r"Field\s+(\d+),\s+\(\s*([-\d.]+),\s*([-\d.]+)\)\s+degrees")
+SPOT_WAVELENGTH_PATTERN = re.compile(r"Wavelength\s+(\d+\.\d+)")
+SPOT_STATS_PATTERN = re.compile(r"X:\s+([-\d.E+]+)\s+Y:\s+([-\d.E+]+)\s+([\d.E+-]+)")
+SPOT_NUMBER_PATTERN = re.compile(r"-?\d+\.\d+")
+
+# Headers of the two statistics blocks of a field, and the kind of event they give
+SPOT_STATS_HEADERS = (('Minimum RMS spot diameter', 'rms'), ('Minimum 100% spot diameter', 'spot'))
+
+
+def spot_block_points(lines):
+    """
+    X, Y intercepts of the lines of a ray data block.
+    Blocks made of decimal numbers only are converted in one call; otherwise the decimal numbers
+    are picked from each line and paired within the line.
+    :return: Array (rays, 2).
+    """
+    block = " ".join(lines)
+    try:
+        with warnings.catch_warnings():
+            # Text that is not all numbers stops the conversion with a warning or an error, depending on NumPy
+            warnings.simplefilter('ignore', DeprecationWarning)
+            values = np.fromstring(block, sep=' ')
+    except ValueError:
+        values = np.empty(0)
+    if values.size != block.count('.') or values.size % 2:
+        values = []
+        for line in lines:
+            numbers = SPOT_NUMBER_PATTERN.findall(line)
+            values.extend(numbers[:len(numbers) // 2 * 2])
+        values = np.array(values, dtype=float)
+    return values.reshape(-1, 2)
+
+
+def iter_spot_report(text):
+    """
+    Stream the output of SPO with LIS YES, in one pass over its lines.
+    A field's ray data runs from its first "Wavelength" line to the next line containing "Ray"
+    or starting with "The"; its statistics come before its ray data.
+    :param text: Output of the SPO GO command.
+    :return: Generator of events:
+             ('field', (x angle, y angle)) for each "Field n, (x, y) degrees" line,
+             ('rays', field index, wavelength, array (rays, 2) of X, Y intercepts) for each wavelength block,
+             ('rms', (centroid x, centroid y, RMS diameter)) and ('spot', (center x, center y, 100% diameter))
+             for the statistics, in the order of the report.
+    """
+    field_index = 0  # Field of the ray data being read
+    wavelength = None  # Wavelength of the block being read, None outside of ray data
+    block = []
+    stats = None  # Statistics block whose values line is expected
+
+    for line in (text or "").splitlines():
+        if wavelength is not None:
+            match = 'Wavelength' in line and SPOT_WAVELENGTH_PATTERN.search(line)
+            if match or 'Ray' in line or line.lstrip().startswith('The'):
+                yield 'rays', field_index, wavelength, spot_block_points(block)
+                block = []
+                if match:
+                    wavelength = float(match.group(1))
+                else:
+                    wavelength = None
+                    field_index += 1
+                continue
+            block.append(line)
+            continue
+
+        match = SPOT_FIELD_PATTERN.search(line)
+        if match:
+            yield 'field', (float(match.group(2)), float(match.group(3)))
+            continue
+
+        match = SPOT_WAVELENGTH_PATTERN.search(line)
+        if match:
+            wavelength = float(match.group(1))
+            continue
+
+        for header, kind in SPOT_STATS_HEADERS:
+            if header in line:
+                stats = kind
+                line = line[line.index(header) + len(header):]
+        if stats is not None:
+            match = SPOT_STATS_PATTERN.search(line)
+            if match:
+                yield stats, tuple(float(value) for value in match.groups())
+                stats = None
+
+    if wavelength is not None:
+        yield 'rays', field_index, wavelength, spot_block_points(block)
+
+
+def parse_spot_report(text):
+    """
+    Collect the events of iter_spot_report.
+    :return: Dict with 'field_angles' (list of (x, y) angles), 'rays' (one {wavelength: array (rays, 2)}
+             per field), 'rms' and 'spot' (lists of (x, y, diameter), in field order).
+    """
+    report = {'field_angles': [], 'rays': [], 'rms': [], 'spot': []}
+    for event in iter_spot_report(text):
+        kind = event[0]
+        if kind == 'rays':
+            _, field_index, wavelength, points = event
+            while len(report['rays']) <= field_index:
+                report['rays'].append({})
+            report['rays'][field_index][wavelength] = points
+        elif kind == 'field':
+            report['field_angles'].append(event[1])
+        else:
+            report[kind].append(event[1])
+    return report
+
+
+############## MTF ##############
+
+
+# MTF rows of an MTF report: field index (from 0), spatial frequency (cycles/mm), the column that follows it,
+# the diffraction limit and the MTF at the focus position, radial and tangential
+MTF_DTYPE = np.dtype([('field', 'i4'), ('frequency', 'f8'), ('f_5000', 'f8'),
+                      ('diff_r', 'f8'), ('diff_t', 'f8'), ('mtf_r', 'f8'), ('mtf_t', 'f8')])
+MTF_WAVELENGTH_DTYPE = np.dtype([('wavelength', 'f8'), ('weight', 'i4'), ('rays', 'i4')])
+
+MTF_NUMBER_PATTERN = re.compile(r'-?\d+\.\d+E[+-]\d+|-?\d+\.\d+')
+MTF_WAVELENGTH_PATTERN = re.compile(r'\s+(\d+\.\d+)\s+NM\s+(\d+)\s+(\d+)')
+MTF_FIELD_PATTERN = re.compile(r'FIELD\s+(\d+)\s+\(ANG\)\s+=\s+\(\s*(-?[\d.]+),\s*(-?[\d.]+)\)\s+DEG,')
+
+# Section headers of the report and the section they open
+MTF_SECTIONS = (('X and Y focal lengths for each field angle', 'focal_lengths'),
+                ('X and Y F-numbers for each field angle', 'f_numbers'),
+                ('Reference sphere radius for each field angle', 'reference_sphere'),
+                ('DIFFRACTION LIMIT', 'mtf'))
+
+
+def mtf_row(line):
+    """
+    Values of an MTF table row: an integer frequency followed by five numbers.
+    :return: Tuple of six floats, or None if the line is not a table row.
+    """
+    tokens = line.split()
+    if len(tokens) < 6 or not tokens[0].isdigit():
+        return None
+    try:
+        return tuple(map(float, tokens[:6]))
+    except ValueError:
+        return None
+
+
+def parse_mtf_report(text):
+    """
+    Parse the output of MTF GO in a single pass, section by section.
+    A new field table starts after a DIFFRACTION LIMIT header or a FIELD line, or when the frequency
+    stops increasing, so that tables of any number of frequencies are split correctly.
+    :param text: Output of the MTF GO command.
+    :return: Dict with 'mtf' (structured array of MTF_DTYPE rows, in report order),
+             'wavelengths' (structured array of MTF_WAVELENGTH_DTYPE), 'field_angles' (array (fields, 2)
+             of X, Y angles in degrees), 'focal_lengths' and 'f_numbers' (arrays (fields, 2) of X, Y values).
+    """
+    section = None
+    table = -1  # Index of the current MTF table, one per field
+    new_table = True
+    last_frequency = None
+    rows = []
+    wavelengths = {}
+    field_angles = []
+    focal_lengths = []
+    f_numbers = []
+
+    for line in (text or "").splitlines():
+        # Table rows first: they are most of the report
+        if section == 'mtf':
+            row = mtf_row(line)
+            if row is not None:
+                if new_table or row[0] <= last_frequency:
+                    table += 1
+                    new_table = False
+                last_frequency = row[0]
+                rows.append((table,) + row)
+                continue
+
+        header = next((name for title, name in MTF_SECTIONS if title in line), None)
+        if header is not None:
+            section = header
+            new_table = new_table or header == 'mtf'
+            continue
+
+        if 'FIELD' in line:
+            match = MTF_FIELD_PATTERN.search(line)
+            if match:
+                field_angles.append((float(match.group(2)), float(match.group(3))))
+                new_table = True
+                continue
+
+        if 'NM' in line:
+            match = MTF_WAVELENGTH_PATTERN.search(line)
+            if match:
+                wavelengths.setdefault(float(match.group(1)), (int(match.group(2)), int(match.group(3))))
+                continue
+
+        if section in ('focal_lengths', 'f_numbers'):
+            values = [float(value) for value in MTF_NUMBER_PATTERN.findall(line)]
+            (focal_lengths if section == 'focal_lengths' else f_numbers).extend(values[:len(values) // 2 * 2])
+
+    return {
+        'mtf': np.array(rows, dtype=MTF_DTYPE),
+        'wavelengths': np.array([(wavelength, weight, rays) for wavelength, (weight, rays) in wavelengths.items()],
+                                dtype=MTF_WAVELENGTH_DTYPE),
+        'field_angles': np.array(field_angles, dtype=float).reshape(-1, 2),
+        'focal_lengths': np.array(focal_lengths, dtype=float).reshape(-1, 2),
+        'f_numbers': np.array(f_numbers, dtype=float).reshape(-1, 2),
+    }
@@ -0,0 +1,163 @@
+# ==============================================================================
+# PROJECT INFORMATION
+# ==============================================================================
+# Project Title: ODAI
+# Version: v1.0.0
+# Description: Optical System Design Optimization: Saddle Point Application
+#
+# AUTHORS
+# ==============================================================================
+# Aurélien Argy, Florin Baumann, Jelil Belheine, Pierre-Gabriel Bibal-Sobeaux,
+# Benoit Brouillet
+# Institution: Télécom Physique Strasbourg, Université de Strasbourg,
+# Illkirch-Graffenstaden, France
+#
+# LICENSE
+# ==============================================================================
+# This project is licensed under the GPL 3.0 License.
+# For more details, see the LICENSE file in the project root.
+#
+# DATE
+# ==============================================================================
+# Date of Creation: 04/04/2024
+#
+# ==============================================================================
+# NOTES
+# ==============================================================================
+# The code is developed using CodeV version 2022.03 and is intended for use under
+# the guidelines of the GPL 3.0 License.
+# ==============================================================================
+
+
+from contextlib import contextmanager
+from Backend_module import OpticsBackend, command_verb
+from CodeVOutput_module import LisSnapshot
+from Instrumentation_module import CommandProfiler
+
+
+# Commands whose output is never read: lens data, system data, and AUT/SPO/MTF option settings.
+# Everything else (LIS, GO, EVA, RUN, WRL, ...) is a query and is sent at once.
+WRITE_ONLY_VERBS = {
+    'NEW', 'INS', 'DEL', 'RDY', 'CUY', 'THI', 'CCY', 'THC', 'GC1', 'GL1', 'RDM',
+    'WL', 'REF', 'WTW', 'EPD', 'FNO', 'DIM', 'PIM', 'XAN', 'YAN', 'WTF', 'VUY', 'VLY', 'INI',
+    'AUT', 'SPO', 'MTF', 'CAN', 'MNA', 'MAE', 'MNT', 'MXT', 'MNC', 'MXC', 'IMP', 'WFR',
+    'EFL', 'CNV', 'SD', 'GLA', 'GS', 'TIM', 'DRA', 'GEO',
+}
+
+# Commands that leave the lens state as it is; every other command bumps the state version
+READ_ONLY_VERBS = {'LIS', 'WRL', 'SAV'}
+
+# Commands that replace the AUT definition kept by the engine (new settings or a new lens)
+DEFINITION_VERBS = {'AUT', 'NEW', 'RUN', 'RES', 'IN'}
+
+
+def command_verbs(command):
+    # Verbs of the statements of a semicolon-separated command
+    return [command_verb(statement) for statement in command.split(';') if statement.strip()]
+
+
+def is_write_only(command):
+    # True if no statement of the command returns output that is read
+    for verb in command_verbs(command):
+        if verb not in WRITE_ONLY_VERBS and verb.rstrip('0123456789') not in WRITE_ONLY_VERBS:
+            return False
+    return True
+
+
+class CommandChannel(OpticsBackend):
+    """
+    Buffered channel in front of a backend.
+    Inside a batch() block, write-only commands are queued instead of being sent one by one.
+    The queue goes out as a single semicolon-joined submission together with the next query,
+    when the outermost block ends, or when it grows longer than max_length characters.
+    Outside of any block every command is sent immediately, as with the backend itself.
+    """
+
+    def __init__(self, backend, max_length=2000):
+        """
+        :param backend: The OpticsBackend that holds the lens.
+        :param max_length: Maximum length of a joined submission.
+        """
+        self.backend = backend
+        self.max_length = max_length
+        self.pending = []
+        self.depth = 0  # Number of nested batch() blocks
+        self.submissions = 0  # Round trips made to the backend
+        self.definition_version = 0  # Bumped by every command that can change the AUT definition
+        self.state_version = 0  # Bumped by every command that can change the lens
+        self._snapshot = None
+        self.profiler = CommandProfiler()  # Verb, latency, output size and phase of every round trip
+
+    def start(self):
+        self.pending = []
+        self.state_version += 1
+        self.backend.start()
+
+    def stop(self):
+        self.flush()
+        self.backend.stop()
+
+    def Command(self, command):
+        verbs = command_verbs(command)
+        self.profiler.count(verbs)
+        if any(verb not in READ_ONLY_VERBS for verb in verbs):
+            self.state_version += 1
+        if any(verb in DEFINITION_VERBS for verb in verbs):
+            self.definition_version += 1
+
+        if self.depth and is_write_only(command):
+            if self.pending and len(self.pending_text()) + len(command) + 2 > self.max_length:
+                self.flush()
+            self.pending.append(command.strip().rstrip(';'))
+            return ""
+
+        # Query (or no batch open): send it along with the queued commands
+        if self.pending:
+            self.pending.append(command)
+            command = self.pending_text()
+            self.pending = []
+        return self.submit(command)
+
+    def snapshot(self):
+        """
+        Parsed LIS of the current state. A new LIS is only issued when a command
+        has changed the lens since the last snapshot.
+        :return: LisSnapshot.
+        """
+        if self._snapshot is None or self._snapshot.version != self.state_version:
+            self._snapshot = LisSnapshot(self.Command("LIS"), self.state_version)
+        return self._snapshot
+
+    def list_system(self):
+        return self.snapshot().text
+
+    def get_efl(self):
+        return self.snapshot().efl
+
+    def pending_text(self):
+        return "; ".join(self.pending)
+
+    def flush(self):
+        # Send the queued commands, if any
+        if not self.pending:
+            return ""
+        command = self.pending_text()
+        self.pending = []
+        return self.submit(command)
+
+    def submit(self, command):
+        self.submissions += 1
+        return self.profiler.timed(self.backend.Command, command, command_verbs(command))
+
+    @contextmanager
+    def batch(self):
+        """
+        Queue write-only commands until the outermost block ends. Blocks can be nested.
+        """
+        self.depth += 1
+        try:
+            yield self
+        finally:
+            self.depth -= 1
+            if not self.depth:
+                self.flush()
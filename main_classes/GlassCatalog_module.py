@@ -0,0 +1,193 @@
+# ==============================================================================
+# PROJECT INFORMATION
+# ==============================================================================
+# Project Title: ODAI
+# Version: v1.0.0
+# Description: Optical System Design Optimization: Saddle Point Application
+#
+# AUTHORS
+# ==============================================================================
+# Aurélien Argy, Florin Baumann, Jelil Belheine, Pierre-Gabriel Bibal-Sobeaux,
+# Benoit Brouillet
+# Institution: Télécom Physique Strasbourg, Université de Strasbourg,
+# Illkirch-Graffenstaden, France
+#
+# LICENSE
+# ==============================================================================
+# This project is licensed under the GPL 3.0 License.
+# For more details, see the LICENSE file in the project root.
+#
+# DATE
+# ==============================================================================
+# Date of Creation: 04/04/2024
+#
+# ==============================================================================
+# NOTES
+# ==============================================================================
+# The code is developed using CodeV version 2022.03 and is intended for use under
+# the guidelines of the GPL 3.0 License.
+# ==============================================================================
+
+
+import numpy as np
+
+
+# Fraunhofer lines (nm)
+LAMBDA_D = 587.5618
+LAMBDA_F = 486.1327
+LAMBDA_C = 656.2725
+
+# Sellmeier coefficients (B1, B2, B3, C1, C2, C3) of the Schott glasses used by the applications,
+# C in square micrometers: n^2 = 1 + sum(B_i * lambda^2 / (lambda^2 - C_i)), lambda in micrometers
+SELLMEIER_COEFFICIENTS = {
+    'NBK7': (1.03961212, 0.231792344, 1.01046945, 0.00600069867, 0.0200179144, 103.560653),
+    'SF2': (1.40301821, 0.231767504, 0.939056586, 0.0105795466, 0.0493226978, 112.405955),
+    'NFK5': (0.844309338, 0.344147824, 0.910790213, 0.00475111955, 0.0149814849, 97.8600293),
+    'NSK16': (1.34317774, 0.241144399, 0.994317969, 0.00704687339, 0.0229005, 92.7508526),
+    'NLAF2': (1.80984227, 0.15729555, 1.0930037, 0.0101711622, 0.0442431765, 100.687748),
+    'SF4': (1.61957826, 0.339493189, 1.02566931, 0.0125502104, 0.0544559822, 117.652222),
+    'NKZFS2': (1.23697554, 0.153569376, 0.903976272, 0.00747170505, 0.0308053556, 70.1731084),
+    'NKZFS4': (1.35055424, 0.197575506, 1.09962992, 0.0087628207, 0.0371767201, 90.3866994),
+    'NKZFS5': (1.47460789, 0.193584488, 1.26589974, 0.00986143816, 0.0445477583, 106.436258),
+    'NPK51': (1.15610775, 0.153229344, 0.785618966, 0.00585597402, 0.0194072416, 140.537046),
+    'NPK52A': (1.029607, 0.1880506, 0.736488165, 0.00516800155, 0.0166658798, 138.964129),
+    'NFK51A': (0.971247817, 0.216901417, 0.904651666, 0.00472301995, 0.0153575612, 168.68133),
+    'NLAK8': (1.33183167, 0.546623206, 1.19084015, 0.00620023871, 0.0216465439, 82.5827736),
+    'NLAK9': (1.46231905, 0.344399589, 1.15508372, 0.00724270156, 0.0243353131, 85.4686868),
+    'NLAK10': (1.72878017, 0.169257825, 1.19386956, 0.00886014635, 0.0363416509, 82.9009069),
+    'NLAK14': (1.50781212, 0.318866829, 1.14287213, 0.00746098727, 0.0242024834, 80.9565165),
+    'SF10': (1.61625977, 0.259229334, 1.07762317, 0.0127534559, 0.0581983954, 116.60768),
+    'SF57': (1.81651371, 0.428893641, 1.07186278, 0.0143704198, 0.0592801172, 121.419942),
+    'NSF66': (2.0245976, 0.470187196, 2.59970433, 0.0147053225, 0.0692998276, 161.817601),
+}
+
+# Glasses only known by (nd, vd), modeled with model_glass_index
+ABBE_GLASSES = {
+    'NLAK34': (1.72916, 54.50),
+}
+
+
+def sellmeier_index(coefficients, wavelengths):
+    """
+    Index from the three-term Sellmeier formula.
+    :param coefficients: (B1, B2, B3, C1, C2, C3), C in square micrometers.
+    :param wavelengths: Wavelengths in nm.
+    """
+    b1, b2, b3, c1, c2, c3 = coefficients
+    squared = (np.asarray(wavelengths, dtype=float) / 1000) ** 2
+    return np.sqrt(1 + b1 * squared / (squared - c1) + b2 * squared / (squared - c2) + b3 * squared / (squared - c3))
+
+
+def model_glass_index(nd, vd, wavelengths):
+    """
+    Index of a glass given only by nd and vd, with a two-term Cauchy law n = A + B / lambda^2
+    fitted so that n(d) = nd and n(F) - n(C) = (nd - 1) / vd.
+    :param wavelengths: Wavelengths in nm.
+    """
+    wavelengths = np.asarray(wavelengths, dtype=float)
+    b = (nd - 1) / vd / (1 / LAMBDA_F**2 - 1 / LAMBDA_C**2)
+    a = nd - b / LAMBDA_D**2
+    return a + b / wavelengths**2
+
+
+def glass_name(material):
+    """
+    Catalog key of a CodeV glass name: upper case, without catalog suffix and dashes
+    ('N-BK7_SCHOTT' -> 'NBK7'). Names missing the 'N' prefix or 'A' suffix of the current
+    Schott glass (e.g. 'LAK14', 'FK51') resolve to it.
+    :return: The key, or None if the glass is not in the catalog.
+    """
+    name = str(material).upper().split('_')[0].replace('-', '')
+    for candidate in (name, 'N' + name, name + 'A', 'N' + name + 'A'):
+        if candidate in SELLMEIER_COEFFICIENTS or candidate in ABBE_GLASSES:
+            return candidate
+    return None
+
+
+def glass_index(material, wavelengths):
+    """
+    Refractive index of a CodeV material at the given wavelengths.
+    Accepts catalog names (e.g. 'NBK7_SCHOTT', 'SF4', 'LAK14') and six-digit glass codes
+    (e.g. 487490.704058 for nd = 1.487490, vd = 70.4058, or 517642 for nd = 1.517, vd = 64.2).
+    None or 'AIR' is air.
+    :raises KeyError: If the material is unknown or its glass code cannot be parsed.
+    """
+    wavelengths = np.asarray(wavelengths, dtype=float)
+    if material is None or str(material).upper() == 'AIR':
+        return np.ones_like(wavelengths)
+
+    code = str(material)
+    if code.replace('.', '', 1).isdigit():
+        digits, _, fraction = code.partition('.')
+        if not digits:
+            raise KeyError(f"Unknown glass {material}")
+        if fraction.strip('0'):
+            nd = 1 + int(digits) / 10**len(digits)
+            vd = float('0.' + fraction) * 100
+        elif len(digits) == 6:
+            # Plain six-digit code nnnvvv (517642 for nd = 1.517, vd = 64.2)
+            nd = 1 + int(digits[:3]) / 1000
+            vd = int(digits[3:]) / 10
+        else:
+            raise KeyError(f"Unknown glass {material}")
+        if vd == 0:
+            raise KeyError(f"Unknown glass {material}")
+        return model_glass_index(nd, vd, wavelengths)
+
+    name = glass_name(material)
+    if name is None:
+        raise KeyError(f"Unknown glass {material}")
+    if name in SELLMEIER_COEFFICIENTS:
+        return sellmeier_index(SELLMEIER_COEFFICIENTS[name], wavelengths)
+    return model_glass_index(*ABBE_GLASSES[name], wavelengths)
+
+
+class GlassCatalog:
+    """
+    Refractive indices of the system materials at the configured wavelengths.
+    Each material is evaluated once when first used and kept in a table;
+    the tables are rebuilt only when the wavelengths change.
+    """
+
+    def __init__(self, wavelengths=()):
+        self.wavelengths = np.asarray(wavelengths, dtype=float)
+        self.tables = {}  # material -> indices at self.wavelengths
+
+    def set_wavelengths(self, wavelengths):
+        # Re-evaluate the known materials at the new wavelengths (nothing to do if they are unchanged)
+        wavelengths = np.asarray(wavelengths, dtype=float)
+        if np.array_equal(wavelengths, self.wavelengths):
+            return
+        self.wavelengths = wavelengths
+        self.tables = {material: glass_index(material, wavelengths) for material in self.tables}
+
+    def index(self, material):
+        """
+        Indices of a material at the configured wavelengths.
+        :raises KeyError: If the material is unknown.
+        """
+        table = self.tables.get(material)
+        if table is None:
+            table = self.tables[material] = glass_index(material, self.wavelengths)
+        return table
+
+    def index_table(self, materials):
+        """
+        Index of each surface material at each wavelength.
+        :param materials: Material following each surface (None for air).
+        :return: Array (wavelengths, surfaces).
+        :raises KeyError: If a material is unknown.
+        """
+        if not len(materials):
+            return np.empty((len(self.wavelengths), 0))
+        return np.stack([self.index(material) for material in materials], axis=-1)
+
+    def reference_indices(self, materials):
+        """
+        Index of each surface material at the reference (central) wavelength,
+        or at the d line if no wavelength is configured.
+        :raises KeyError: If a material is unknown.
+        """
+        if not len(self.wavelengths):
+            return np.array([glass_index(material, [LAMBDA_D])[0] for material in materials])
+        return self.index_table(materials)[len(self.wavelengths) // 2]
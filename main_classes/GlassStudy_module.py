@@ -0,0 +1,125 @@
+# ==============================================================================
+# PROJECT INFORMATION
+# ==============================================================================
+# Project Title: ODAI
+# Version: v1.0.0
+# Description: Optical System Design Optimization: Saddle Point Application
+#
+# AUTHORS
+# ==============================================================================
+# Aurélien Argy, Florin Baumann, Jelil Belheine, Pierre-Gabriel Bibal-Sobeaux,
+# Benoit Brouillet
+# Institution: Télécom Physique Strasbourg, Université de Strasbourg,
+# Illkirch-Graffenstaden, France
+#
+# LICENSE
+# ==============================================================================
+# This project is licensed under the GPL 3.0 License.
+# For more details, see the LICENSE file in the project root.
+#
+# DATE
+# ==============================================================================
+# Date of Creation: 04/04/2024
+#
+# ==============================================================================
+# NOTES
+# ==============================================================================
+# The code is developed using CodeV version 2022.03 and is intended for use under
+# the guidelines of the GPL 3.0 License.
+# ==============================================================================
+
+
+import os
+import csv
+from concurrent.futures import as_completed
+
+
+# Column naming the glass combination ('NBK7_SF2') after the number of lenses, as in the original study scripts
+STUDY_IDENTIFIERS = {2: 'Doublet', 3: 'Triplet'}
+
+
+def study_fields(num_lenses):
+    # Columns of the study CSV, one row per (glass combination, starting design)
+    return ['Seq_File_Path', STUDY_IDENTIFIERS[num_lenses], 'Optimized_Merit']
+
+
+def study_jobs(glass_combinations, seq_file_paths):
+    """
+    Cartesian product of the glass combinations and the starting designs.
+    :param glass_combinations: Iterable of glass name sequences, one glass per lens (first lens first).
+    :param seq_file_paths: SEQ files of the starting designs.
+    :return: List of (seq file path, glasses) jobs.
+    """
+    return [(seq_file_path, tuple(glasses)) for glasses in glass_combinations for seq_file_path in seq_file_paths]
+
+
+def reoptimize_with_glasses(session, seq_file_path, glasses, output_directory="C:/CVUSER", efl=1, mnt=0.02):
+    """
+    Load a starting design, put the given glasses on its lenses (surfaces S1, S3, S5, ...),
+    make all radii and thicknesses but the last variable with fixed glasses, optimize and save.
+    :param session: SystemSetup running the job.
+    :return: Row dictionary with the study_fields of the number of glasses.
+    """
+    last_surface = 2 * len(glasses)
+    with session.batch():
+        session.cv.load(seq_file_path)
+
+        # Change the material of the lenses
+        for lens, glass in enumerate(glasses):
+            session.cv.Command(f"GL1 S{2 * lens + 1} {glass}")
+
+        # Make all thicknesses and radii variable, fix all materials
+        for i in range(1, last_surface):
+            session.cv.Command(f"CCY S{i} 0")
+        for i in range(1, last_surface):
+            session.cv.Command(f"THC S{i} 0")
+        for i in range(1, last_surface):
+            session.cv.Command(f"GC1 S{i} 100")
+
+    # Perform optimization and calculate the optimized merit function
+    session.optimize_system(efl=efl, mnt=mnt)
+    optimized_merit = session.error_fct(efl=efl)
+
+    # Save the system with a new file name indicating the materials used
+    base_name = os.path.splitext(os.path.basename(seq_file_path))[0]
+    optimized_file_path = f"{output_directory}/{base_name}_optimized_{'_'.join(glasses)}.seq"
+    session.save_system(optimized_file_path, seq=True)
+
+    return {
+        'Seq_File_Path': seq_file_path,
+        STUDY_IDENTIFIERS[len(glasses)]: "_".join(glasses),
+        'Optimized_Merit': optimized_merit,
+    }
+
+
+def run_study(jobs, csv_file_path, pool=None, session=None, output_directory="C:/CVUSER", efl=1, mnt=0.02):
+    """
+    Run reoptimize_with_glasses for every (seq file path, glasses) job, on the sessions of pool
+    (or one after the other on session), and write each row to the CSV as soon as its job completes.
+    All the jobs must have the same number of glasses.
+    :return: The rows, in the order of jobs.
+    """
+    identifier = STUDY_IDENTIFIERS[len(jobs[0][1])]
+    with open(csv_file_path, mode='w', newline='') as file:
+        writer = csv.DictWriter(file, fieldnames=study_fields(len(jobs[0][1])))
+        writer.writeheader()
+        file.flush()
+
+        rows = [None] * len(jobs)
+        if pool is None:
+            for index, (seq_file_path, glasses) in enumerate(jobs):
+                rows[index] = reoptimize_with_glasses(session, seq_file_path, glasses, output_directory, efl, mnt)
+                writer.writerow(rows[index])
+                file.flush()
+            return rows
+
+        futures = {pool.submit(reoptimize_with_glasses, seq_file_path, glasses, output_directory, efl, mnt): index
+                   for index, (seq_file_path, glasses) in enumerate(jobs)}
+        for completed, future in enumerate(as_completed(futures), start=1):
+            index = futures[future]
+            rows[index] = future.result()
+            writer.writerow(rows[index])
+            file.flush()
+            print(f"Study job {completed}/{len(jobs)}: {rows[index][identifier]} from "
+                  f"{rows[index]['Seq_File_Path']}, merit {rows[index]['Optimized_Merit']}")
+        return rows
@@ -0,0 +1,237 @@
+# ==============================================================================
+# PROJECT INFORMATION
+# ==============================================================================
+# Project Title: ODAI
+# Version: v1.0.0
+# Description: Optical System Design Optimization: Saddle Point Application
+#
+# AUTHORS
+# ==============================================================================
+# Aurélien Argy, Florin Baumann, Jelil Belheine, Pierre-Gabriel Bibal-Sobeaux,
+# Benoit Brouillet
+# Institution: Télécom Physique Strasbourg, Université de Strasbourg,
+# Illkirch-Graffenstaden, France
+#
+# LICENSE
+# ==============================================================================
+# This project is licensed under the GPL 3.0 License.
+# For more details, see the LICENSE file in the project root.
+#
+# DATE
+# ==============================================================================
+# Date of Creation: 04/04/2024
+#
+# ==============================================================================
+# NOTES
+# ==============================================================================
+# The code is developed using CodeV version 2022.03 and is intended for use under
+# the guidelines of the GPL 3.0 License.
+# ==============================================================================
+
+import time
+from collections import Counter
+from contextlib import contextmanager
+from functools import wraps
+import numpy as np
+
+
+# Latency histogram bin edges in seconds, 8 per decade from 10 us to 100 s
+LATENCY_BINS = np.logspace(-5, 2, 57)
+
+
+def submission_name(verbs):
+    # Verbs of a submission in the order they are sent, each once: 'GO' alone, 'AUT+IMP+EFL+MNT+GO' for a batch
+    return "+".join(dict.fromkeys(verbs))
+
+
+class LatencyStats:
+    """
+    Running statistics of the round trips of one kind of submission in one phase.
+    Latencies are kept as a histogram on LATENCY_BINS, so the memory does not grow with the run
+    and the statistics of several sessions can be added up.
+    """
+
+    def __init__(self):
+        self.count = 0  # Round trips
+        self.statements = 0  # Statements sent in them
+        self.total = 0.0  # Seconds spent in the backend
+        self.max = 0.0
+        self.output = 0  # Characters returned
+        self.histogram = np.zeros(len(LATENCY_BINS) - 1, dtype=np.int64)
+
+    def add(self, statements, latency, output):
+        self.count += 1
+        self.statements += statements
+        self.total += latency
+        self.max = max(self.max, latency)
+        self.output += output
+        # Latencies outside the edges are counted in the first or last bin
+        self.histogram[min(max(np.searchsorted(LATENCY_BINS, latency, side='right') - 1, 0), len(self.histogram) - 1)] += 1
+
+    def merge(self, other):
+        self.count += other.count
+        self.statements += other.statements
+        self.total += other.total
+        self.max = max(self.max, other.max)
+        self.output += other.output
+        self.histogram += other.histogram
+
+    def percentile(self, q):
+        # Estimated from the histogram: geometric interpolation within the bin holding the q-th percentile
+        if not self.count:
+            return 0.0
+        rank = q / 100 * self.count
+        if rank >= self.count:
+            return self.max
+        cumulative = np.cumsum(self.histogram)
+        index = min(int(np.searchsorted(cumulative, rank)), len(self.histogram) - 1)
+        below = cumulative[index - 1] if index else 0
+        fraction = (rank - below) / self.histogram[index] if self.histogram[index] else 0.0
+        low, high = LATENCY_BINS[index], LATENCY_BINS[index + 1]
+        return float(min(low * (high / low) ** fraction, self.max))
+
+
+class CommandProfiler:
+    """
+    Statistics of the round trips made by a CommandChannel: latency, statements and output size
+    per kind of submission (its verbs, see submission_name) and per phase of the run. A batched
+    submission is recorded under all its verbs, so that the time of the setup statements sent along
+    with a query is not charged to the query alone. Phases are named with the phase() context manager
+    (or the profiled_phase decorator) and can be nested.
+    """
+
+    def __init__(self):
+        self.phases = []
+        self.reset()
+
+    def reset(self):
+        self.stats = {}  # (submission name, phase) -> LatencyStats
+        self.calls = Counter()  # Statements passed to Command by verb, sent or queued
+
+    @contextmanager
+    def phase(self, name):
+        """
+        Attribute the commands sent in the block to the phase name.
+        """
+        self.phases.append(name)
+        try:
+            yield self
+        finally:
+            self.phases.pop()
+
+    def current_phase(self):
+        return "/".join(self.phases) if self.phases else "-"
+
+    def count(self, verbs):
+        self.calls.update(verbs)
+
+    def record(self, verbs, latency, output):
+        key = (submission_name(verbs), self.current_phase())
+        stats = self.stats.get(key)
+        if stats is None:
+            stats = self.stats[key] = LatencyStats()
+        stats.add(len(verbs), latency, len(output) if output else 0)
+
+    def merge(self, other, phase=None):
+        """
+        Add the statistics of another profiler, e.g. those of the sessions of a SessionPool.
+        :param phase: Optional phase name the phases of other are nested in.
+        """
+        for (name, other_phase), other_stats in other.stats.items():
+            if phase is not None:
+                other_phase = phase if other_phase == "-" else f"{phase}/{other_phase}"
+            stats = self.stats.get((name, other_phase))
+            if stats is None:
+                stats = self.stats[(name, other_phase)] = LatencyStats()
+            stats.merge(other_stats)
+        self.calls.update(other.calls)
+
+    def _aggregate(self, position):
+        groups = {}
+        for key, stats in self.stats.items():
+            group = groups.get(key[position])
+            if group is None:
+                group = groups[key[position]] = LatencyStats()
+            group.merge(stats)
+        summary = {name: {
+            'count': stats.count,
+            'statements': stats.statements,
+            'total': stats.total,
+            'mean': stats.total / stats.count,
+            'p50': stats.percentile(50),
+            'p95': stats.percentile(95),
+            'max': stats.max,
+            'output': stats.output,
+        } for name, stats in groups.items()}
+        return dict(sorted(summary.items(), key=lambda item: -item[1]['total']))
+
+    def summary(self):
+        """
+        Latency statistics per kind of submission, slowest total first.
+        :return: Dict submission name -> dict with count, statements, total, mean, p50, p95, max (seconds)
+                 and output (characters); p50 and p95 are estimated from the latency histogram.
+        """
+        return self._aggregate(0)
+
+    def by_phase(self):
+        """
+        Same statistics as summary(), per calling phase.
+        """
+        return self._aggregate(1)
+
+    def histogram(self, name=None):
+        """
+        Latency histogram of one kind of submission (all of them if None).
+        :return: (counts, bin edges LATENCY_BINS).
+        """
+        counts = np.zeros(len(LATENCY_BINS) - 1, dtype=np.int64)
+        for (submission, _), stats in self.stats.items():
+            if name is None or submission == name:
+                counts += stats.histogram
+        return counts, LATENCY_BINS
+
+    def report(self, histograms=True):
+        """
+        Text report of the time spent per kind of submission and per phase, with latency histograms.
+        """
+        total = sum(stats.total for stats in self.stats.values())
+        lines = [f"CodeV round trips: {sum(stats.count for stats in self.stats.values())}, {total:.3f} s"]
+        for title, table in (("Submission", self.summary()), ("Phase", self.by_phase())):
+            lines.append(f"{title:<40} {'count':>7} {'stmts':>7} {'total s':>10} {'share':>6} {'mean ms':>9} "
+                         f"{'p50 ms':>9} {'p95 ms':>9} {'max ms':>9} {'output':>10}")
+            for name, stats in table.items():
+                share = stats['total'] / total if total else 0
+                name = name if len(name) <= 40 else name[:37] + "..."
+                lines.append(f"{name:<40} {stats['count']:>7} {stats['statements']:>7} {stats['total']:>10.3f} {share:>6.1%} "
+                             f"{stats['mean'] * 1e3:>9.3f} {stats['p50'] * 1e3:>9.3f} {stats['p95'] * 1e3:>9.3f} "
+                             f"{stats['max'] * 1e3:>9.3f} {stats['output']:>10}")
+        if self.calls:
+            lines.append("Statements by verb: " + ", ".join(f"{verb} {count}" for verb, count in self.calls.most_common()))
+        if histograms:
+            for name in self.summary():
+                counts, edges = self.histogram(name)
+                lines.append(f"{name} latency: " + " ".join(
+                    f"[{edges[i] * 1e3:.3g}-{edges[i + 1] * 1e3:.3g} ms] {count}" for i, count in enumerate(counts) if count))
+        return "\n".join(lines)
+
+    def timed(self, submit, command, verbs):
+        """
+        Send command with submit and record the round trip under all its verbs.
+        """
+        start = time.perf_counter()
+        output = submit(command)
+        self.record(verbs, time.perf_counter() - start, output)
+        return output
+
+
+def profiled_phase(name):
+    """
+    Method decorator running the method inside self.cv.profiler.phase(name).
+    """
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with self.cv.profiler.phase(name):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,578 @@
+# ==============================================================================
+# PROJECT INFORMATION
+# ==============================================================================
+# Project Title: ODAI
+# Version: v1.0.0
+# Description: Optical System Design Optimization: Saddle Point Application
+#
+# AUTHORS
+# ==============================================================================
+# Aurélien Argy, Florin Baumann, Jelil Belheine, Pierre-Gabriel Bibal-Sobeaux,
+# Benoit Brouillet
+# Institution: Télécom Physique Strasbourg, Université de Strasbourg,
+# Illkirch-Graffenstaden, France
+#
+# LICENSE
+# ==============================================================================
+# This project is licensed under the GPL 3.0 License.
+# For more details, see the LICENSE file in the project root.
+#
+# DATE
+# ==============================================================================
+# Date of Creation: 04/04/2024
+#
+# ==============================================================================
+# NOTES
+# ==============================================================================
+# The code is developed using CodeV version 2022.03 and is intended for use under
+# the guidelines of the GPL 3.0 License.
+# ==============================================================================
+
+
+import os
+import sys
+import time
+import pickle
+import socket
+import sqlite3
+import argparse
+import threading
+from Backend_module import CodeVBackend
+from SessionPool_module import open_session
+from SystemNode_module import SystemNode, NODE_ID_BLOCK
+from SystemSetup_module import SystemSetup
+
+
+# Job states
+QUEUED, CLAIMED, DONE, FAILED = 'queued', 'claimed', 'done', 'failed'
+
+
+class Job:
+    """
+    A job claimed from the broker.
+    """
+
+    def __init__(self, job_id, kind, payload, attempts):
+        self.id = job_id
+        self.kind = kind
+        self.payload = payload
+        self.attempts = attempts
+
+
+class JobBroker:
+    """
+    Work queue kept in an SQLite file, shared by a coordinator and workers running on the same host.
+    SQLite locking is not reliable on network filesystems (SMB, NFS): to spread the work over several
+    machines use FileJobBroker on a shared folder instead.
+    Workers claim jobs with a lease that they renew while working; a job whose lease runs out
+    (crashed or disconnected worker) is queued again, up to max_attempts claims.
+    Payloads and results are pickled, so every worker must run the same version of the code.
+    """
+
+    def __init__(self, path, max_attempts=3):
+        """
+        :param path: Path of the SQLite file on a local disk, created if needed.
+        :param max_attempts: Number of claims after which a job whose lease ran out is marked failed.
+        """
+        self.path = path
+        self.max_attempts = max_attempts
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self.connect() as connection:
+            connection.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    kind TEXT NOT NULL,
+                    payload BLOB NOT NULL,
+                    status TEXT NOT NULL,
+                    worker TEXT,
+                    lease_until REAL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    result BLOB,
+                    error TEXT,
+                    created REAL NOT NULL,
+                    finished REAL
+                )""")
+            connection.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, id)")
+
+    def connect(self):
+        # One connection per call, so that the broker can be used from several threads
+        connection = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+        connection.execute("PRAGMA busy_timeout = 60000")
+        return ConnectionContext(connection)
+
+    def put(self, kind, payload):
+        """
+        Queue a job.
+        :return: The job ID.
+        """
+        with self.connect() as connection:
+            cursor = connection.execute(
+                "INSERT INTO jobs (kind, payload, status, created) VALUES (?, ?, ?, ?)",
+                (kind, pickle.dumps(payload), QUEUED, time.time()))
+            return cursor.lastrowid
+
+    def requeue_expired(self, connection, now):
+        # Leases that ran out: queue the job again, or mark it failed after max_attempts claims
+        connection.execute(
+            "UPDATE jobs SET status = ?, worker = NULL, lease_until = NULL, error = 'lease expired', finished = ? "
+            "WHERE status = ? AND lease_until < ? AND attempts >= ?",
+            (FAILED, now, CLAIMED, now, self.max_attempts))
+        connection.execute(
+            "UPDATE jobs SET status = ?, worker = NULL, lease_until = NULL WHERE status = ? AND lease_until < ?",
+            (QUEUED, CLAIMED, now))
+
+    def claim(self, worker, lease=300.0, kinds=None):
+        """
+        Claim the oldest queued job.
+        :param worker: Name of the worker (host:pid by default in run_worker).
+        :param lease: Seconds the job is reserved for; renew() extends it.
+        :param kinds: Optional list of job kinds the worker accepts.
+        :return: A Job, or None if no job is queued.
+        """
+        now = time.time()
+        with self.connect() as connection:
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                self.requeue_expired(connection, now)
+                query = "SELECT id, kind, payload, attempts FROM jobs WHERE status = ?"
+                parameters = [QUEUED]
+                if kinds:
+                    query += f" AND kind IN ({', '.join('?' * len(kinds))})"
+                    parameters.extend(kinds)
+                row = connection.execute(query + " ORDER BY id LIMIT 1", parameters).fetchone()
+                if row is None:
+                    connection.execute("COMMIT")
+                    return None
+                job_id, kind, payload, attempts = row
+                connection.execute(
+                    "UPDATE jobs SET status = ?, worker = ?, lease_until = ?, attempts = ? WHERE id = ?",
+                    (CLAIMED, worker, now + lease, attempts + 1, job_id))
+                connection.execute("COMMIT")
+            except Exception:
+                connection.execute("ROLLBACK")
+                raise
+        return Job(job_id, kind, pickle.loads(payload), attempts + 1)
+
+    def renew(self, job_id, worker, lease=300.0):
+        """
+        Extend the lease of a claimed job.
+        :return: False if the job is no longer held by the worker (lease lost).
+        """
+        with self.connect() as connection:
+            cursor = connection.execute(
+                "UPDATE jobs SET lease_until = ? WHERE id = ? AND worker = ? AND status = ?",
+                (time.time() + lease, job_id, worker, CLAIMED))
+            return cursor.rowcount == 1
+
+    def complete(self, job_id, worker, result):
+        """
+        Store the result of a job. A worker that lost its lease can still complete the job if
+        nobody else did; the first result is kept.
+        """
+        with self.connect() as connection:
+            connection.execute(
+                "UPDATE jobs SET status = ?, result = ?, worker = ?, lease_until = NULL, error = NULL, finished = ? "
+                "WHERE id = ? AND status != ?",
+                (DONE, pickle.dumps(result), worker, time.time(), job_id, DONE))
+
+    def fail(self, job_id, worker, error):
+        """
+        Record an error raised by a job; it is queued again until max_attempts claims.
+        """
+        with self.connect() as connection:
+            connection.execute(
+                "UPDATE jobs SET status = CASE WHEN attempts >= ? THEN ? ELSE ? END, worker = NULL, "
+                "lease_until = NULL, error = ?, finished = ? WHERE id = ? AND worker = ? AND status = ?",
+                (self.max_attempts, FAILED, QUEUED, error, time.time(), job_id, worker, CLAIMED))
+
+    def status(self, job_ids):
+        """
+        :return: Dict job ID -> (status, error).
+        """
+        with self.connect() as connection:
+            connection.execute("BEGIN IMMEDIATE")
+            self.requeue_expired(connection, time.time())
+            connection.execute("COMMIT")
+            rows = connection.execute(
+                f"SELECT id, status, error FROM jobs WHERE id IN ({', '.join('?' * len(job_ids))})", list(job_ids)).fetchall()
+        return {job_id: (status, error) for job_id, status, error in rows}
+
+    def result(self, job_id):
+        with self.connect() as connection:
+            row = connection.execute("SELECT result FROM jobs WHERE id = ? AND status = ?", (job_id, DONE)).fetchone()
+        return pickle.loads(row[0]) if row else None
+
+    def wait(self, job_ids, poll_interval=2.0):
+        """
+        Block until every job is done or failed.
+        :return: Dict job ID -> result, None for the failed jobs.
+        """
+        while True:
+            statuses = self.status(job_ids)
+            if all(status in (DONE, FAILED) for status, _ in statuses.values()):
+                break
+            time.sleep(poll_interval)
+        results = {}
+        for job_id in job_ids:
+            status, error = statuses[job_id]
+            if status == FAILED:
+                print(f"Job {job_id} failed: {error}")
+                results[job_id] = None
+            else:
+                results[job_id] = self.result(job_id)
+        return results
+
+    def counts(self):
+        # Number of jobs per status
+        with self.connect() as connection:
+            return dict(connection.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+
+
+class ConnectionContext:
+    # Closes the sqlite3 connection at the end of a with block (sqlite3's own context manager does not)
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __enter__(self):
+        return self.connection
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.connection.close()
+
+
+class FileJobBroker(JobBroker):
+    """
+    Work queue kept in a directory, for a coordinator and workers on several machines sharing it
+    (put the directory and the SEQ directory on a shared folder). It only relies on the atomic rename
+    of a file within a share: a job is one file that moves between the queued, claimed, done and failed
+    directories, and whoever renames it first owns the transition. Its claim count and kind are part of
+    the file name, so that no transition needs a lock. The lease of a claim is a file named after the job
+    and its claim count: a stale lease can be removed without touching the lease of a later claim.
+    Same interface and lease semantics as JobBroker. The lease deadlines are compared across machines:
+    their clocks should agree to well below the lease.
+    """
+
+    def __init__(self, path, max_attempts=3):
+        """
+        :param path: Job directory, created if needed.
+        :param max_attempts: Number of claims after which a job whose lease ran out is marked failed.
+        """
+        self.path = path
+        self.max_attempts = max_attempts
+        for directory in (QUEUED, CLAIMED, DONE, FAILED, 'ids'):
+            os.makedirs(os.path.join(path, directory), exist_ok=True)
+        self.next_id = 1
+
+    def file(self, state, name):
+        return os.path.join(self.path, state, name)
+
+    def jobs(self, state):
+        # {job ID: (attempts, kind, file name)} of the job files in a state directory
+        jobs = {}
+        for name in os.listdir(os.path.join(self.path, state)):
+            parts = name.split('.')
+            if len(parts) == 4 and parts[3] == 'job':
+                jobs[int(parts[0])] = (int(parts[1]), parts[2], name)
+        return jobs
+
+    def write(self, path, value):
+        # Write a pickle next to its destination and move it in place, so that readers never see it partly written
+        temporary = f"{path}.{socket.gethostname()}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporary, 'wb') as f:
+            pickle.dump(value, f)
+        os.replace(temporary, path)
+
+    def read(self, path):
+        try:
+            with open(path, 'rb') as f:
+                return pickle.load(f)
+        except (FileNotFoundError, EOFError):
+            return None
+
+    def lease_file(self, job_id, attempts):
+        # Lease of the attempts-th claim of a job: (worker, lease deadline)
+        return self.file(CLAIMED, f"{job_id:08d}.{attempts}.lease")
+
+    def write_error(self, job_id, error):
+        # Last error of a job, read by status when the job failed
+        self.write(self.file(FAILED, f"{job_id:08d}.error"), error)
+
+    def remove(self, path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def put(self, kind, payload):
+        """
+        Queue a job.
+        :return: The job ID.
+        """
+        # Reserve the ID by creating its file exclusively
+        while True:
+            try:
+                os.close(os.open(self.file('ids', f"{self.next_id:08d}"), os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                break
+            except FileExistsError:
+                self.next_id += 1
+        job_id = self.next_id
+        self.next_id += 1
+        self.write(self.file(QUEUED, f"{job_id:08d}.0.{kind}.job"), payload)
+        return job_id
+
+    def requeue_expired(self, now):
+        # Leases that ran out: queue the job again, or mark it failed after max_attempts claims
+        for job_id, (attempts, kind, name) in self.jobs(CLAIMED).items():
+            lease = self.read(self.lease_file(job_id, attempts))
+            # A job claimed an instant ago may not have its lease file yet
+            if lease is None or lease[1] >= now:
+                continue
+            target = FAILED if attempts >= self.max_attempts else QUEUED
+            if target == FAILED:
+                # The error is in place before the job shows up as failed
+                self.write_error(job_id, 'lease expired')
+            try:
+                os.rename(self.file(CLAIMED, name), self.file(target, name))
+            except (FileNotFoundError, FileExistsError):
+                continue  # Completed, failed or requeued by someone else meanwhile
+            # Only this claim's lease: the job may already be claimed again under a new lease
+            self.remove(self.lease_file(job_id, attempts))
+
+    def claim(self, worker, lease=300.0, kinds=None):
+        """
+        Claim the oldest queued job.
+        :param worker: Name of the worker (host:pid by default in run_worker).
+        :param lease: Seconds the job is reserved for; renew() extends it.
+        :param kinds: Optional list of job kinds the worker accepts.
+        :return: A Job, or None if no job is queued.
+        """
+        self.requeue_expired(time.time())
+        for job_id, (attempts, kind, name) in sorted(self.jobs(QUEUED).items()):
+            if kinds and kind not in kinds:
+                continue
+            claimed_name = f"{job_id:08d}.{attempts + 1}.{kind}.job"
+            try:
+                os.rename(self.file(QUEUED, name), self.file(CLAIMED, claimed_name))
+            except (FileNotFoundError, FileExistsError):
+                continue  # Claimed by another worker first
+            self.write(self.lease_file(job_id, attempts + 1), (worker, time.time() + lease))
+            return Job(job_id, kind, self.read(self.file(CLAIMED, claimed_name)), attempts + 1)
+        return None
+
+    def holds(self, job_id, worker):
+        """
+        Whether the worker holds the lease of a claimed job.
+        :return: The claim count of the job if it does, else None.
+        """
+        job = self.jobs(CLAIMED).get(job_id)
+        if job is None:
+            return None
+        lease = self.read(self.lease_file(job_id, job[0]))
+        return job[0] if lease is not None and lease[0] == worker else None
+
+    def renew(self, job_id, worker, lease=300.0):
+        """
+        Extend the lease of a claimed job.
+        :return: False if the job is no longer held by the worker (lease lost).
+        """
+        attempts = self.holds(job_id, worker)
+        if attempts is None:
+            return False
+        self.write(self.lease_file(job_id, attempts), (worker, time.time() + lease))
+        # The job may have been requeued while the lease was written
+        if self.jobs(CLAIMED).get(job_id, (None,))[0] != attempts:
+            self.remove(self.lease_file(job_id, attempts))
+            return False
+        return True
+
+    def complete(self, job_id, worker, result):
+        """
+        Store the result of a job. A worker that lost its lease can still complete the job;
+        if two workers complete it, one of their results is kept.
+        """
+        self.write(self.file(DONE, f"{job_id:08d}.result"), result)
+        for state in (CLAIMED, QUEUED, FAILED):
+            job = self.jobs(state).get(job_id)
+            if job is not None:
+                self.remove(self.file(state, job[2]))
+                if state == CLAIMED:
+                    self.remove(self.lease_file(job_id, job[0]))
+
+    def fail(self, job_id, worker, error):
+        """
+        Record an error raised by a job; it is queued again until max_attempts claims.
+        """
+        attempts = self.holds(job_id, worker)
+        if attempts is None:
+            return
+        name = self.jobs(CLAIMED)[job_id][2]
+        target = FAILED if attempts >= self.max_attempts else QUEUED
+        self.write_error(job_id, error)
+        try:
+            os.rename(self.file(CLAIMED, name), self.file(target, name))
+        except (FileNotFoundError, FileExistsError):
+            return
+        self.remove(self.lease_file(job_id, attempts))
+
+    def state(self, job_id, states):
+        # (status, error) of a job from the directory listings of states
+        if os.path.exists(self.file(DONE, f"{job_id:08d}.result")):
+            return DONE, None
+        for status in (FAILED, CLAIMED, QUEUED):
+            if job_id in states[status]:
+                error = None
+                if status == FAILED:
+                    error = self.read(self.file(FAILED, f"{job_id:08d}.error"))
+                return status, error
+        return None, None
+
+    def status(self, job_ids):
+        """
+        :return: Dict job ID -> (status, error).
+        """
+        self.requeue_expired(time.time())
+        states = {status: self.jobs(status) for status in (QUEUED, CLAIMED, FAILED)}
+        return {job_id: self.state(job_id, states) for job_id in job_ids}
+
+    def result(self, job_id):
+        return self.read(self.file(DONE, f"{job_id:08d}.result"))
+
+    def counts(self):
+        # Number of jobs per status
+        counts = {status: len(self.jobs(status)) for status in (QUEUED, CLAIMED, FAILED)}
+        counts[DONE] = sum(name.endswith('.result') for name in os.listdir(os.path.join(self.path, DONE)))
+        return {status: count for status, count in counts.items() if count}
+
+
+def open_broker(path, max_attempts=3):
+    """
+    JobBroker for an SQLite file (path ending in .sqlite or .db, single host),
+    FileJobBroker for a directory (shared folder, several machines).
+    """
+    if path.endswith(('.sqlite', '.db')):
+        return JobBroker(path, max_attempts)
+    return FileJobBroker(path, max_attempts)
+
+
+############## Tree exploration jobs ##############
+
+
+def expansion_payload(system_setup, node, surface, efl, base_file_path):
+    """
+    Job description of the expansion of node from a reference surface: everything a worker needs
+    to rebuild the lens (system data and node state) and name the SEQ files.
+    """
+    return {
+        'system_data': system_setup.system_data(),
+        'node': node.detached(),
+        'surface': surface,
+        'efl': efl,
+        'base_file_path': base_file_path,
+        'depth': node.depth,
+        'id_base': SystemNode.reserve_ids(NODE_ID_BLOCK),
+        'id_count': NODE_ID_BLOCK,
+    }
+
+
+def run_expansion(session, payload):
+    # Number the new nodes from the block reserved by the coordinator (the same on a retry)
+    with SystemNode.numbered_from(payload['id_base'], payload['id_count']):
+        return session.expand_detached_node(payload['node'], payload['surface'], payload['efl'],
+                                            payload['base_file_path'], payload['depth'])
+
+
+JOB_RUNNERS = {'expansion': run_expansion}
+
+
+def evolve_with_broker(system_setup, system_tree, broker, starting_depth, target_depth, base_file_path, efl, poll_interval=2.0):
+    """
+    Counterpart of SystemSetup.evolve_optimized_systems where the (node, reference surface) expansions
+    of each depth are queued on the broker and run by workers (run_worker): on the same host with a
+    JobBroker, on any machine sharing the job directory with a FileJobBroker.
+    The children are grafted on the tree in the serial order once the depth is done.
+    """
+    for current_depth in range(starting_depth, target_depth + 1):
+        optimized_nodes = system_tree.find_optimized_nodes_at_depth(current_depth)
+        jobs = []
+        for node in optimized_nodes:
+            last_surface_number = max(node.optical_system_state['surfaces'], default=0)
+            for surface in system_setup.identify_viable_surfaces(last_surface_number):
+                jobs.append((node, broker.put('expansion', expansion_payload(system_setup, node, surface, efl, base_file_path))))
+        print(f"Depth {current_depth}: {len(jobs)} expansion jobs queued in {broker.path}")
+
+        results = broker.wait([job_id for _, job_id in jobs], poll_interval)
+        for node, job_id in jobs:
+            if results[job_id] is not None:
+                system_tree.graft(node, results[job_id])
+        print(f"Completed Depth {current_depth}")
+    return system_tree
+
+
+def run_worker(broker, backend_factory=CodeVBackend, worker=None, lease=300.0, poll_interval=2.0, max_jobs=None, idle_timeout=None):
+    """
+    Worker loop: claim jobs, run them on one session, write the results back.
+    The lease is renewed from a heartbeat thread while a job runs.
+    :param max_jobs: Stop after this many jobs (None: no limit).
+    :param idle_timeout: Stop after this many seconds without a queued job (None: wait forever).
+    :return: Number of jobs run.
+    """
+    worker = worker or f"{socket.gethostname()}:{os.getpid()}"
+    session, system_data = None, None
+    done = 0
+    idle_since = time.time()
+    try:
+        while max_jobs is None or done < max_jobs:
+            job = broker.claim(worker, lease)
+            if job is None:
+                if idle_timeout is not None and time.time() - idle_since > idle_timeout:
+                    break
+                time.sleep(poll_interval)
+                continue
+
+            stop = threading.Event()
+
+            def heartbeat():
+                while not stop.wait(lease / 3):
+                    if not broker.renew(job.id, worker, lease):
+                        break
+            beat = threading.Thread(target=heartbeat, daemon=True)
+            beat.start()
+            try:
+                if job.payload.get('system_data') != system_data:
+                    system_data = job.payload['system_data']
+                    if session is None:
+                        session = open_session(backend_factory, system_data)
+                    else:
+                        session.apply_system_data(system_data)
+                result = JOB_RUNNERS[job.kind](session, job.payload)
+            except Exception as e:
+                print(f"Job {job.id} failed on {worker}: {e!r}")
+                broker.fail(job.id, worker, repr(e))
+            else:
+                broker.complete(job.id, worker, result)
+            finally:
+                stop.set()
+                beat.join()
+            done += 1
+            idle_since = time.time()
+    finally:
+        if session is not None:
+            session.stop_session()
+    return done
+
+
+if __name__ == "__main__":
+    # Worker on a CodeV machine: python JobBroker_module.py //server/share/odai_jobs
+    # (a job directory on a shared folder; an SQLite file is only for workers on the coordinator host)
+    parser = argparse.ArgumentParser(description="Run ODAI exploration jobs from a job broker.")
+    parser.add_argument("jobs", help="Job directory (shared folder) or SQLite job file (.sqlite or .db, same host only)")
+    parser.add_argument("--lease", type=float, default=300.0, help="Lease of a claimed job in seconds")
+    parser.add_argument("--idle-timeout", type=float, default=None, help="Exit after this many idle seconds")
+    arguments = parser.parse_args()
+    count = run_worker(open_broker(arguments.jobs), CodeVBackend,
+                       lease=arguments.lease, idle_timeout=arguments.idle_timeout)
+    print(f"{count} jobs run.")
+    sys.exit(0)
@@ -31,9 +31,11 @@
 
 from SystemSetup_module import SystemSetup
 from SystemNode_module import SystemNode, SystemTree
+from SessionPool_module import SessionPool
+from Backend_module import CodeVBackend
 
 class OpticalSystemManager_eyepieces:
-    def __init__(self):
+    def __init__(self, backend=None, workers=1, backend_factory=CodeVBackend):
         # Default parameters
         self.default_wavelengths = [486.1327, 546.074, 587.5618, 632.2, 657.2722]
         self.default_fd = 5
@@ -46,6 +48,9 @@ class OpticalSystemManager_eyepieces:
         self.lens_thickness_steps = [0.05, 0.1, 0.15, 0.4]
         self.air_distance_steps = [0]
         self.lens_thickness = 0.2
+        self.sp_scan_coarse_step = None  # Adaptive SP scan with a coarse sweep of one point every n (None: full 400-point sweep)
+        self.sp_scan_points = 400  # Curvatures of the SP scan over its fixed span (a coarser grid is enough with sp_scan_refine)
+        self.sp_scan_refine = False  # Locate the saddle points by Brent's method on fresh merit derivatives
         
         # Initial system parameters
         self.surface1_radius = 59.33336
@@ -58,10 +63,16 @@ class OpticalSystemManager_eyepieces:
         self.target_depth = 2
         self.starting_depth = 0
 
-        # Initialize optical system
-        self.optical_system = SystemSetup()
+        # Initialize optical system (on CodeV unless another backend is given, e.g. a Recording/ReplayBackend)
+        self.optical_system = SystemSetup(backend)
         self.system_tree = None
 
+        # Parallel sessions for the node expansions (1: everything runs on self.optical_system)
+        self.workers = workers
+        self.backend_factory = backend_factory
+        self.use_processes = False
+        self.pool_saddle_points = False  # Use the sessions for the SP scan shards and OptA/OptB branches instead of the node expansions
+
     def start_system(self):
         self.optical_system.start_session()
         self.optical_system.create_new_system()
@@ -93,22 +104,38 @@ class OpticalSystemManager_eyepieces:
     def _create_system_tree(self):
         root_system = self.optical_system.save_system_parameters()
         root_merit = self.optical_system.error_fct(self.default_efl, constrained=False)
-        root_efl = self.optical_system.get_efl_from_codev()
+        root_efl = self.optical_system.get_efl()
 
         root_params = {
             'epsilon': self.epsilon,
             'lens_thickness_steps': self.lens_thickness_steps,
             'air_distance_steps': self.air_distance_steps,
             'lens_thickness': self.lens_thickness,
+            'sp_scan_coarse_step': self.sp_scan_coarse_step,
+            'sp_scan_points': self.sp_scan_points,
+            'sp_scan_refine': self.sp_scan_refine,
         }
 
         root_node = SystemNode(system_params=root_params, optical_system_state=root_system, merit_function=root_merit, efl=root_efl, is_optimized=True)
         self.system_tree = SystemTree(root_node)
 
     def evolve_and_optimize(self):
-        self.optical_system.evolve_optimized_systems(self.system_tree, self.starting_depth, self.target_depth, self.base_file_path, self.default_efl)
-        self.system_tree.print_tree()
-        self.system_tree.final_optimization(self.optical_system, self.default_efl, self.base_file_path)
+        # Sessions for the parallel jobs, used for the node expansions (or the saddle point jobs) and the final optimization
+        pool = SessionPool(self.optical_system.system_data(), self.backend_factory, self.workers, self.use_processes) if self.workers > 1 else None
+        try:
+            if pool is not None and self.pool_saddle_points:
+                self.optical_system.session_pool = pool
+                self.optical_system.evolve_optimized_systems(self.system_tree, self.starting_depth, self.target_depth, self.base_file_path, self.default_efl)
+            else:
+                self.optical_system.evolve_optimized_systems(self.system_tree, self.starting_depth, self.target_depth, self.base_file_path, self.default_efl, pool=pool)
+            self.system_tree.print_tree()
+            self.system_tree.final_optimization(self.optical_system, self.default_efl, self.base_file_path, pool=pool)
+        finally:
+            self.optical_system.session_pool = None
+            if pool is not None:
+                pool.close()
+                # Most of the round trips of a pooled run are made by the pool sessions
+                self.optical_system.cv.profiler.merge(pool.profiler, phase='pool')
         self.system_tree.print_final_optimized_systems_table()
         self.system_tree.plot_optimization_tree()
         # Récupère les données des systèmes optimisés pour affichage dans l'interface utilisateur
@@ -120,6 +147,8 @@ class OpticalSystemManager_eyepieces:
 
     def end_system(self):
         self.optical_system.stop_session()
+        # Where the CodeV time went over the run, pool sessions included (also queryable from self.optical_system.cv.profiler)
+        print(self.optical_system.command_profile())
 
     # Methods for updating initial system parameters
     def set_initial_system_parameters(self, surface1_radius, surface1_thickness, surface1_material, surface2_radius, surface2_thickness):
@@ -0,0 +1,148 @@
+# ==============================================================================
+# PROJECT INFORMATION
+# ==============================================================================
+# Project Title: ODAI
+# Version: v1.0.0
+# Description: Optical System Design Optimization: Saddle Point Application
+#
+# AUTHORS
+# ==============================================================================
+# Aurélien Argy, Florin Baumann, Jelil Belheine, Pierre-Gabriel Bibal-Sobeaux,
+# Benoit Brouillet
+# Institution: Télécom Physique Strasbourg, Université de Strasbourg,
+# Illkirch-Graffenstaden, France
+#
+# LICENSE
+# ==============================================================================
+# This project is licensed under the GPL 3.0 License.
+# For more details, see the LICENSE file in the project root.
+#
+# DATE
+# ==============================================================================
+# Date of Creation: 04/04/2024
+#
+# ==============================================================================
+# NOTES
+# ==============================================================================
+# The code is developed using CodeV version 2022.03 and is intended for use under
+# the guidelines of the GPL 3.0 License.
+# ==============================================================================
+
+import numpy as np
+
+
+############## Paraxial ray trace ##############
+
+
+def paraxial_trace(curvatures, thicknesses, indices, y, nu, object_index=1.0):
+    """
+    y-nu trace of a paraxial ray through a sequence of spherical surfaces.
+    All arrays broadcast together; the last axis runs over the surfaces so that any
+    leading axes (wavelengths, systems, ...) are traced at once.
+    :param curvatures: Surface curvatures c_k.
+    :param thicknesses: Thickness t_k following surface k.
+    :param indices: Index n_k following surface k.
+    :param y: Ray height on the first surface.
+    :param nu: Reduced angle n*u of the ray in object space.
+    :return: (heights, reduced angles) on each surface, after refraction.
+    """
+    curvatures, thicknesses, indices = np.broadcast_arrays(
+        np.asarray(curvatures, dtype=float), np.asarray(thicknesses, dtype=float), np.asarray(indices, dtype=float))
+    y, nu, previous_index = (np.asarray(value, dtype=float) for value in (y, nu, object_index))
+    batch = np.broadcast_shapes(curvatures.shape[:-1], y.shape, nu.shape, previous_index.shape)
+    shape = batch + curvatures.shape[-1:]
+    curvatures, thicknesses, indices = (np.broadcast_to(array, shape) for array in (curvatures, thicknesses, indices))
+    y = np.broadcast_to(y, batch).copy()
+    nu = np.broadcast_to(nu, batch).copy()
+    heights = np.empty(shape)
+    angles = np.empty(shape)
+    for k in range(shape[-1]):
+        if k:
+            y = y + thicknesses[..., k - 1] * nu / indices[..., k - 1]
+        nu = nu - y * (indices[..., k] - previous_index) * curvatures[..., k]
+        heights[..., k] = y
+        angles[..., k] = nu
+        previous_index = indices[..., k]
+    return heights, angles
+
+
+def system_matrix(curvatures, thicknesses, indices, object_index=1.0):
+    """
+    ABCD matrix in (y, nu) from the first to the last surface vertex (the last thickness is not included).
+    :return: Array of shape (..., 2, 2).
+    """
+    curvatures, thicknesses, indices = np.broadcast_arrays(
+        np.asarray(curvatures, dtype=float), np.asarray(thicknesses, dtype=float), np.asarray(indices, dtype=float))
+    # First column: ray (1, 0); second column: ray (0, 1)
+    heights, angles = paraxial_trace(curvatures[..., None, :], thicknesses[..., None, :], indices[..., None, :],
+                                     np.array([1.0, 0.0]), np.array([0.0, 1.0]), object_index)
+    matrix = np.empty(curvatures.shape[:-1] + (2, 2))
+    matrix[..., 0, :] = heights[..., -1]
+    matrix[..., 1, :] = angles[..., -1]
+    return matrix
+
+
+def first_order_properties(curvatures, thicknesses, indices, stop_surface=1, epd=None, fno=None, object_distance=np.inf):
+    """
+    First-order data of a system of spherical surfaces, vectorized over any leading axes.
+    :param stop_surface: Number of the stop surface (1 is the first surface, as STO in CodeV).
+    :param epd: Entrance pupil diameter. If None it is derived from fno.
+    :param fno: F-number, used when epd is None.
+    :param object_distance: Distance from the object to the first surface (np.inf for an infinite object).
+    :return: Dict with efl, bfl, ffl, pim, magnification, and entrance/exit pupil positions and diameters.
+             Pupil positions are measured from the first and last surface vertex respectively.
+    """
+    curvatures, thicknesses, indices = np.broadcast_arrays(
+        np.asarray(curvatures, dtype=float), np.asarray(thicknesses, dtype=float), np.asarray(indices, dtype=float))
+    image_index = indices[..., -1]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        (a, b), (c, d) = np.moveaxis(system_matrix(curvatures, thicknesses, indices), (-2, -1), (0, 1))
+        efl = -1 / c
+        bfl = -a * image_index / c
+        ffl = d / c
+
+        # Paraxial image distance and magnification
+        if np.isinf(object_distance):
+            pim = bfl
+            magnification = np.zeros_like(efl)
+        else:
+            y_image = a * object_distance + b
+            nu_image = c * object_distance + d
+            pim = -y_image * image_index / nu_image
+            magnification = 1 / nu_image
+
+        if epd is None:
+            epd = np.abs(efl) / fno if fno is not None else np.full_like(efl, np.nan)
+        epd = np.broadcast_to(np.asarray(epd, dtype=float), efl.shape)
+
+        # Entrance pupil: image of the stop by the surfaces in front of it
+        s = stop_surface - 1
+        if s > 0:
+            # Heights on the stop of a unit parallel ray (A) and of a ray through the first vertex (B)
+            front = system_matrix(curvatures[..., :s + 1], thicknesses[..., :s + 1], indices[..., :s + 1])
+            front_a, front_b = front[..., 0, 0], front[..., 0, 1]
+            entrance_pupil = front_b / front_a
+            stop_diameter = epd * front_a
+        else:
+            entrance_pupil = np.zeros_like(efl)
+            stop_diameter = epd
+
+        # Exit pupil: image of the stop by the surfaces behind it
+        back = system_matrix(curvatures[..., s:], thicknesses[..., s:], indices[..., s:], indices[..., s - 1] if s > 0 else 1.0)
+        back_a, back_b, back_c, back_d = back[..., 0, 0], back[..., 0, 1], back[..., 1, 0], back[..., 1, 1]
+        # Chief ray leaves the stop center with a unit reduced angle
+        exit_pupil = -back_b * image_index / back_d
+        exit_pupil_diameter = stop_diameter * np.abs(back_a + exit_pupil * back_c / image_index)
+
+    return {
+        'efl': efl,
+        'bfl': bfl,
+        'ffl': ffl,
+        'pim': pim,
+        'magnification': magnification,
+        'entrance_pupil_position': entrance_pupil,
+        'entrance_pupil_diameter': epd,
+        'exit_pupil_position': exit_pupil,
+        'exit_pupil_diameter': exit_pupil_diameter,
+    }
@@ -0,0 +1,203 @@
+# ==============================================================================
+# PROJECT INFORMATION
+# ==============================================================================
+# Project Title: ODAI
+# Version: v1.0.0
+# Description: Optical System Design Optimization: Saddle Point Application
+#
+# AUTHORS
+# ==============================================================================
+# Aurélien Argy, Florin Baumann, Jelil Belheine, Pierre-Gabriel Bibal-Sobeaux,
+# Benoit Brouillet
+# Institution: Télécom Physique Strasbourg, Université de Strasbourg,
+# Illkirch-Graffenstaden, France
+#
+# LICENSE
+# ==============================================================================
+# This project is licensed under the GPL 3.0 License.
+# For more details, see the LICENSE file in the project root.
+#
+# DATE
+# ==============================================================================
+# Date of Creation: 04/04/2024
+#
+# ==============================================================================
+# NOTES
+# ==============================================================================
+# The code is developed using CodeV version 2022.03 and is intended for use under
+# the guidelines of the GPL 3.0 License.
+# ==============================================================================
+
+import numpy as np
+from Paraxial_module import first_order_properties
+
+
+def pupil_grid(delta=0.15):
+    """
+    Square ray grid in the normalized entrance pupil, as set by the AUT command DEL.
+    :param delta: Grid interval as a fraction of the pupil radius.
+    :return: Array (rays, 2) of normalized pupil coordinates inside the unit circle, the chief ray first.
+    """
+    steps = int(np.floor(1 / delta + 1e-9))
+    axis = np.arange(-steps, steps + 1) * delta
+    px, py = np.meshgrid(axis, axis)
+    points = np.stack([px.ravel(), py.ravel()], axis=-1)
+    points = points[np.sum(points**2, axis=-1) <= 1 + 1e-12]
+    # Put the chief ray (0, 0) first
+    order = np.argsort(np.sum(points**2, axis=-1), kind='stable')
+    return points[order]
+
+
+def trace_rays(curvatures, thicknesses, indices, field_angles, pupil, epd, entrance_pupil=0.0):
+    """
+    Exact trace of a ray batch through spherical surfaces, from an object at infinity to the image plane.
+    Every (system, field, wavelength, pupil point) combination is traced at once.
+    :param curvatures: Array (..., surfaces) of curvatures.
+    :param thicknesses: Array (..., surfaces); the last thickness is the distance to the image plane.
+    :param indices: Array (..., wavelengths, surfaces) of the index following each surface.
+    :param field_angles: Array (fields, 2) of X and Y field angles in degrees.
+    :param pupil: Array (rays, 2) of normalized entrance pupil coordinates.
+    :param epd: Entrance pupil diameter, scalar or array (...).
+    :param entrance_pupil: Entrance pupil position from the first vertex, scalar or array (...).
+    :return: (x, y) image coordinates, arrays (..., fields, wavelengths, rays), NaN for rays that miss a surface or are totally reflected.
+    """
+    curvatures = np.asarray(curvatures, dtype=float)
+    thicknesses = np.asarray(thicknesses, dtype=float)
+    indices = np.asarray(indices, dtype=float)
+    field_angles = np.radians(np.asarray(field_angles, dtype=float))
+    pupil = np.asarray(pupil, dtype=float)
+
+    # Axes: (..., field, wavelength, ray); per-system arrays get three trailing axes
+    def per_system(value):
+        return np.asarray(value, dtype=float)[..., None, None, None]
+
+    # Direction cosines in object space, one per field
+    tan_x, tan_y = np.tan(field_angles[:, 0]), np.tan(field_angles[:, 1])
+    norm = np.sqrt(1 + tan_x**2 + tan_y**2)
+    L = (tan_x / norm)[:, None, None]
+    M = (tan_y / norm)[:, None, None]
+    N = (1 / norm)[:, None, None]
+
+    # Start on the entrance pupil plane and transfer to the first vertex plane
+    radius = per_system(epd) / 2
+    z_ep = per_system(entrance_pupil)
+    x = pupil[:, 0] * radius - L / N * z_ep
+    y = pupil[:, 1] * radius - M / N * z_ep
+    batch = np.broadcast_shapes(x.shape, curvatures.shape[:-1] + (1, 1, 1), indices.shape[:-2] + (1, indices.shape[-2], 1))
+    x, y = np.broadcast_to(x, batch).copy(), np.broadcast_to(y, batch).copy()
+    L, M, N = (np.broadcast_to(value, batch).copy() for value in (L, M, N))
+
+    previous_index = np.ones(batch)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        for k in range(curvatures.shape[-1]):
+            c = curvatures[..., k][..., None, None, None]
+            n = indices[..., :, k][..., None, :, None]
+
+            # Intersection with the sphere c(x^2 + y^2 + z^2) - 2z = 0 from the vertex plane
+            F = c * (x**2 + y**2)
+            G = N - c * (x * L + y * M)
+            t = F / (G + np.sqrt(G**2 - c * F))
+            x, y, z = x + t * L, y + t * M, t * N
+
+            # Refraction (Snell's law in vector form), surface normal (-cx, -cy, 1 - cz)
+            nx, ny, nz = -c * x, -c * y, 1 - c * z
+            cos_i = L * nx + M * ny + N * nz
+            mu = previous_index / n
+            cos_r = np.sqrt(1 - mu**2 * (1 - cos_i**2))
+            g = cos_r - mu * cos_i
+            L, M, N = mu * L + g * nx, mu * M + g * ny, mu * N + g * nz
+            previous_index = np.broadcast_to(n, batch)
+
+            # Transfer to the next vertex plane (the image plane after the last surface)
+            s = (thicknesses[..., k][..., None, None, None] - z) / N
+            x, y = x + s * L, y + s * M
+    return x, y
+
+
+def transverse_aberrations(x, y, reference_wavelength):
+    """
+    Transverse aberrations measured from the chief ray (first pupil point) of the reference wavelength.
+    :return: (dx, dy) arrays shaped like x and y.
+    """
+    chief_x = x[..., reference_wavelength, 0][..., None, None]
+    chief_y = y[..., reference_wavelength, 0][..., None, None]
+    return x - chief_x, y - chief_y
+
+
+def transverse_aberration_merit(curvatures, thicknesses, indices, field_angles, epd, entrance_pupil=0.0,
+                                delta=0.15, reference_wavelength=None, wavelength_weights=None, field_weights=None):
+    """
+    Weighted mean square of the transverse ray aberrations over the DEL ray grid, every field and
+    every wavelength. Rays that fail are left out.
+    It is not CodeV's ERR. F. nor its RMS: no square root, no EFL target, no bounds and not CodeV's
+    weighting and normalization. It stands in for the error function of the local backend only.
+    :return: Merit value, array (...) for batched systems.
+    """
+    indices = np.asarray(indices, dtype=float)
+    field_angles = np.asarray(field_angles, dtype=float)
+    num_wavelengths = indices.shape[-2]
+    if reference_wavelength is None:
+        reference_wavelength = num_wavelengths // 2
+    wavelength_weights = np.ones(num_wavelengths) if wavelength_weights is None else np.asarray(wavelength_weights, dtype=float)
+    field_weights = np.ones(len(field_angles)) if field_weights is None else np.asarray(field_weights, dtype=float)
+
+    x, y = trace_rays(curvatures, thicknesses, indices, field_angles, pupil_grid(delta), epd, entrance_pupil)
+    dx, dy = transverse_aberrations(x, y, reference_wavelength)
+    squared = dx**2 + dy**2
+    weights = np.broadcast_to(field_weights[:, None, None] * wavelength_weights[None, :, None], squared.shape)
+    valid = np.isfinite(squared)
+    total = np.sum(np.where(valid, weights * squared, 0), axis=(-3, -2, -1))
+    count = np.sum(np.where(valid, weights, 0), axis=(-3, -2, -1))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(count > 0, total / count, np.nan)
+
+
+def system_merits(curvatures, thicknesses, indices, fields, epd=None, fno=None,
+                  paraxial_image=False, delta=0.15):
+    """
+    Transverse aberration merit of a batch of lenses given as surface arrays, with the stop on the first surface.
+    The value is not SystemSetup.error_fct (see transverse_aberration_merit).
+    :param curvatures: Array (systems, surfaces).
+    :param thicknesses: Array (systems, surfaces).
+    :param indices: Array (systems, wavelengths, surfaces) of the index following each surface;
+                    the central wavelength is the reference.
+    :param fields: List of (X, Y) field angles in degrees.
+    :param paraxial_image: If True the image plane is put at the paraxial image distance (PIM).
+    :return: Array (systems,) of merit values, NaN for the systems that cannot be traced.
+    """
+    curvatures = np.asarray(curvatures, dtype=float)
+    thicknesses = np.array(thicknesses, dtype=float)
+    indices = np.asarray(indices, dtype=float)
+    if not curvatures.shape[-1] or not indices.shape[-2] or not len(fields):
+        return np.full(curvatures.shape[:-1], np.nan)
+
+    reference = indices.shape[-2] // 2
+    properties = first_order_properties(curvatures, thicknesses, indices[..., reference, :], epd=epd, fno=fno)
+    if paraxial_image:
+        thicknesses[..., -1] = properties['pim']
+    epd = np.where(np.isfinite(properties['entrance_pupil_diameter']), properties['entrance_pupil_diameter'], np.nan)
+
+    merit = transverse_aberration_merit(curvatures, thicknesses, indices, fields, epd,
+                                        properties['entrance_pupil_position'],
+                                        delta=delta, reference_wavelength=reference)
+    return np.where(np.isfinite(merit), merit, np.nan)
+
+
+def system_merit(curvatures, thicknesses, indices, fields, epd=None, fno=None,
+                 paraxial_image=False, delta=0.15):
+    """
+    Transverse aberration merit of a lens given as surface lists, with the stop on the first surface
+    (see system_merits).
+    :param indices: Array (wavelengths, surfaces) of the index following each surface,
+                    as given by GlassCatalog.index_table; the central wavelength is the reference.
+    :param fields: List of (X, Y) field angles in degrees.
+    :param paraxial_image: If True the image plane is put at the paraxial image distance (PIM).
+    :return: The merit value, or None if the system cannot be traced (no ray through).
+    """
+    indices = np.asarray(indices, dtype=float)
+    if not len(curvatures) or not indices.shape[0] or not fields:
+        return None
+
+    merit = system_merits(np.asarray(curvatures, dtype=float)[None], np.asarray(thicknesses, dtype=float)[None],
+                          indices[None], fields, epd=epd, fno=fno, paraxial_image=paraxial_image, delta=delta)[0]
+    return float(merit) if np.isfinite(merit) else None
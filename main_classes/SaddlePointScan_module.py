@@ -0,0 +1,185 @@
+# ==============================================================================
+# PROJECT INFORMATION
+# ==============================================================================
+# Project Title: ODAI
+# Version: v1.0.0
+# Description: Optical System Design Optimization: Saddle Point Application
+#
+# AUTHORS
+# ==============================================================================
+# Aurélien Argy, Florin Baumann, Jelil Belheine, Pierre-Gabriel Bibal-Sobeaux,
+# Benoit Brouillet
+# Institution: Télécom Physique Strasbourg, Université de Strasbourg,
+# Illkirch-Graffenstaden, France
+#
+# LICENSE
+# ==============================================================================
+# This project is licensed under the GPL 3.0 License.
+# For more details, see the LICENSE file in the project root.
+#
+# DATE
+# ==============================================================================
+# Date of Creation: 04/04/2024
+#
+# ==============================================================================
+# NOTES
+# ==============================================================================
+# The code is developed using CodeV version 2022.03 and is intended for use under
+# the guidelines of the GPL 3.0 License.
+# ==============================================================================
+
+
+import numpy as np
+from scipy.optimize import brentq
+
+
+############## Curvature sweep ##############
+
+
+def adaptive_merit_values(evaluate, num_points, coarse_step=16, margin=6, sharpness=0.5):
+    """
+    Merit values of a sweep of num_points curvatures, computed only where the merit curve has structure.
+    A coarse sweep samples one point every coarse_step; the chords between consecutive samples are then
+    split at their middle point, level after level, where the slope changes sign or varies sharply from
+    the neighbouring chords, down to the sweep resolution. Around the refined points the sweep is sampled
+    on the margin used by the zero detection, and the rest of the curve is interpolated linearly.
+    :param evaluate: Function returning the merit values of an array of sweep indices (called once per level).
+    :param margin: Points sampled on each side of a refined point (the smoothness window of find_saddle_points).
+    :param sharpness: Relative slope change between neighbouring chords above which a chord is refined.
+    :return: (merit values of the whole sweep, mask of the points actually evaluated, to pass on to
+             find_saddle_points so that the interpolated values are not taken for computed ones).
+    """
+    mf_values = np.full(num_points, np.nan)
+    evaluated = np.zeros(num_points, dtype=bool)
+
+    def sample(indices):
+        indices = np.unique(np.clip(indices, 0, num_points - 1))
+        indices = indices[~evaluated[indices]]
+        if len(indices):
+            mf_values[indices] = evaluate(indices)
+            evaluated[indices] = True
+        return len(indices)
+
+    sample(np.r_[np.arange(0, num_points, coarse_step), num_points - 1])
+    while True:
+        known = np.flatnonzero(evaluated)
+        lengths = np.diff(known)
+        slopes = np.diff(mf_values[known]) / lengths
+        # A chord is refined when its slope differs in sign or sharply from one of its neighbours
+        with np.errstate(invalid='ignore'):
+            changes = (np.sign(slopes[1:]) != np.sign(slopes[:-1])) | \
+                      (np.abs(slopes[1:] - slopes[:-1]) > sharpness * np.maximum(np.abs(slopes[1:]), np.abs(slopes[:-1])))
+        flagged = np.zeros(len(slopes), dtype=bool)
+        flagged[1:] |= changes
+        flagged[:-1] |= changes
+
+        coarse = flagged & (lengths > 1)
+        fine = flagged & (lengths == 1)
+        middles = (known[:-1][coarse] + known[1:][coarse]) // 2
+        windows = (known[:-1][fine][:, None] + np.arange(-margin, margin + 2)).ravel()
+        if not sample(np.r_[middles, windows]):
+            break
+
+    known = np.flatnonzero(evaluated)
+    missing = ~evaluated
+    mf_values[missing] = np.interp(np.flatnonzero(missing), known, mf_values[known])
+    return mf_values, evaluated
+
+
+############## Saddle points ##############
+
+
+def refine_zero(derivative, a, b, tol=1e-7):
+    """
+    Zero of a live derivative in [a, b] by Brent's method.
+    :param derivative: Function of the curvature, e.g. a central difference of fresh merit evaluations.
+    :param tol: Absolute tolerance on the curvature.
+    :return: The zero, or None if the derivative has no sign change over [a, b].
+    """
+    # Brent's method evaluates the bracket ends again: keep the values
+    values = {}
+
+    def cached(curvature):
+        if curvature not in values:
+            values[curvature] = derivative(curvature)
+        return values[curvature]
+
+    fa, fb = cached(a), cached(b)
+    if not (np.isfinite(fa) and np.isfinite(fb) and fa * fb < 0):
+        return None
+    return brentq(cached, a, b, xtol=tol)
+
+
+def find_saddle_points(curvatures, mf_values, delta_curvature, threshold_multiplier=3, refine=None, evaluated=None):
+    """
+    Curvatures where the derivative of the merit function crosses zero smoothly.
+    :param curvatures: Swept curvatures, in increasing order.
+    :param mf_values: Merit value at each curvature.
+    :param delta_curvature: Step of the central finite differences.
+    :param threshold_multiplier: A zero is smooth when the standard deviation of the derivative around it
+                                 is below threshold_multiplier times the one of the whole sweep.
+    :param evaluated: Mask of the merit values actually computed (see adaptive_merit_values); the others are
+                      interpolated. Only the derivatives between two computed values enter the threshold,
+                      the smoothness windows and the sign changes. None: every value was computed.
+    :param refine: Optional function mapping the list of (a, b) grid intervals of the smooth zeros to their
+                   refined zeros (None where it fails, see refine_zero). Without it, or where it fails,
+                   a zero is located by bisection over the tabulated derivative, to the grid spacing.
+    :return: (zero points, derivatives, threshold).
+    """
+    # Nested function to evaluate the derivative at a given curvature
+    def derivative_at_curvature(curvature, curvatures, derivatives):
+        index = np.searchsorted(curvatures, curvature) - 1
+        return derivatives[index]
+
+    # Nested function for the bisection method
+    def bisection_method(f, a, b, tol=1e-5, max_iter=100):
+        for _ in range(max_iter):
+            mid = (a + b) / 2
+            if f(mid) * f(a) < 0:
+                b = mid
+            else:
+                a = mid
+            if abs(b - a) < tol:
+                break
+        return (a + b) / 2
+
+    # Nested function to check if the zero at the given index is smooth
+    def is_smooth_zero(derivatives, index, window_size=5):
+        start = max(index - window_size, 0)
+        end = min(index + window_size, len(derivatives))
+        window = derivatives[start:end][valid[start:end]]
+        return np.std(window) < threshold  # using the same threshold as before
+
+    num_points = len(curvatures)
+
+    # Compute the derivative using the central finite difference method
+    derivatives = np.zeros(num_points)
+    for i in range(1, num_points - 1):
+        derivatives[i] = (mf_values[i + 1] - mf_values[i - 1]) / (2 * delta_curvature)
+
+    # Derivatives computed from two evaluated values (the end points keep their zero derivative)
+    valid = np.ones(num_points, dtype=bool)
+    if evaluated is not None:
+        valid[1:-1] = evaluated[:-2] & evaluated[2:]
+
+    # Set the threshold as a multiple of the standard deviation of the derivative values
+    threshold = threshold_multiplier * np.std(derivatives[valid])
+
+    # Finding all intervals where the derivative changes sign and is smooth
+    zero_points = []
+    brackets = []
+    for i in range(1, num_points - 1):
+        if valid[i] and valid[i - 1] and derivatives[i] * derivatives[i - 1] < 0:
+            a, b = curvatures[i - 1], curvatures[i]
+            zero_point = bisection_method(lambda x: derivative_at_curvature(x, curvatures, derivatives), a, b)
+
+            # Check if the zero point is smooth
+            if is_smooth_zero(derivatives, i):
+                zero_points.append(zero_point)
+                brackets.append((a, b))
+
+    if refine is not None and brackets:
+        zero_points = [zero_point if refined is None else refined
+                       for zero_point, refined in zip(zero_points, refine(brackets))]
+
+    return zero_points, derivatives, threshold
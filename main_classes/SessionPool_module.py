@@ -0,0 +1,209 @@
+# ==============================================================================
+# PROJECT INFORMATION
+# ==============================================================================
+# Project Title: ODAI
+# Version: v1.0.0
+# Description: Optical System Design Optimization: Saddle Point Application
+#
+# AUTHORS
+# ==============================================================================
+# Aurélien Argy, Florin Baumann, Jelil Belheine, Pierre-Gabriel Bibal-Sobeaux,
+# Benoit Brouillet
+# Institution: Télécom Physique Strasbourg, Université de Strasbourg,
+# Illkirch-Graffenstaden, France
+#
+# LICENSE
+# ==============================================================================
+# This project is licensed under the GPL 3.0 License.
+# For more details, see the LICENSE file in the project root.
+#
+# DATE
+# ==============================================================================
+# Date of Creation: 04/04/2024
+#
+# ==============================================================================
+# NOTES
+# ==============================================================================
+# The code is developed using CodeV version 2022.03 and is intended for use under
+# the guidelines of the GPL 3.0 License.
+# ==============================================================================
+
+
+import queue
+import threading
+import multiprocessing.util
+from concurrent.futures import Future, ProcessPoolExecutor
+from Backend_module import CodeVBackend
+from Instrumentation_module import CommandProfiler
+from SystemNode_module import SystemNode
+from SystemSetup_module import SystemSetup
+
+
+def open_session(backend_factory, system_data):
+    """
+    Start a session and set up a new lens with the given system settings.
+    :param backend_factory: Callable returning a new OpticsBackend (e.g. CodeVBackend, LocalBackend).
+    :param system_data: Dictionary returned by SystemSetup.system_data.
+    :return: The SystemSetup of the session.
+    """
+    session = SystemSetup(backend_factory())
+    session.start_session()
+    session.apply_system_data(system_data)
+    return session
+
+
+def com_initialize():
+    # COM must be initialised in every thread that drives CodeV
+    try:
+        import pythoncom
+    except ImportError:
+        return None
+    pythoncom.CoInitialize()
+    return pythoncom
+
+
+# Session of a process pool worker, opened by init_process_session
+process_session = None
+
+
+def init_process_session(backend_factory, system_data):
+    global process_session
+    process_session = open_session(backend_factory, system_data)
+    # Stop the session when the worker process exits
+    multiprocessing.util.Finalize(None, process_session.stop_session, exitpriority=10)
+
+
+def run_numbered(function, session, id_range, args):
+    # Run a job, numbering the nodes it creates from the block (base, count) reserved by the coordinator
+    if id_range is None:
+        return function(session, *args)
+    with SystemNode.numbered_from(*id_range):
+        return function(session, *args)
+
+
+def run_in_process(function, id_range, args):
+    # The result, and the round trips of the job to add to the profile of the pool
+    result = run_numbered(function, process_session, id_range, args)
+    profiler, process_session.cv.profiler = process_session.cv.profiler, CommandProfiler()
+    return result, profiler
+
+
+class SessionPool:
+    """
+    Pool of backend sessions, each with its own SystemSetup set up with the same system settings.
+    Jobs are functions called as function(session, *args) on a free session; a job must leave
+    nothing behind that the next one relies on, as the SystemSetup methods restoring a saved
+    state (load_system_parameters) do.
+    Sessions live in threads by default, one CodeV instance per thread. With processes=True they
+    live in worker processes, for engines that hold the GIL such as LocalBackend; arguments and
+    results are then pickled.
+    The round trips of all the sessions are added up in self.profiler (a CommandProfiler), complete
+    once the pool is closed.
+    """
+
+    def __init__(self, system_data, backend_factory=CodeVBackend, workers=2, processes=False):
+        """
+        :param system_data: Dictionary returned by SystemSetup.system_data of the coordinating session.
+        :param backend_factory: Callable returning a new backend for each session.
+        :param workers: Number of sessions (CodeV licenses or cores).
+        :param processes: Run the sessions in processes instead of threads.
+        """
+        self.workers = workers
+        self.processes = processes
+        self.profiler = CommandProfiler()
+        self.profiler_lock = threading.Lock()
+        if processes:
+            self.executor = ProcessPoolExecutor(workers, initializer=init_process_session,
+                                                initargs=(backend_factory, system_data))
+            return
+        self.jobs = queue.Queue()
+        self.threads = [threading.Thread(target=self.serve, args=(backend_factory, system_data), daemon=True)
+                        for _ in range(workers)]
+        for thread in self.threads:
+            thread.start()
+
+    def serve(self, backend_factory, system_data):
+        # Worker thread: one session, jobs taken from the queue until a None sentinel
+        com = com_initialize()
+        session, error = None, None
+        try:
+            session = open_session(backend_factory, system_data)
+        except Exception as e:
+            error = e
+        try:
+            while True:
+                job = self.jobs.get()
+                if job is None:
+                    break
+                future, function, id_range, args = job
+                if not future.set_running_or_notify_cancel():
+                    continue
+                if session is None:
+                    future.set_exception(error)
+                    continue
+                try:
+                    future.set_result(run_numbered(function, session, id_range, args))
+                except BaseException as e:
+                    future.set_exception(e)
+        finally:
+            if session is not None:
+                session.stop_session()
+                with self.profiler_lock:
+                    self.profiler.merge(session.cv.profiler)
+            if com is not None:
+                com.CoUninitialize()
+
+    def submit(self, function, *args, node_ids=0):
+        """
+        Queue a job.
+        :param function: Function called as function(session, *args); module-level or a SystemSetup
+                         method (SystemSetup.method) when the pool uses processes.
+        :param node_ids: Number of SystemNode IDs to reserve for the nodes the job creates. The block is
+                         reserved when the job is submitted, so the IDs only depend on the submission order;
+                         the job raises NodeIdRangeExceeded if it creates more nodes.
+        :return: A concurrent.futures.Future of its result.
+        """
+        id_range = (SystemNode.reserve_ids(node_ids), node_ids) if node_ids else None
+        if self.processes:
+            future = Future()
+            self.executor.submit(run_in_process, function, id_range, args).add_done_callback(
+                lambda job: self.collect(job, future))
+            return future
+        future = Future()
+        self.jobs.put((future, function, id_range, args))
+        return future
+
+    def collect(self, job, future):
+        # Result of a process job: keep its profile and hand its result over to the future returned by submit
+        future.set_running_or_notify_cancel()
+        try:
+            result, profiler = job.result()
+        except BaseException as e:
+            future.set_exception(e)
+            return
+        with self.profiler_lock:
+            self.profiler.merge(profiler)
+        future.set_result(result)
+
+    def map(self, function, *iterables):
+        """
+        Run function(session, *args) for each set of arguments and return the results in order.
+        """
+        futures = [self.submit(function, *args) for args in zip(*iterables)]
+        return [future.result() for future in futures]
+
+    def close(self):
+        # Wait for the queued jobs and stop the sessions
+        if self.processes:
+            self.executor.shutdown(wait=True)
+            return
+        for _ in self.threads:
+            self.jobs.put(None)
+        for thread in self.threads:
+            thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
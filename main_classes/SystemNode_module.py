@@ -37,15 +37,61 @@ import os
 import numpy as np
 from affichage import print_decorative_header, print_blank_line
 import re
+import copy
+import threading
+import contextlib
 import networkx as nx
 
+# IDs set aside for the nodes created by one tree expansion job of a SessionPool or JobBroker worker
+NODE_ID_BLOCK = 1000
+
+
+class NodeIdRangeExceeded(Exception):
+    """
+    Raised when a job creates more nodes than the IDs reserved for it.
+    """
+
+
 class SystemNode:
   id_counter = 0  # Class-level counter for unique IDs
+  id_lock = threading.Lock()  # Nodes can be created by several worker sessions at once
+  id_ranges = threading.local()  # Range (next ID, last ID) the job run by a thread numbers its nodes from
 
   @classmethod
   def generate_unique_id(cls):
-      cls.id_counter += 1
-      return cls.id_counter
+      id_range = getattr(cls.id_ranges, 'current', None)
+      if id_range is not None:
+          next_id, last_id = id_range
+          if next_id > last_id:
+              raise NodeIdRangeExceeded(f"The job created more nodes than its IDs (up to {last_id}) allow, raise NODE_ID_BLOCK")
+          cls.id_ranges.current = (next_id + 1, last_id)
+          return next_id
+      with cls.id_lock:
+          cls.id_counter += 1
+          return cls.id_counter
+
+  @classmethod
+  def reserve_ids(cls, count):
+      # Skip count IDs, for nodes numbered in another process; returns the last ID before the block
+      with cls.id_lock:
+          base = cls.id_counter
+          cls.id_counter += count
+          return base
+
+  @classmethod
+  @contextlib.contextmanager
+  def numbered_from(cls, base, count):
+      """
+      Number the nodes created by the current thread within the block base+1 .. base+count (from reserve_ids),
+      so that the IDs of a job do not depend on which worker runs it or when.
+      :raises NodeIdRangeExceeded: When a node is created after the block is used up.
+      """
+      previous = getattr(cls.id_ranges, 'current', None)
+      cls.id_ranges.current = (base + 1, base + count)
+      try:
+          yield
+      finally:
+          cls.id_ranges.current = previous
 
   def __init__(self, system_params, optical_system_state=None,seq_file_path=None, parent=None, merit_function=None, efl = None, is_optimized=False, depth=0, high_debuging=False):
       self.id = SystemNode.generate_unique_id()
@@ -78,6 +124,15 @@ class SystemNode:
   def add_child(self, child_node):
       self.children.append(child_node)
 
+  def detached(self):
+      # Copy of the node (same ID) without its parent and children, to hand over to a worker session
+      node = copy.copy(self)
+      node.parent = None
+      node.children = []
+      node.saddle_points = []
+      node.minima = []
+      return node
+
   def add_saddle_point(self, saddle_point):
       self.saddle_points.append(saddle_point)
 
@@ -96,6 +151,20 @@ class SystemTree:
     def add_node(self, node):
         self.all_nodes.append(node)
 
+    def graft(self, node, children):
+        """
+        Attach to node the children found by a worker session from a detached copy of it,
+        and add them and their descendants to the tree, in the order the serial exploration adds them.
+        """
+        for child in children:
+            child.parent = node
+            node.add_child(child)
+            pending = [child]
+            while pending:
+                current = pending.pop(0)
+                self.add_node(current)
+                pending.extend(current.children)
+
     def print_tree(self, node=None, depth=0):
         if node is None:
             if depth == 0:  # Print header and border only once at the start
@@ -223,12 +292,14 @@ class SystemTree:
     ################################# Final optimisation #################################
         
     
-    def final_optimization(self, system_setup, efl, base_file_path):
+    def final_optimization(self, system_setup, efl, base_file_path, pool=None):
         """
         Perform final optimization on all nodes at the maximum depth of the tree.
         :param system_setup: Instance of SystemSetup class for performing optimization.
         :param efl: Effective focal length for optimization.
         :param base_file_path: Base path for saving optimized systems.
+        :param pool: Optional SessionPool; each leaf is then optimized as an independent job on its sessions.
+        :return: Dict {node id: seconds spent on its final optimization}.
         """
         # Find the final depth of the tree
         final_depth = self.find_final_depth()
@@ -238,45 +309,45 @@ class SystemTree:
 
         #self.plot_best_merit_function_evolution()
 
+        jobs = []
         for i, node in enumerate(final_depth_nodes):
             print(f"Optimizing Node {i+1}/{len(final_depth_nodes)} at Final Depth {final_depth}")
 
-            # Load the state of the node using the specified command format
-            if node.seq_file_path:
-                load_command = f'run"{node.seq_file_path}";GO'
-                system_setup.cv.Command(load_command)
-            else:
-                print(f"No SEQ file path provided for Node {node.id}, skipping load.")
-
-            # Make all radii, thicknesses, and applicable materials variable for optimization
-            system_setup.make_all_thicknesses_variable(last_one = False)
-            system_setup.make_all_radii_variable()
-            system_setup.make_all_materials_variable()
-
-            # Perform optimization
-            system_setup.cv.Command('AUT')
-            system_setup.cv.Command('IMP 1E-10')
-            system_setup.cv.Command("EFL Z1 = " + str(efl)) # Condition on the EFL
-            system_setup.cv.Command('MNT 0.2')
-            system_setup.cv.Command("GLA SO..I  NFK5 NSK16 NLAF2 SF4")
-            system_setup.cv.Command("GO")
-
-            # Update and save the optimized state
-            system_setup.update_all_surfaces_from_codev()
-            optimized_state = system_setup.save_system_parameters()
-
-            # Update the node's state and merit function
-            node.optical_system_state = optimized_state
-            node.merit_function = system_setup.error_fct(efl, constrained=False)
-            node.efl = system_setup.get_efl_from_codev()
-
-            # Save the optimized system
+            # The state of the node is loaded from its SEQ file, else from its saved parameters: a session
+            # of the pool holds whatever system its previous job left
+            if not node.seq_file_path:
+                if node.optical_system_state is None:
+                    print(f"No SEQ file path or saved state for Node {node.id}, skipping it.")
+                    continue
+                print(f"No SEQ file path provided for Node {node.id}, loading its saved state.")
+
             optimized_file_path = f"{base_file_path}/FinalOptimized_Node{node.id}.seq"
-            system_setup.save_system(optimized_file_path)
-            node.seq_file_path = optimized_file_path
+            if pool is not None:
+                jobs.append((node, pool.submit(type(system_setup).final_optimize, node.seq_file_path, efl, optimized_file_path,
+                                               node.optical_system_state)))
+            else:
+                jobs.append((node, system_setup.final_optimize(node.seq_file_path, efl, optimized_file_path, node.optical_system_state)))
+
+        timings = {}
+        for node, result in jobs:
+            if pool is not None:
+                result = result.result()
+
+            # Update the node's state, merit function and saved system
+            node.optical_system_state = result['state']
+            node.merit_function = result['merit_function']
+            node.efl = result['efl']
+            node.seq_file_path = result['seq_file_path']
+            timings[node.id] = result['seconds']
 
             # Print the merit function of the optimized system
-            print(f"Node {node.id} Optimized: Merit Function: {node.merit_function}, Saved at: {optimized_file_path}")
+            print(f"Node {node.id} Optimized: Merit Function: {node.merit_function}, Saved at: {node.seq_file_path}, Time: {result['seconds']:.2f} s")
+
+        if timings:
+            seconds = np.array(list(timings.values()))
+            print(f"Final optimization of {len(seconds)} nodes: {seconds.sum():.2f} s of session time, "
+                  f"mean {seconds.mean():.2f} s, max {seconds.max():.2f} s")
+        return timings
 
 
     def find_final_depth(self):
@@ -29,27 +29,48 @@
 # ==============================================================================
 
 import re    
+import math
+import time
 import numpy as np
 import matplotlib.pyplot as plt
 from mpl_toolkits.mplot3d import Axes3D
-import win32com.client
-from SystemNode_module import SystemNode, SystemTree
+from SystemNode_module import SystemNode, SystemTree, NODE_ID_BLOCK
+from Backend_module import CodeVBackend
+from CommandChannel_module import CommandChannel
+from GlassCatalog_module import GlassCatalog
+from Instrumentation_module import profiled_phase
+from Paraxial_module import first_order_properties
+from RayTrace_module import system_merit
+from SaddlePointScan_module import adaptive_merit_values, find_saddle_points, refine_zero
 from affichage import *
 import copy
 import os
 
 
 class SystemSetup:
-      def __init__(self):
-          self.cv = win32com.client.Dispatch("CodeV.Application")
+      def __init__(self, backend=None):
+          # Engine driving the lens (CodeV over COM by default, see Backend_module),
+          # reached through a channel that can batch commands (see batch())
+          self.cv = CommandChannel(backend if backend is not None else CodeVBackend())
           self.surfaces = {}   # dict to keep track of surfaces
           self.ref_mode = 'radius'  # Default mode is 'radius'
           self.saved_systems = {}  # dict to keep track of saved systems
           self.rms = []
           self.spot = []
+          # System data mirrored for the local paraxial computations
+          self.wavelengths = []
+          self.fields = []
+          self.epd = None
+          self.fno = None
+          self.dimension = None
+          self.paraxial_image = False
+          self.merit_definition = None  # ((efl, constrained), definition version) of the AUT settings installed by error_fct
+          self.glass_catalog = GlassCatalog()  # Index tables at self.wavelengths
+          self.avoided_writes = 0  # Commands saved by the read-only syncs of update_all_surfaces_from_codev
+          self.session_pool = None  # SessionPool for the SP scan shards and the OptA/OptB branches of a saddle point
 
       class Surface:
-          def __init__(self, parent, number, radius, thickness, material=None):
+          def __init__(self, parent, number, radius, thickness, material=None, create=True):
               self.parent = parent
               self.cv = parent.cv
               self.number = number
@@ -61,7 +82,8 @@ class SystemSetup:
               self.thickness_variable = False
               self.material_variable = False
 
-              self.create_surface()
+              if create:  # False for a surface that already exists in CodeV
+                  self.create_surface()
               self.parent.surfaces[number] = self 
 
           def create_surface(self):
@@ -138,6 +160,23 @@ class SystemSetup:
             self.material_variable = False
             self.cv.Command(f"GC1 S{self.number} 100")
 
+          def mirror(self, value, thickness, material=None, curvature_mode=False):
+            """
+            Update the Python copy of the surface from values read in CodeV, without sending any command.
+            :param value: Curvature if curvature_mode, else radius (0 for a flat surface).
+            :param material: Material read in CodeV, None for air.
+            :return: Number of commands the set_* methods would have sent for the same update.
+            """
+            if curvature_mode:
+                self.curvature = value
+                self.radius = 1 / value if value != 0 else 0
+            else:
+                self.radius = value
+                self.curvature = 1 / value if value != 0 else 0
+            self.thickness = thickness
+            self.material = material
+            return 2 + self.radius_variable + self.thickness_variable + (material is not None)
+
           def update_from_codev(self):
             # Get the current parameters from CODE V
             current_params = self.parent.get_current_surface_params(self.number)
@@ -153,38 +192,103 @@ class SystemSetup:
 
       def start_session(self):
         # Start a session of CODE V
-        self.cv = win32com.client.Dispatch("CodeV.Application")
-        self.cv.StartCodeV()
+        self.cv.start()
         print("CODE V session started.")
 
+      def batch(self):
+        """
+        Context manager grouping the commands sent in its block: write-only commands are queued
+        and sent in one round trip with the next query, or when the block ends.
+        """
+        return self.cv.batch()
+
+      def phase(self, name):
+        """
+        Context manager attributing the commands sent in its block to the phase name
+        in the command profile (see self.cv.profiler).
+        """
+        return self.cv.profiler.phase(name)
+
+      def command_profile(self):
+        """
+        Text report of the CodeV round trips made so far, per verb and per phase.
+        """
+        return self.cv.profiler.report()
+
       def create_new_system(self):
         # Create a new lens system
         self.cv.Command("new")
+        self.wavelengths = []
+        self.glass_catalog.set_wavelengths(self.wavelengths)
+        self.fields = []
+        self.epd = None
+        self.fno = None
+        self.paraxial_image = False
 
       def set_wavelengths(self, wavelengths):
         # Set wavelengths (list of wavelengths in nm)
         wl_command = "WL " + " ".join(map(str, wavelengths))
         self.cv.Command(wl_command)
+        self.wavelengths = list(wavelengths)
+        self.glass_catalog.set_wavelengths(self.wavelengths)
 
       def set_entrance_pupil_diameter(self, diameter):
         # Set entrance pupil diameter
         self.cv.Command(f"EPD {diameter}")
+        self.epd, self.fno = diameter, None
 
       def set_fd(self, fd):
         # Set focal distance
         self.cv.Command(f"FNO {fd}")
+        self.fno, self.epd = fd, None
 
       def set_dimensions(self, dimension_unit):
         # Set measurement unit (e.g., 'mm' or 'm')
         self.cv.Command(f"DIM {dimension_unit}")
+        self.dimension = dimension_unit
 
       def set_fields(self, fields):
         # Set fields (list of field points)
         for index, (angle, weight) in enumerate(fields, start=1):
             self.cv.Command(f"INS F{index} {angle} {weight}")
+        self.fields = [tuple(field) for field in fields]
 
       def set_paraxial_image_distance(self):
          self.cv.Command("PIM Yes")
+         self.paraxial_image = True
+
+      def system_data(self):
+        """
+        System settings of the lens (everything but the surfaces), to set up another session the same way.
+        :return: A dictionary for apply_system_data.
+        """
+        return {
+            'wavelengths': list(self.wavelengths),
+            'epd': self.epd,
+            'fno': self.fno,
+            'dimension': self.dimension,
+            'fields': list(self.fields),
+            'paraxial_image': self.paraxial_image,
+        }
+
+      def apply_system_data(self, system_data):
+        """
+        Start a new lens with the settings returned by system_data() of another session.
+        The surfaces are then set with load_system_parameters.
+        """
+        with self.batch():
+          self.create_new_system()
+          if system_data['wavelengths']:
+              self.set_wavelengths(system_data['wavelengths'])
+          if system_data['fno'] is not None:
+              self.set_fd(system_data['fno'])
+          elif system_data['epd'] is not None:
+              self.set_entrance_pupil_diameter(system_data['epd'])
+          if system_data['dimension'] is not None:
+              self.set_dimensions(system_data['dimension'])
+          self.set_fields(system_data['fields'])
+          if system_data['paraxial_image']:
+              self.set_paraxial_image_distance()
 
       def switch_ref_mode(self, mode):
         """Switch between radius and curvature mode."""
@@ -195,107 +299,83 @@ class SystemSetup:
         self.cv.Command(f"RDM {'Y' if mode == 'radius' else 'N'}")
 
 
+      @profiled_phase('sync')
       def update_all_surfaces_from_codev(self, debug=False):
-        # Get the current parameters for all surfaces from CODE V
-        result = self.cv.Command("LIS")
+        """
+        Refresh the Python surfaces from the current LIS (shared with the other readers).
+        :return: Number of commands saved compared to setting the read values back in CodeV.
+        """
+        snapshot = self.cv.snapshot()
 
         # Determine whether the system is in radius or curvature mode
-        is_curvature_mode = "CUY" in result.split('\n')[0]
+        is_curvature_mode = snapshot.is_curvature_mode
 
         if debug:
             print("debuging activated for update_all_surfaces_from_codev")
             print("System is in curvature mode." if is_curvature_mode else "System is in radius mode.")
-            lines = result.split('\n')
-            for line in lines:
-                if "SPECIFICATION DATA" in line:
-                    break
-                print(line)
-
-        # Updated regular expression patterns for radius and curvature modes
-        pattern_radius = r"\s+(STO|\d+):\s+([-\d\.]+)\s+([-\d\.]+)(?:\s+([\w_]+))?"
-        pattern_curvature = r"\s+(STO|\d+):\s+([-\d\.Ee\+\-]+)\s+([-\d\.]+)(?:\s+([\w_]+))?"
-
-        pattern = pattern_curvature if is_curvature_mode else pattern_radius
-        matches = re.finditer(pattern, result, re.MULTILINE)
-
-        for match in matches:
-            surface_number = match.group(1)
-            value = float(match.group(2))
-            thickness = float(match.group(3))
-            material = match.group(4) if match.group(4) is not None else None
-
-            # Handle "STO" as surface number 1
-            if surface_number == "STO":
-                surface_number = 1
-            else:
-                surface_number = int(surface_number)
+            print(snapshot.lens_data())
 
+        # The values come from CodeV: only the Python surfaces are updated, nothing is sent back
+        avoided_writes = 0
+        for row in snapshot.surfaces:
+            surface_number = int(row['surface'])
             if surface_number in self.surfaces:
-                surface = self.surfaces[surface_number]
-                if is_curvature_mode:
-                    surface.set_curvature(value)
-                else:
-                    surface.set_radius(value)
-                surface.set_thickness(thickness)
-                if material and material not in ['0', 'None']:
-                    surface.set_material(material)
-
-      def get_surface_count_from_codev(self):
-        # Get the current parameters for all surfaces from CODE V
-        result = self.cv.Command("LIS")
+                avoided_writes += self.surfaces[surface_number].mirror(float(row['value']), float(row['thickness']),
+                                                                       str(row['glass']) or None, is_curvature_mode)
 
-        # Regular expression pattern to match surface lines
-        pattern = r"\s+(STO|\d+):"
+        self.avoided_writes += avoided_writes
+        return avoided_writes
 
-        # Find all matches for surfaces
-        matches = re.findall(pattern, result, re.MULTILINE)
-
-        # Count the number of surfaces (including STO if it appears)
-        surface_count = len(matches)
-
-        return surface_count
+      def get_surface_count_from_codev(self):
+        # Number of surfaces (including STO) in the current LIS
+        return self.cv.snapshot().surface_count
       
       def get_surface_thicknesses_from_codev(self):
-        # Get the current parameters for all surfaces from CODE V
-        result = self.cv.Command("LIS")
-
-        # Regular expression pattern to extract surface thicknesses
-        pattern = r"\s+(STO|\d+):\s+[-\d\.Ee\+\-]+\s+([-\d\.]+)"
-
-        matches = re.finditer(pattern, result, re.MULTILINE)
-
-        surface_thicknesses = {}
-        for match in matches:
-            surface_number = match.group(1)
-            thickness = float(match.group(2))
-
-            # Handle "STO" as surface number 1
-            if surface_number == "STO":
-                surface_number = 1
-            else:
-                surface_number = int(surface_number)
-
-            surface_thicknesses[surface_number] = thickness
-
-        return surface_thicknesses
+        # {surface number: thickness} from the current LIS
+        return self.cv.snapshot().thicknesses
       
       def get_efl_from_codev(self):
-        # Execute the LIS command and get the output
-        result = self.cv.Command("LIS")
+        # EFL from the LIS output, None if it is not found
+        return self.cv.get_efl()
 
-        # Regular expression to find the EFL in the output
-        efl_pattern = r"\s+EFL\s+([-\d\.Ee\+\-]+)"
+      def get_paraxial_properties(self):
+        """
+        First-order properties of the current system (EFL, BFL, PIM, pupils, magnification)
+        computed locally from self.surfaces at the reference wavelength, without any CodeV round trip.
+        :return: Dict of floats, or None if a material of the system has no known index.
+        """
+        curvatures, thicknesses, materials = self.get_surface_arrays()
+        if not curvatures:
+            return None
+        try:
+            indices = self.glass_catalog.reference_indices(materials)
+        except KeyError:
+            return None
 
-        # Search for the EFL in the output
-        match = re.search(efl_pattern, result)
+        properties = first_order_properties(curvatures, thicknesses, indices, epd=self.epd, fno=self.fno)
+        return {key: float(value) for key, value in properties.items()}
 
-        if match:
-            # Extract and return the EFL value
-            efl = float(match.group(1))
-            return efl
-        else:
-            # Return None or raise an error if EFL is not found
-            return None
+      def get_surface_arrays(self):
+        """
+        Curvatures, thicknesses and materials of the mirrored surfaces, in surface order.
+        The curvature is taken from the value last set in the current reference mode.
+        """
+        curvatures, thicknesses, materials = [], [], []
+        for surface in self.get_ordered_surfaces().values():
+            if self.ref_mode == 'curvature':
+                curvatures.append(surface.curvature)
+            else:
+                curvatures.append(1 / surface.radius if surface.radius != 0 else 0)
+            thicknesses.append(surface.thickness)
+            materials.append(surface.material)
+        return curvatures, thicknesses, materials
+
+      def get_efl(self):
+        # EFL from the local paraxial trace, falling back on CodeV when a material is unknown
+        properties = self.get_paraxial_properties()
+        if properties is None:
+            return self.get_efl_from_codev()
+        return properties['efl']
 
 
       def print_current_system(self):
@@ -319,69 +399,94 @@ class SystemSetup:
 
 
 
+      @profiled_phase('optimize')
       def optimize_system(self, efl, constrained = False, mxt = 1E10, mnt = 0):
-        # Optimize the system
-        self.cv.Command("AUT")
-        self.cv.Command('DEL 0.15') # Ray grid interval
-        self.cv.Command('MXT' + str(mxt))
-
-        if constrained:
+        with self.batch():
+          # Optimize the system
+          self.cv.Command("AUT")
+          self.cv.Command('DEL 0.15') # Ray grid interval
+          self.cv.Command('MXT' + str(mxt))
+
+          if constrained:
+            self.cv.Command("MNA 0")
+            self.cv.Command("MAE 0")
+
+          self.cv.Command("MNT" + str(mnt))
+
+          self.cv.Command("MXC 100")
+          self.cv.Command('MNC 25')
+          self.cv.Command("IMP 1E-15")
+          self.cv.Command('WFR n') # Opti with transverse aberration
+
+          self.cv.Command("DRA S0..I y")
+          self.cv.Command("CNV 0") # Step optimisation
+          self.cv.Command("EFL = " + str(efl)) # Condition on the EFL
+
+          if efl == 15 or efl == -15:
+            if constrained == True:
+              self.cv.Command("SD SO Z1 > 12.5")
+              self.cv.Command("MXT 7")
+          elif efl == 50 or efl == -50 or efl == -100 or efl == -200:
+            if constrained == True:
+              self.cv.Command("SD SO Z1 > 40")
+              self.cv.Command("MXT 14")
+          elif efl == 100 or efl == 200:
+            if constrained == True:
+              self.cv.Command("SD SO Z1 > 75")
+              self.cv.Command("MXT 60")
+
+          #self.cv.Command("GLA SO..I  NFK5 NSK16 NLAF2 SF4")
+          self.cv.Command("GO")  # Perform optimization
+
+      @profiled_phase('global_optimize')
+      def global_optimize_system(self, efl):
+        with self.batch():
+          # Optimize the system
+          self.cv.Command("AUT ; CAN")
+          self.cv.Command("AUT")
+          self.cv.Command("MXC 100")
+          self.cv.Command("IMP 0.0001")
+          self.cv.Command("EFL Z1 = " + str(efl))
           self.cv.Command("MNA 0")
           self.cv.Command("MAE 0")
-
-        self.cv.Command("MNT" + str(mnt))
-
-        self.cv.Command("MXC 100")
-        self.cv.Command('MNC 25')
-        self.cv.Command("IMP 1E-15")
-        self.cv.Command('WFR n') # Opti with transverse aberration
-
-        self.cv.Command("DRA S0..I y")
-        self.cv.Command("CNV 0") # Step optimisation
-        self.cv.Command("EFL = " + str(efl)) # Condition on the EFL
-
-        if efl == 15 or efl == -15:
-          if constrained == True:
-            self.cv.Command("SD SO Z1 > 12.5")
+          self.cv.Command("GS 1")
+          self.cv.Command("TIM 2")
+          if efl == 15 or efl == -15:
             self.cv.Command("MXT 7")
-        elif efl == 50 or efl == -50 or efl == -100 or efl == -200:
-          if constrained == True:
-            self.cv.Command("SD SO Z1 > 40")
+            self.cv.Command("SD SO Z1 > 12.5")
+          elif efl == 50 or efl == -50 or efl == -100 or efl == -200:
             self.cv.Command("MXT 14")
-        elif efl == 100 or efl == 200:
-          if constrained == True:
-            self.cv.Command("SD SO Z1 > 75")
+            self.cv.Command("SD SO Z1 > 40")
+          elif efl == 100 or efl == 200:
             self.cv.Command("MXT 60")
+            self.cv.Command("SD SO Z1 > 75")
 
-        #self.cv.Command("GLA SO..I  NFK5 NSK16 NLAF2 SF4")
-        self.cv.Command("GO")  # Perform optimization
-
-      def global_optimize_system(self, efl):
-        # Optimize the system
-        self.cv.Command("AUT ; CAN")
-        self.cv.Command("AUT")
-        self.cv.Command("MXC 100")
-        self.cv.Command("IMP 0.0001")
-        self.cv.Command("EFL Z1 = " + str(efl))
-        self.cv.Command("MNA 0")
-        self.cv.Command("MAE 0")
-        self.cv.Command("GS 1")
-        self.cv.Command("TIM 2")
-        if efl == 15 or efl == -15:
-          self.cv.Command("MXT 7")
-          self.cv.Command("SD SO Z1 > 12.5")
-        elif efl == 50 or efl == -50 or efl == -100 or efl == -200:
-          self.cv.Command("MXT 14")
-          self.cv.Command("SD SO Z1 > 40")
-        elif efl == 100 or efl == 200:
-          self.cv.Command("MXT 60")
-          self.cv.Command("SD SO Z1 > 75")
-
-        self.cv.Command("GLA SO..I  NFK5 NSK16 NLAF2 SF4")
-        self.cv.Command("GO")  # Perform global synthesis
+          self.cv.Command("GLA SO..I  NFK5 NSK16 NLAF2 SF4")
+          self.cv.Command("GO")  # Perform global synthesis
 
 
+      @profiled_phase('merit')
       def error_fct(self, efl, constrained = True):
+        """
+        Error function of the current system for the given EFL target.
+        The AUT settings are installed once per (efl, constrained) and kept by the engine, so that
+        repeated evaluations only re-run them. They are installed again if the key changes or if any
+        other command opened AUT or reloaded the lens in the meantime (see CommandChannel.definition_version).
+        :return: The error function value, or None if it is not found.
+        """
+        key = (efl, constrained)
+        if self.merit_definition == (key, self.cv.definition_version):
+          merit = self.cv.rerun_merit()
+        else:
+          with self.batch():
+            self.install_merit_definition(efl, constrained)
+            # Perform optimization and read the error function (None if not found)
+            merit = self.cv.get_merit()
+        self.merit_definition = (key, self.cv.definition_version)
+        return merit
+
+      def install_merit_definition(self, efl, constrained = True):
+        # AUT settings of the error function (transverse aberrations, EFL target and bounds)
         self.cv.Command("AUT ; CAN")
         self.cv.Command("AUT")
         self.cv.Command('DEL 0.15') # Ray grid interval
@@ -391,7 +496,7 @@ class SystemSetup:
         if constrained:
           self.cv.Command("MNA 0")
           self.cv.Command("MAE 0")
-          
+        
         self.cv.Command("MNT 0")
 
         self.cv.Command('MNC 0')
@@ -416,15 +521,22 @@ class SystemSetup:
             self.cv.Command("SD SO Z1 > 75")
 
         self.cv.Command("GLA SO..I  NFK5 NSK16 NLAF2 SF4")
-        result = self.cv.Command("GO")  # Perform optimization
 
-        # Regular expression to find the error function value in scientific notation
-        match = re.search(r'ERR\. F\.\s*=\s*([+-]?[0-9]*\.?[0-9]+(?:[Ee][+-]?[0-9]+)?)', result)
-
-        if match:
-            return float(match.group(1))
-        else:
+      def local_error_fct(self, delta=0.15):
+        """
+        Transverse aberration merit of the mirrored system computed by the local ray tracer
+        (DEL ray grid, fields and wavelengths of the system), without any CodeV round trip.
+        It is not error_fct: a mean square with no EFL target, no bounds and not CodeV's normalization
+        (see transverse_aberration_merit). Merit values, scans and optimizations use error_fct.
+        :return: The merit value, or None if the system cannot be traced locally.
+        """
+        curvatures, thicknesses, materials = self.get_surface_arrays()
+        try:
+            indices = self.glass_catalog.index_table(materials)
+        except KeyError:
             return None
+        return system_merit(curvatures, thicknesses, indices, self.fields,
+                            epd=self.epd, fno=self.fno, paraxial_image=self.paraxial_image, delta=delta)
 
 
 
@@ -434,15 +546,12 @@ class SystemSetup:
 
       def save_system(self, file_path, seq = True):
         # Save the lens system
-        if seq :
-           self.cv.Command(f"WRL {file_path}")
-        else :
-           self.cv.Command(f"SAV {file_path}")
+        self.cv.save(file_path, seq)
         print(f"Lens system saved at: {file_path}")
 
       def stop_session(self):
         # Stop the CODE V session
-        self.cv.StopCodeV()
+        self.cv.stop()
         print("CODE V session stopped.")
 
       def get_last_surface_number(self):
@@ -554,73 +663,99 @@ class SystemSetup:
         plt.savefig(dossier+'/'+ nom_fichier+'_Spot_Diameter.png')  # Enregistrez le graphique en tant qu'image
         plt.close()
 
-      def load_system_parameters(self, saved_params):
-        self.clear_system()  # Clear the current system
-        # Load the mode
-        if 'mode' in saved_params:
-            self.ref_mode = saved_params['mode']
-
-        # Identify which surfaces need to be kept or updated
-        surfaces_to_keep = set(saved_params['surfaces'].keys())
-
-        # Delete surfaces that are not in the saved parameters
+      def adopt_codev_surfaces(self):
+        """
+        Make the Python surfaces match the lens held by CODE V (after a run of a sequence file for instance)
+        without sending any command: surfaces beyond the CODE V count are dropped, missing ones are created
+        with fixed variable codes, and the values are read from the shared LIS.
+        :return: (LisSnapshot, numbers of the surfaces that were created).
+        """
+        snapshot = self.cv.snapshot()
+        codev_surface_count = snapshot.surface_count
         for surface_num in list(self.surfaces.keys()):
-            if surface_num not in surfaces_to_keep:
-                self.surfaces[surface_num].delete_surface()
+            if surface_num > codev_surface_count:
                 del self.surfaces[surface_num]
+        unknown = [surface_num for surface_num in range(1, codev_surface_count + 1) if surface_num not in self.surfaces]
+        for surface_num in unknown:
+            self.Surface(self, surface_num, 0, 0, create=False)
+        self.update_all_surfaces_from_codev()
+        self.surfaces = self.get_ordered_surfaces()
+        return snapshot, unknown
 
-        # Go in radius mode
-        self.switch_ref_mode('radius')
-
-        # Load parameters for each surface in the saved parameters
-        for surface_num, params in saved_params['surfaces'].items():
-            # Create a new surface if it does not exist
-            if surface_num not in self.surfaces:
-                self.surfaces[surface_num] = self.Surface(self, surface_num, params['radius'], params['thickness'], params.get('material'))
-
-            # Retrieve the surface
-            surface = self.surfaces[surface_num]
-
-            # Update surface properties
-            try:
-                if self.ref_mode == 'radius':
-                    surface.set_radius(params['radius'])
-                elif self.ref_mode == 'curvature':
-                    surface.set_curvature(params['curvature'])
-                surface.set_thickness(params['thickness'])
-
-                if params.get('material') is not None:
-                    surface.set_material(params['material'])
-
-                if params['radius_variable']:
-                    surface.make_radius_variable()
-                else:
-                    surface.make_radius_fixed()
+      @profiled_phase('restore')
+      def load_system_parameters(self, saved_params):
+        """
+        Restore a state saved by save_system_parameters, sending only the commands for what differs
+        from the current system: trailing surfaces are deleted or inserted to match the surface count,
+        then each surface gets the radius, thickness, material and variable codes it lacks.
+        The system is left in radius mode.
+        :param saved_params: Dictionary returned by save_system_parameters.
+        """
+        # Bring the Python surfaces up to date with CODE V (one shared LIS, no command sent)
+        snapshot, unknown = self.adopt_codev_surfaces()
+        codev_surface_count = snapshot.surface_count
+        # Surfaces unknown to Python have unknown variable codes and surfaces missing
+        # from the parsed rows have unknown values: both are always set
+        synced = set(snapshot.surfaces['surface'].tolist())
+
+        saved_mode = saved_params.get('mode')
+        target_surfaces = saved_params['surfaces']
+        target_count = len(target_surfaces)
+
+        with self.batch():
+            if snapshot.is_curvature_mode or self.ref_mode != 'radius':
+                self.switch_ref_mode('radius')
+
+            # Delete the trailing surfaces that are not in the saved parameters
+            for surface_num in range(codev_surface_count, target_count, -1):
+                self.surfaces[surface_num].delete_surface()
+                del self.surfaces[surface_num]
 
-                if params['thickness_variable']:
-                    surface.make_thickness_variable()
+            for surface_num in sorted(target_surfaces):
+                params = target_surfaces[surface_num]
+                # The curvature is the reference value of a state saved in curvature mode
+                if saved_mode == 'curvature':
+                    radius = 1 / params['curvature'] if params['curvature'] != 0 else 0
                 else:
-                    surface.make_thickness_fixed()
-
-            except Exception as e:
-                print(f"Error updating surface {surface_num}: {e}")
-
-        # Compare the number of surfaces in CODE V and in Python
-        codev_surface_count = self.get_surface_count_from_codev()
-        python_surface_count = len(self.surfaces)
-
-        if codev_surface_count > python_surface_count:
-            # Delete the remaining surfaces in CODE V
-            for surface_num in range(python_surface_count , codev_surface_count + 1):
-                self.cv.Command(f"DEL S{surface_num}")
-
+                    radius = params['radius']
+                material = params.get('material')
+
+                try:
+                    surface = self.surfaces.get(surface_num)
+                    if surface is not None and material is None and surface.material is not None:
+                        # A glass cannot be removed from a surface: replace the surface by an air one
+                        surface.delete_surface()
+                        del self.surfaces[surface_num]
+                        surface = None
+
+                    if surface is None:
+                        surface = self.Surface(self, surface_num, radius, params['thickness'], material)
+                    else:
+                        forced = surface_num not in synced
+                        if forced or not math.isclose(surface.radius, radius, rel_tol=1e-12, abs_tol=1e-12):
+                            surface.set_radius(radius)
+                        surface.curvature = 1 / radius if radius != 0 else 0
+                        if forced or not math.isclose(surface.thickness, params['thickness'], rel_tol=1e-12, abs_tol=1e-12):
+                            surface.set_thickness(params['thickness'])
+                        if material is not None and str(material) != str(surface.material):
+                            surface.set_material(material)
+
+                    if params['radius_variable'] != surface.radius_variable or surface_num in unknown:
+                        if params['radius_variable']:
+                            surface.make_radius_variable()
+                        else:
+                            surface.make_radius_fixed()
+
+                    if params['thickness_variable'] != surface.thickness_variable or surface_num in unknown:
+                        if params['thickness_variable']:
+                            surface.make_thickness_variable()
+                        else:
+                            surface.make_thickness_fixed()
+
+                except Exception as e:
+                    print(f"Error updating surface {surface_num}: {e}")
 
-        # Compare and update thicknesses in CODE V
-        codev_thicknesses = self.get_surface_thicknesses_from_codev()
-        for surface_num, surface in self.surfaces.items():
-            if surface_num in codev_thicknesses and surface.thickness != codev_thicknesses[surface_num]:
-                # Update thickness in CODE V to match Python
-                surface.set_thickness(surface.thickness)
+        self.surfaces = self.get_ordered_surfaces()
 
 
       def print_saved_systems(self):
@@ -656,6 +791,7 @@ class SystemSetup:
 
             print("-" * 30)  # Separator for better readability
 
+      @profiled_phase('spot')
       def get_spot_diagram_and_field_angles(self, affichage = False, dossier = None,nom_fichier = None):
 
               def extract_text(texte,mot_cle,bool):
@@ -805,6 +941,7 @@ class SystemSetup:
                 k_rms,k_spot=k_rms2,k_spot2
               
       
+      @profiled_phase('mtf')
       def get_mtf(self,affichage = False, dossier = None,nom_fichier = None):
         self.cv.Command("MTF; CAN;")
         self.cv.Command("MTF")
@@ -1052,12 +1189,7 @@ class SystemSetup:
         #print starting system state
         print(self.print_current_system())
         # Print the LIS until "SPECIFICATION DATA" is found
-        result = self.cv.Command("LIS")
-        lines = result.split('\n')
-        for line in lines:
-            if "SPECIFICATION DATA" in line:
-                break
-            print(line)
+        print(self.cv.snapshot().lens_data())
 
         # Get properties of the reference surface
         ref_surface = self.get_surface(reference_surface_number)
@@ -1096,16 +1228,12 @@ class SystemSetup:
         print(self.print_current_system())
 
         # Print the LIS until "SPECIFICATION DATA" is found
-        result = self.cv.Command("LIS")
-        lines = result.split('\n')
-        for line in lines:
-            if "SPECIFICATION DATA" in line:
-                break
-            print(line)
+        print(self.cv.snapshot().lens_data())
 
         print(f"Added null surfaces {reference_surface_number + 1} and {reference_surface_number + 2}")
 
 
+      @profiled_phase('sp_split')
       def modify_curvatures_for_saddle_point(self, surface_numbers, epsilon, efl, debug=False):
           """
           Modify the curvatures of specified surfaces to position the system on either side of the saddle point.
@@ -1152,6 +1280,7 @@ class SystemSetup:
           return system1_params, system2_params
 
 
+      @profiled_phase('thickness_steps')
       def increase_thickness_and_optimize(self, lens_thickness_steps, air_distance_steps, lens_surface_number, air_surface_number, efl, file_path):
           """
           Gradually increase the thickness of the lens and the air distance between lenses, followed by optimization.
@@ -1166,14 +1295,14 @@ class SystemSetup:
 
           # Loop for lens thickness adjustments
           for lens_thickness in lens_thickness_steps:
-              self.cv.Command(f"THI S{lens_surface_number} {lens_thickness}")
+              self.get_surface(lens_surface_number).set_thickness(lens_thickness)
               self.optimize_system(efl, constrained=False)
               self.optimize_system(efl, constrained=False)
               self.update_all_surfaces_from_codev()
 
           # Loop for air distance adjustments
           for air_thickness in air_distance_steps:
-              self.cv.Command(f"THI S{air_surface_number} {air_thickness}")
+              self.get_surface(air_surface_number).set_thickness(air_thickness)
               self.optimize_system(efl, constrained=False)
               self.optimize_system(efl, constrained=False)
               self.update_all_surfaces_from_codev()
@@ -1181,6 +1310,7 @@ class SystemSetup:
           # Save the final system
           self.save_system(file_path)
 
+      @profiled_phase('sp_create')
       def sp_create_and_increase_thickness(self,sp,reference_surface_number,lens_thickness,file_path, efl):
 
           self.switch_ref_mode('curvature')
@@ -1191,7 +1321,7 @@ class SystemSetup:
           # save system to restore it later
           buffer = self.save_system_parameters()
 
-          self.cv.Command(f"THI S{reference_surface_number+1} {lens_thickness}")
+          self.get_surface(reference_surface_number+1).set_thickness(lens_thickness)
           self.save_system(file_path)
 
           # restore system
@@ -1206,32 +1336,77 @@ class SystemSetup:
 
 
 
-      def perform_sp_scan(self, reference_surface_number, efl, delta_curvature=0.00025, num_points=400, threshold_multiplier=3, debug=False):
-        # Nested function to evaluate the derivative at a given curvature
-        def derivative_at_curvature(curvature, curvatures, derivatives):
-            index = np.searchsorted(curvatures, curvature) - 1
-            return derivatives[index]
+      def scan_merit_values(self, reference_surface_number, curvatures, efl):
+        """
+        Error function of the system for each curvature of the surface following the reference surface.
+        :return: Array of the merit values, in the order of curvatures.
+        """
+        mf_values = np.zeros(len(curvatures))
+        for i, curvature in enumerate(curvatures):
+            self.get_surface(reference_surface_number + 1).set_curvature(curvature)
+            mf = self.error_fct(efl, constrained=False)
+            mf_values[i] = mf
+        return mf_values
 
-        # Nested function for the bisection method
-        def bisection_method(f, a, b, tol=1e-5, max_iter=100):
-            for _ in range(max_iter):
-                mid = (a + b) / 2
-                if f(mid) * f(a) < 0:
-                    b = mid
-                else:
-                    a = mid
-                if abs(b - a) < tol:
-                    break
-            return (a + b) / 2
+      def scan_shard(self, saved_params, reference_surface_number, curvatures, efl):
+        """
+        scan_merit_values as a SessionPool job: the session first restores the scanned state
+        and its reference mode.
+        """
+        self.load_system_parameters(saved_params)
+        if saved_params['mode'] == 'curvature':
+            self.switch_ref_mode('curvature')
+        return self.scan_merit_values(reference_surface_number, curvatures, efl)
 
-        # Nested function to check if the zero at the given index is smooth
-        def is_smooth_zero(derivatives, index, window_size=5):
-            start = max(index - window_size, 0)
-            end = min(index + window_size, len(derivatives))
-            window = derivatives[start:end]
-            return np.std(window) < threshold  # using the same threshold as before
+      def sharded_merit_values(self, reference_surface_number, curvatures, efl, pool):
+        """
+        scan_merit_values split in contiguous shards, one per session of the pool, all started from the
+        current state. The lens is left with the last curvature, as after the serial sweep.
+        """
+        saved_params = self.save_system_parameters()
+        shards = [shard for shard in np.array_split(curvatures, pool.workers) if len(shard)]
+        futures = [pool.submit(SystemSetup.scan_shard, saved_params, reference_surface_number, shard, efl) for shard in shards]
+        mf_values = np.concatenate([future.result() for future in futures])
+        self.get_surface(reference_surface_number + 1).set_curvature(curvatures[-1])
+        return mf_values
 
+      def merit_derivative(self, reference_surface_number, curvature, efl, step):
+        """
+        Central difference of the error function at a curvature of the surface following the reference surface.
+        """
+        low, high = self.scan_merit_values(reference_surface_number, [curvature - step, curvature + step], efl)
+        return (high - low) / (2 * step)
+
+      def refine_saddle_points(self, reference_surface_number, brackets, efl, step, tol):
+        """
+        Zero of the merit derivative in each (a, b) curvature interval, by Brent's method on fresh central differences.
+        :return: The zeros, None where the derivative does not change sign over the interval (see refine_zero).
+        """
+        return [refine_zero(lambda curvature: self.merit_derivative(reference_surface_number, curvature, efl, step), a, b, tol)
+                for a, b in brackets]
 
+      def refine_shard(self, saved_params, reference_surface_number, brackets, efl, step, tol):
+        """
+        refine_saddle_points as a SessionPool job, from the scanned state (see scan_shard).
+        """
+        self.load_system_parameters(saved_params)
+        if saved_params['mode'] == 'curvature':
+            self.switch_ref_mode('curvature')
+        return self.refine_saddle_points(reference_surface_number, brackets, efl, step, tol)
+
+      @profiled_phase('sp_scan')
+      def perform_sp_scan(self, reference_surface_number, efl, delta_curvature=0.00025, num_points=400, threshold_multiplier=3, debug=False, pool=None,
+                          coarse_step=None, refine=False, derivative_step=0.00025, zero_tolerance=1e-7):
+        """
+        Scan the curvature of the null surface following the reference surface and return the saddle points,
+        the curvatures where the derivative of the merit function crosses zero smoothly.
+        :param pool: SessionPool over which the sweep is sharded (defaults to self.session_pool; None: serial sweep).
+        :param coarse_step: If set, adaptive scan: a coarse sweep of one point every coarse_step, refined only where
+                            the merit curve has structure (see adaptive_merit_values). None: every point is computed.
+        :param refine: Locate each saddle point by Brent's method on fresh merit derivatives (central differences
+                       of step derivative_step, to zero_tolerance) instead of to the scan grid spacing.
+                       With a pool, the saddle points are refined in parallel.
+        """
         # Define initial curvature based on the reference surface
         initial_curvature = 1 / self.get_surface(reference_surface_number).radius
         # Print initial curvature
@@ -1241,41 +1416,38 @@ class SystemSetup:
         curvatures = np.linspace(initial_curvature - delta_curvature * num_points / 2, 
                                  initial_curvature + delta_curvature * num_points / 2, 
                                  num_points)
-        mf_values = np.zeros(num_points)
-
-        # Compute the derivative for each curvature using the central finite difference method
-        for i, curvature in enumerate(curvatures):
-            self.get_surface(reference_surface_number + 1).set_curvature(curvature)
-            mf = self.error_fct(efl, constrained=False)
-            mf_values[i] = mf
-
-        # Compute the derivative using the central finite difference method
-        derivatives = np.zeros(num_points)
-        for i in range(1, num_points - 1):
-            derivatives[i] = (mf_values[i + 1] - mf_values[i - 1]) / (2 * delta_curvature)
-
-        # Compute the standard deviation of the derivative values
-        std_deviation = np.std(derivatives)
+        pool = pool if pool is not None else self.session_pool
+
+        def merit_values(scanned_curvatures):
+            if pool is not None:
+                return self.sharded_merit_values(reference_surface_number, scanned_curvatures, efl, pool)
+            return self.scan_merit_values(reference_surface_number, scanned_curvatures, efl)
+
+        def refine_brackets(brackets):
+            if pool is None:
+                return self.refine_saddle_points(reference_surface_number, brackets, efl, derivative_step, zero_tolerance)
+            saved_params = self.save_system_parameters()
+            futures = [pool.submit(SystemSetup.refine_shard, saved_params, reference_surface_number, [bracket], efl, derivative_step, zero_tolerance)
+                       for bracket in brackets]
+            return [future.result()[0] for future in futures]
+
+        if coarse_step:
+            mf_values, evaluated = adaptive_merit_values(lambda indices: merit_values(curvatures[indices]), num_points, coarse_step)
+            print(f"Adaptive SP scan: {np.count_nonzero(evaluated)} of {num_points} points computed")
+        else:
+            mf_values, evaluated = merit_values(curvatures), None
 
-        # Set the threshold as a multiple of the standard deviation
-        threshold = threshold_multiplier * std_deviation
+        zero_points, derivatives, threshold = find_saddle_points(curvatures, mf_values, delta_curvature, threshold_multiplier,
+                                                                 refine=refine_brackets if refine else None, evaluated=evaluated)
+        if coarse_step or refine:
+            # Leave the lens with the last curvature, as after the full sweep
+            self.get_surface(reference_surface_number + 1).set_curvature(curvatures[-1])
 
         # Filter the data to focus on the region near zero
         mask = np.abs(derivatives) < threshold
         filtered_curvatures = curvatures[mask]
         filtered_derivatives = derivatives[mask]
 
-        # Finding all intervals where the derivative changes sign and is smooth
-        zero_points = []
-        for i in range(1, len(curvatures) - 1):
-            if derivatives[i] * derivatives[i - 1] < 0:
-                a, b = curvatures[i - 1], curvatures[i]
-                zero_point = bisection_method(lambda x: derivative_at_curvature(x, curvatures, derivatives), a, b)
-
-                # Check if the zero point is smooth
-                if is_smooth_zero(derivatives, i):
-                    zero_points.append(zero_point)
-
         # If there is no zero point, return the starting point (same curvature)
         if not zero_points:
             zero_points.append(initial_curvature)
@@ -1310,12 +1482,40 @@ class SystemSetup:
 
   
 
+      def optimize_branch(self, saved_params, system_params, reference_surface, efl, file_path):
+        """
+        One branch (OptA or OptB) of a saddle point: restore its starting system, increase the thicknesses
+        with optimizations, and save it.
+        :return: (saved parameters, merit function, EFL) of the optimized system.
+        """
+        self.load_system_parameters(saved_params)
+        self.increase_thickness_and_optimize(system_params['lens_thickness_steps'], system_params['air_distance_steps'], reference_surface+1
+                                            , reference_surface, efl, file_path)
+        return self.save_system_parameters(), self.error_fct(efl, constrained=False), self.get_efl()
+
+      def optimize_branches(self, branches, system_params, reference_surface, efl):
+        """
+        Run optimize_branch for each (saved parameters, file path); the branches are independent jobs
+        on self.session_pool when it is set, else they run one after the other on this session.
+        :return: The results of optimize_branch, in the order of branches.
+        """
+        if self.session_pool is None:
+            return [self.optimize_branch(saved_params, system_params, reference_surface, efl, file_path)
+                    for saved_params, file_path in branches]
+        futures = [self.session_pool.submit(SystemSetup.optimize_branch, saved_params, system_params, reference_surface, efl, file_path)
+                   for saved_params, file_path in branches]
+        return [future.result() for future in futures]
+
+      @profiled_phase('saddle_points')
       def find_and_optimize_from_saddle_points(self, current_node, system_tree, efl, base_file_path, depth, reference_surface):
         print_subheader(f"Optimizing from Saddle Points - Depth {depth}, Ref. Surface {reference_surface}")
 
         # Perform Saddle Point Scan
         self.switch_ref_mode('curvature')
-        sps = self.perform_sp_scan(reference_surface, efl, debug=False)
+        scan_points = current_node.system_params.get('sp_scan_points', 400)
+        sps = self.perform_sp_scan(reference_surface, efl, delta_curvature=0.00025 * 400 / scan_points, num_points=scan_points, debug=False,
+                                   coarse_step=current_node.system_params.get('sp_scan_coarse_step'),
+                                   refine=current_node.system_params.get('sp_scan_refine', False))
         print(f"  Saddle Points Found: {len(sps)}")
       
         for i, sp in enumerate(sps):
@@ -1324,8 +1524,9 @@ class SystemSetup:
             original_state = self.save_system_parameters()
 
             # Saddle Point File Naming
-            # Revised Saddle Point File Naming
-            sp_filename = f"{base_file_path}/D{depth}_Node{current_node.id}_SP{i+1}.seq"
+            # Revised Saddle Point File Naming: the reference surface keeps the files of the
+            # (node, surface) expansions of a node apart when they run concurrently
+            sp_filename = f"{base_file_path}/D{depth}_Node{current_node.id}_S{reference_surface}_SP{i+1}.seq"
             sp_merit = self.sp_create_and_increase_thickness(sp, reference_surface, current_node.system_params['lens_thickness'], sp_filename, efl)
             self.update_all_surfaces_from_codev(debug=False)
 
@@ -1352,14 +1553,12 @@ class SystemSetup:
                 # Modify curvatures for two systems around the saddle point
                 system1_params, system2_params = self.modify_curvatures_for_saddle_point(surface_numbers, current_node.system_params['epsilon'], efl, debug=False)
 
-                # Optimize and Save System 1
-                self.load_system_parameters(system1_params)
-                system1_filename = f"{base_file_path}/D{depth+1}_Node{sp_node.id}_SP{i+1}_OptA.seq"
-                self.increase_thickness_and_optimize(current_node.system_params['lens_thickness_steps'], current_node.system_params['air_distance_steps'], reference_surface+1
-                                                    , reference_surface, efl, system1_filename)
-                system1_state = self.save_system_parameters()
-                system1_merit_function = self.error_fct(efl, constrained=False)
-                system1_efl = self.get_efl_from_codev()
+                # Optimize and Save System 1 and System 2 (on two sessions when a pool is set)
+                system1_filename = f"{base_file_path}/D{depth+1}_Node{sp_node.id}_S{reference_surface}_SP{i+1}_OptA.seq"
+                system2_filename = f"{base_file_path}/D{depth+1}_Node{sp_node.id}_S{reference_surface}_SP{i+1}_OptB.seq"
+                branches = [(system1_params, system1_filename), (system2_params, system2_filename)]
+                (system1_state, system1_merit_function, system1_efl), (system2_state, system2_merit_function, system2_efl) = \
+                    self.optimize_branches(branches, current_node.system_params, reference_surface, efl)
 
                 # The efl must be within 10% of the target efl
                 if abs(efl - system1_efl) / efl > 0.1:
@@ -1370,15 +1569,6 @@ class SystemSetup:
                   sp_node.add_child(system1_node)
                   system_tree.add_node(system1_node)
 
-                # Restore original state and Optimize and Save System 2
-                self.load_system_parameters(system2_params)
-                system2_filename = f"{base_file_path}/D{depth+1}_Node{sp_node.id}_SP{i+1}_OptB.seq"
-                self.increase_thickness_and_optimize(current_node.system_params['lens_thickness_steps'], current_node.system_params['air_distance_steps'], reference_surface+1
-                                                    , reference_surface, efl, system2_filename)
-                system2_state = self.save_system_parameters()
-                system2_merit_function = self.error_fct(efl, constrained=False)
-                system2_efl = self.get_efl_from_codev()
-
                 # The efl must be within 10% of the target efl
                 if abs(efl - system2_efl) / efl > 0.1:
                     print(f"  System 2 EFL ({system2_efl}) is not within 10% of the target EFL ({efl}), skipping.")
@@ -1395,8 +1585,76 @@ class SystemSetup:
 
         
       
-      def evolve_optimized_systems(self, system_tree, starting_depth, target_depth, base_file_path, efl, debug = False):
+      @profiled_phase('final_optimization')
+      def final_optimize(self, seq_file_path, efl, optimized_file_path, state=None):
+        """
+        Final optimization of a leaf system: load its SEQ file (or else its saved state, if any), make all
+        radii, thicknesses (but the last one) and glasses variable, optimize, and save the result.
+        :param state: Parameters from save_system_parameters, loaded when there is no SEQ file.
+        :return: Dictionary with the optimized 'state', 'merit_function', 'efl', 'seq_file_path' and the 'seconds' spent.
+        """
+        start = time.perf_counter()
+        if seq_file_path:
+            self.cv.load(seq_file_path)
+            self.adopt_codev_surfaces()
+        elif state is not None:
+            self.load_system_parameters(state)
+
+        with self.batch():
+          # Make all radii, thicknesses, and applicable materials variable for optimization
+          self.make_all_thicknesses_variable(last_one = False)
+          self.make_all_radii_variable()
+          self.make_all_materials_variable()
+
+          # Perform optimization
+          self.cv.Command('AUT')
+          self.cv.Command('IMP 1E-10')
+          self.cv.Command("EFL Z1 = " + str(efl)) # Condition on the EFL
+          self.cv.Command('MNT 0.2')
+          self.cv.Command("GLA SO..I  NFK5 NSK16 NLAF2 SF4")
+          self.cv.Command("GO")
+
+        # Update and save the optimized state
+        self.update_all_surfaces_from_codev()
+        optimized_state = self.save_system_parameters()
+        merit_function = self.error_fct(efl, constrained=False)
+        optimized_efl = self.get_efl_from_codev()
+        self.save_system(optimized_file_path)
+        return {
+            'state': optimized_state,
+            'merit_function': merit_function,
+            'efl': optimized_efl,
+            'seq_file_path': optimized_file_path,
+            'seconds': time.perf_counter() - start,
+        }
+
+      def expand_node(self, node, system_tree, surface, efl, base_file_path, depth):
+        """
+        Restore the state of an optimized node, add null surfaces after the reference surface
+        and add the saddle point nodes found there (with their optimized systems) to the tree.
+        """
+        self.load_system_parameters(node.optical_system_state)
+        self.add_null_surfaces(surface)
+        self.find_and_optimize_from_saddle_points(node, system_tree, efl, base_file_path, depth, surface)
+
+      def expand_detached_node(self, node, surface, efl, base_file_path, depth):
+        """
+        expand_node as a SessionPool job, on a detached copy of the node (see SystemNode.detached).
+        :return: The saddle point nodes found, to be grafted on the coordinator tree with SystemTree.graft.
+        """
+        self.expand_node(node, SystemTree(node), surface, efl, base_file_path, depth)
+        return node.children
+
+      @profiled_phase('evolve')
+      def evolve_optimized_systems(self, system_tree, starting_depth, target_depth, base_file_path, efl, debug = False, pool = None):
+        """
+        Expand the optimized nodes depth after depth, from every viable reference surface.
+        :param pool: Optional SessionPool. The (node, surface) expansions of a depth are then run
+                     as independent jobs on its sessions, and grafted on the tree in the serial order.
+        """
         print_evolution_header(starting_depth, target_depth)
+        if pool is not None:
+            return self.evolve_optimized_systems_in_pool(system_tree, starting_depth, target_depth, base_file_path, efl, pool)
 
         current_depth = starting_depth
 
@@ -1460,14 +1718,41 @@ class SystemSetup:
 
         print_header("System Evolution Process Completed")
 
+      def evolve_optimized_systems_in_pool(self, system_tree, starting_depth, target_depth, base_file_path, efl, pool):
+        for current_depth in range(starting_depth, target_depth + 1):
+            print_subheader(f"Processing Depth {current_depth}")
+            optimized_nodes = system_tree.find_optimized_nodes_at_depth(current_depth)
+            print(f"Found {len(optimized_nodes)} optimized nodes at depth {current_depth}")
+
+            jobs = []
+            for node in optimized_nodes:
+                last_surface_number = max(node.optical_system_state['surfaces'], default=0)
+                for surface in self.identify_viable_surfaces(last_surface_number):
+                    future = pool.submit(SystemSetup.expand_detached_node, node.detached(), surface, efl, base_file_path, current_depth,
+                                         node_ids=NODE_ID_BLOCK)
+                    jobs.append((node, surface, future))
+            print(f"Submitted {len(jobs)} expansions to {pool.workers} sessions")
+
+            # Graft in submission order so that the tree is the one of the serial exploration
+            for node, surface, future in jobs:
+                children = future.result()
+                system_tree.graft(node, children)
+                print(f"  Node {node.id}, Surface {surface}: {len(children)} saddle point nodes")
+
+            print(f"Completed Depth {current_depth}")
+
+        print_header("System Evolution Process Completed")
+
 
-      def identify_viable_surfaces(self):
+      def identify_viable_surfaces(self, last_surface_number=None):
           """
           Identify the surfaces that are viable for adding null surfaces.
+          :param last_surface_number: Number of surfaces of the system; defaults to the current one.
           :return: A list of surface numbers that are viable for adding null surfaces.
           """
           viable_surfaces = []
-          last_surface_number = self.get_last_surface_number()
+          if last_surface_number is None:
+              last_surface_number = self.get_last_surface_number()
           print(f"Last surface number: {last_surface_number}")
 
           if last_surface_number is not None:
@@ -0,0 +1,497 @@
+# ==============================================================================
+# PROJECT INFORMATION
+# ==============================================================================
+# Project Title: ODAI
+# Version: v1.0.0
+# Description: Optical System Design Optimization: Saddle Point Application
+#
+# AUTHORS
+# ==============================================================================
+# Aurélien Argy, Florin Baumann, Jelil Belheine, Pierre-Gabriel Bibal-Sobeaux,
+# Benoit Brouillet
+# Institution: Télécom Physique Strasbourg, Université de Strasbourg,
+# Illkirch-Graffenstaden, France
+#
+# LICENSE
+# ==============================================================================
+# This project is licensed under the GPL 3.0 License.
+# For more details, see the LICENSE file in the project root.
+#
+# DATE
+# ==============================================================================
+# Date of Creation: 04/04/2024
+#
+# ==============================================================================
+# NOTES
+# ==============================================================================
+# The code is developed using CodeV version 2022.03 and is intended for use under
+# the guidelines of the GPL 3.0 License.
+# ==============================================================================
+
+
+# Micro-benchmarks of the output parsers and of the SP scan, run with: python benchmarks.py
+# The parsers are timed and checked against the legacy readers on synthetic outputs in the CodeV layout
+# (listings and merit curves of the local backend, generated SPO and MTF reports) and on the real CodeV
+# outputs of the recordings in captures/, written on a CodeV machine with: python benchmarks.py --record
+
+import contextlib
+import glob
+import io
+import os
+import re
+import sys
+import timeit
+from Backend_module import CodeVBackend, LocalBackend, RecordingBackend, command_verb, parse_efl, parse_error_function, read_recording
+import numpy as np
+from CodeVOutput_module import parse_lis, parse_mtf_report, parse_spot_report
+from SaddlePointScan_module import adaptive_merit_values, find_saddle_points
+from SystemSetup_module import SystemSetup
+
+
+############## Synthetic outputs ##############
+
+
+def synthetic_listing(num_lenses):
+    # LIS of a system of num_lenses singlets with three fields and three wavelengths
+    backend = LocalBackend()
+    backend.Command("WL 486.1327 587.5618 656.2725; FNO 5; DIM M")
+    backend.Command("INS F1 0 0; INS F2 0 5; INS F3 0 10")
+    for k in range(num_lenses):
+        backend.Command(f"INS S{2 * k + 1} {60 + k} 4 NBK7_SCHOTT; INS S{2 * k + 2} {-300 - k} 5")
+    return backend.list_system()
+
+
+def synthetic_spot_report(num_fields, wavelengths=(486.1, 587.6, 656.3), num_rays=400, seed=0):
+    # SPO output with LIS YES: per field a header, the spot statistics and the ray intercepts per wavelength
+    rng = np.random.default_rng(seed)
+    lines = []
+    for field in range(num_fields):
+        lines.append(f" Ray intercepts of field {field + 1}")
+        lines.append(f" Field {field + 1}, (  0.000, {field * 2.5:7.3f}) degrees")
+        lines.append(" Displacement of centroid          Minimum RMS spot diameter")
+        lines.append(f"   X:  0.0000E+00   Y: {rng.normal() * 1e-3: .4E}       {abs(rng.normal()) * 1e-2:.4E} MM")
+        lines.append(" Displacement of center of 100% Spot     Minimum 100% spot diameter")
+        lines.append(f"   X:  0.0000E+00   Y: {rng.normal() * 1e-3: .4E}       {abs(rng.normal()) * 3e-2:.4E} MM")
+        for wavelength in wavelengths:
+            lines.append(f" Wavelength  {wavelength:.1f}")
+            points = rng.normal(scale=0.01, size=(num_rays, 2))
+            for k in range(0, num_rays, 4):
+                lines.append("  " + "  ".join(f"{x: .6f} {y: .6f}" for x, y in points[k:k + 4]))
+    lines.append(" The spot diagram is computed with the chief ray as reference.")
+    return "\n".join(lines)
+
+
+def synthetic_mtf_report(num_fields, wavelengths=(656.2725, 587.5618, 486.1327), max_frequency=406, step=14, seed=0):
+    # MTF output: focal lengths and F-numbers per field, wavelength table, then one MTF table per field
+    rng = np.random.default_rng(seed)
+    lines = [" X and Y focal lengths for each field angle"]
+    lines += [f"   {99.7 - 0.01 * k:.4f}   {99.7 - 0.02 * k:.4f}" for k in range(num_fields)]
+    lines.append(" X and Y F-numbers for each field angle")
+    lines += [f"   {5.0 + 0.01 * k:.4f}   {5.0 + 0.02 * k:.4f}" for k in range(num_fields)]
+    lines.append(" Reference sphere radius for each field angle")
+    lines += [f"   {99.6 + 0.01 * k:.4f}" for k in range(num_fields)]
+    lines.append("   WAVELENGTH     WEIGHT   NO. OF RAYS")
+    lines += [f"   {wavelength:.4f} NM     1     {num_fields * 100}" for wavelength in wavelengths]
+    for field in range(num_fields):
+        lines.append(f" FIELD {field + 1} (ANG) = (  0.00, {field * 2.5:5.2f}) DEG, WEIGHT = 1.00")
+        lines.append("  L/MM  F .5000   DIFFRACTION LIMIT (R, T)   FOCUS POSITION (R, T)")
+        for frequency in range(0, max_frequency + 1, step):
+            limit = max(0.0, 0.999 - frequency / 500)
+            values = [0.5, limit, limit, limit * rng.uniform(0.5, 1), limit * rng.uniform(0.5, 1)]
+            lines.append(f"  {frequency:4d}  " + "  ".join(f"{value:.4f}".lstrip('0') for value in values))
+    return "\n".join(lines)
+
+
+############## Recorded outputs ##############
+
+
+CAPTURES_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'captures')
+
+
+def captured_outputs(recording):
+    """
+    LIS, SPO and MTF outputs of a RecordingBackend recording.
+    The statements of each command are followed like CodeV does: SPO, MTF and AUT open an option block,
+    GO or CAN closes it; a round trip ending an SPO or MTF block with GO answers its report,
+    a plain LIS outside any block answers the listing.
+    :param recording: Path of the recording, or list of (command, output) pairs.
+    :return: Dictionary 'LIS', 'SPO', 'MTF' -> list of output texts in the recorded order.
+    """
+    if isinstance(recording, str):
+        recording = read_recording(recording)
+    outputs = {'LIS': [], 'SPO': [], 'MTF': []}
+    option = None
+    for command, output in recording:
+        kind = None
+        for statement in re.split(r'[;\n]', command):
+            verb = command_verb(statement)
+            if not verb:
+                continue
+            if option is not None:
+                if verb == 'GO':
+                    kind = option if option in outputs else None
+                if verb in ('GO', 'CAN'):
+                    option = None
+            elif verb in ('AUT', 'SPO', 'MTF'):
+                option = verb
+            elif verb == 'LIS' and not statement.split()[1:]:
+                kind = 'LIS'
+        if kind is not None and output and output.strip():
+            outputs[kind].append(output)
+    return outputs
+
+
+def captured_merit_curves(recording, min_points=100):
+    """
+    Merit curves of the SP scan sweeps of a RecordingBackend recording: runs of AUT error functions,
+    each computed after a new curvature (CUY) of the same surface, at a constant curvature step.
+    :param recording: Path of the recording, or list of (command, output) pairs.
+    :param min_points: Shortest run kept.
+    :return: List of (curvatures, merit values).
+    """
+    if isinstance(recording, str):
+        recording = read_recording(recording)
+    curves = []
+    points = []  # (surface, curvature, merit) of the current run
+    curvature = None  # (surface, curvature) set since the last error function
+    option = None
+
+    def close_run():
+        if len(points) >= min_points:
+            curves.append((np.array([point[1] for point in points]), np.array([point[2] for point in points])))
+        points.clear()
+
+    for command, output in recording:
+        merit_run = False
+        for statement in re.split(r'[;\n]', command):
+            verb = command_verb(statement)
+            if not verb:
+                continue
+            if option is not None:
+                merit_run |= verb == 'GO' and option == 'AUT'
+                if verb in ('GO', 'CAN'):
+                    option = None
+            elif verb in ('AUT', 'SPO', 'MTF'):
+                option = verb
+            elif verb == 'CUY':
+                tokens = statement.split()
+                curvature = (tokens[1].upper(), float(tokens[2]))
+        if not merit_run:
+            continue
+        merit = parse_error_function(output)
+        if curvature is None or merit is None:
+            close_run()
+            continue
+        surface, value = curvature
+        curvature = None
+        if points and (surface != points[-1][0] or (len(points) > 1 and not np.isclose(
+                value - points[-1][1], points[-1][1] - points[-2][1], rtol=1e-6, atol=0))):
+            close_run()
+        points.append((surface, value, merit))
+    close_run()
+    return curves
+
+
+def load_captures(directory=CAPTURES_DIRECTORY):
+    # Outputs of all the recordings of the directory, per kind, as (sample name, text),
+    # and their SP scan merit curves as (sample name, (curvatures, merit values))
+    captures = {'LIS': [], 'SPO': [], 'MTF': [], 'SP': []}
+    for path in sorted(glob.glob(os.path.join(directory, '*.jsonl.gz'))):
+        name = os.path.basename(path)[:-len('.jsonl.gz')]
+        for kind, texts in captured_outputs(path).items():
+            captures[kind] += [(f"{name}:{k + 1}", text) for k, text in enumerate(texts)]
+        captures['SP'] += [(f"{name}:{k + 1}", curve) for k, curve in enumerate(captured_merit_curves(path))]
+    return captures
+
+
+def record_captures(directory=CAPTURES_DIRECTORY, backend_factory=CodeVBackend):
+    """
+    Record the LIS, SPO and MTF outputs and the SP scan sweeps (see scan_lens_curves) of the SCAN_LENSES,
+    one recording per lens.
+    :param backend_factory: Callable returning the driver to record, CodeV by default.
+    :return: Paths of the recordings.
+    """
+    paths = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for k, lens in enumerate(SCAN_LENSES):
+            path = os.path.join(directory, f"lens{k + 1}.jsonl.gz")
+            backend = RecordingBackend(backend_factory(), path)
+            system = setup_scan_lens(SystemSetup(backend), lens)
+            system.cv.list_system()
+            system.get_spot_diagram_and_field_angles()
+            system.get_mtf()
+            scan_lens_curves(system, lens)
+            system.stop_session()
+            paths.append(path)
+    return paths
+
+
+############## LIS ##############
+
+
+def regex_lis_readers(text):
+    # The per-reader regexes used before parse_lis: mode, surfaces, count, thicknesses and EFL
+    is_curvature_mode = "CUY" in text.split('\n')[0]
+    pattern_radius = r"\s+(STO|\d+):\s+([-\d\.]+)\s+([-\d\.]+)(?:\s+([\w_]+))?"
+    pattern_curvature = r"\s+(STO|\d+):\s+([-\d\.Ee\+\-]+)\s+([-\d\.]+)(?:\s+([\w_]+))?"
+    surfaces = [match.groups() for match in re.finditer(pattern_curvature if is_curvature_mode else pattern_radius, text, re.MULTILINE)]
+    count = len(re.findall(r"\s+(STO|\d+):", text, re.MULTILINE))
+    thicknesses = {match.group(1): float(match.group(2))
+                   for match in re.finditer(r"\s+(STO|\d+):\s+[-\d\.Ee\+\-]+\s+([-\d\.]+)", text, re.MULTILINE)}
+    return surfaces, count, thicknesses, parse_efl(text)
+
+
+def check_lis(text):
+    # parse_lis reads the same surfaces and EFL as the regex readers (STO is numbered by its position in CodeV)
+    surfaces, system_data, _ = parse_lis(text)
+    regex_surfaces, _, _, efl = regex_lis_readers(text)
+    parsed = {int(row['surface']): (float(row['value']), float(row['thickness'])) for row in surfaces}
+    for label, value, thickness, _ in regex_surfaces:
+        if label != 'STO':
+            assert parsed[int(label)] == (float(value), float(thickness))
+    assert system_data.get('EFL') == efl
+
+
+def benchmark_lis(sizes=(2, 10, 50), number=200, captures=()):
+    """
+    :param captures: (name, text) of recorded CodeV listings, timed and checked after the synthetic ones.
+    """
+    print("LIS parsing (us per listing)")
+    print(f"{'sample':>16}{'lines':>8}{'regex':>12}{'parse_lis':>12}{'speed-up':>10}")
+    for name, text in [(f"{size} lenses", synthetic_listing(size)) for size in sizes] + list(captures):
+        check_lis(text)
+        regex_time = min(timeit.repeat(lambda: regex_lis_readers(text), number=number, repeat=5)) / number
+        single_time = min(timeit.repeat(lambda: parse_lis(text), number=number, repeat=5)) / number
+        print(f"{name:>16}{text.count(chr(10)) + 1:>8}{regex_time * 1e6:>12.1f}{single_time * 1e6:>12.1f}{regex_time / single_time:>10.2f}")
+
+
+############## SPO ##############
+
+
+def slicing_spot_parser(info):
+    # The extraction of get_spot_diagram_and_field_angles, which parse_spot_report is validated against
+    def extract_text(texte, mot_cle, bool):
+        pattern = re.compile(rf'{mot_cle}\s+\d+\.\d+') if bool else re.compile(rf'{mot_cle}')
+        match = pattern.search(texte)
+        if match:
+            return texte[:match.start()].strip(), texte[match.start():]
+        return 'Error: no match', texte
+
+    def extract_data(text):
+        data = {}
+        number_pattern = re.compile(r"-?\d+\.\d+")
+        for section in text.split("Wavelength")[1:]:
+            lines = section.splitlines()
+            wavelength = float(lines[0].strip())
+            data[wavelength] = []
+            for line in lines[1:]:
+                numbers = number_pattern.findall(line)
+                data[wavelength].extend([(float(numbers[i]), float(numbers[i + 1])) for i in range(0, len(numbers) - 1, 2)])
+        return data
+
+    def extract_values(text):
+        rms = re.search(r'Displacement of centroid\s+Minimum RMS spot diameter\s+X:\s+([-\d.E+]+)\s+Y:\s+([-\d.E+]+)\s+([\d.E+-]+)\s+MM', text)
+        spot = re.search(r'Displacement of center of 100% Spot\s+Minimum 100% spot diameter\s+X:\s+([-\d.E+]+)\s+Y:\s+([-\d.E+]+)\s+([\d.E+-]+)', text)
+        return rms.groups() if rms else None, spot.groups() if spot else None
+
+    field_angles = [(float(m[0]), float(m[1])) for m in re.findall(r"Field\s+\d+,\s+\(\s*([-\d.]+),\s*([-\d.]+)\)\s+degrees", info)]
+    text, data = [], []
+    for k in range(len(field_angles)):
+        values, info = extract_text(info, 'Wavelength', True)
+        data_degrees, info = extract_text(info, "The" if k == len(field_angles) - 1 else "Ray", False)
+        text.append(values)
+        data.append(data_degrees)
+    return field_angles, [extract_data(datas) for datas in data], [extract_values(values) for values in text]
+
+
+def check_spot_report(text):
+    # Both parsers read the same field angles, rays and RMS statistics
+    field_angles, rays, stats = slicing_spot_parser(text)
+    report = parse_spot_report(text)
+    assert report['field_angles'] == field_angles
+    assert all(np.array_equal(np.array(rays[k][wl]), report['rays'][k][wl]) for k in range(len(field_angles)) for wl in rays[k])
+    assert [tuple(map(float, rms)) for rms, _ in stats] == report['rms']
+
+
+def benchmark_spo(sizes=(3, 10, 40), number=5, captures=()):
+    """
+    :param captures: (name, text) of recorded CodeV SPO reports, timed and checked after the synthetic ones.
+    """
+    print("SPO parsing (ms per report)")
+    print(f"{'sample':>16}{'lines':>8}{'slicing':>12}{'streaming':>12}{'speed-up':>10}")
+    for name, text in [(f"{size} fields", synthetic_spot_report(size)) for size in sizes] + list(captures):
+        check_spot_report(text)
+        slicing_time = min(timeit.repeat(lambda: slicing_spot_parser(text), number=number, repeat=3)) / number
+        streaming_time = min(timeit.repeat(lambda: parse_spot_report(text), number=number, repeat=3)) / number
+        print(f"{name:>16}{text.count(chr(10)) + 1:>8}{slicing_time * 1e3:>12.2f}{streaming_time * 1e3:>12.2f}{slicing_time / streaming_time:>10.2f}")
+
+
+############## MTF ##############
+
+
+def regex_mtf_parser(text):
+    # The line loop of get_mtf, which parse_mtf_report is validated against: three regexes per line, tables ended by frequency 406
+    focal_lengths, f_numbers = {'X': [], 'Y': []}, {'X': [], 'Y': []}
+    mtf_data, datas, wavelengths, field_angles = [], [], {}, []
+    numeric_pattern = re.compile(r'(-?\d+\.\d+E[+-]\d+|-?\d+\.\d+)')
+    mtf_pattern = re.compile(r'^\s*(\d+)\s+(\.\d+)\s+(\.\d+)\s+(\.\d+)\s+(\.\d+)\s+(\.\d+)')
+    wavelength_pattern = re.compile(r'\s+(\d+\.\d+)\s+NM\s+(\d+)\s+(\d+)')
+    field_angle_pattern = re.compile(r'FIELD\s+(\d+)\s+\(ANG\)\s+=\s+\(\s*([\d.]+),\s*([\d.]+)\)\s+DEG,')
+    current_section = None
+    for line in text.split('\n'):
+        if 'X and Y focal lengths for each field angle' in line:
+            current_section = 'focal_lengths'
+            continue
+        elif 'X and Y F-numbers for each field angle' in line:
+            current_section = 'f_numbers'
+            continue
+        elif 'Reference sphere radius for each field angle' in line:
+            current_section = 'reference_sphere'
+            continue
+        elif 'DIFFRACTION LIMIT' in line:
+            current_section = 'mtf'
+            continue
+        if current_section in ('focal_lengths', 'f_numbers'):
+            numeric_matches = numeric_pattern.findall(line)
+            target = focal_lengths if current_section == 'focal_lengths' else f_numbers
+            target['X'].extend(numeric_matches[::2])
+            target['Y'].extend(numeric_matches[1::2])
+        elif current_section == 'mtf':
+            match = mtf_pattern.search(line)
+            if match:
+                mtf_data.append((int(match.group(1)), *map(float, match.groups()[1:])))
+                if int(match.group(1)) == 406:
+                    datas.append(mtf_data)
+                    mtf_data = []
+        wavelength_match = wavelength_pattern.search(line)
+        if wavelength_match and float(wavelength_match.group(1)) not in wavelengths:
+            wavelengths[float(wavelength_match.group(1))] = {'weight': int(wavelength_match.group(2)), 'no_of_rays': int(wavelength_match.group(3))}
+        field_angle_match = field_angle_pattern.search(line)
+        if field_angle_match:
+            field_angles.append(float(field_angle_match.group(3)))
+    # Rows re-sorted by frequency for plotting
+    datas = [sorted(field_datas, key=lambda x: x[0]) for field_datas in datas]
+    return focal_lengths, f_numbers, datas, wavelengths, field_angles
+
+
+def check_mtf_report(text):
+    # Both parsers read the same tables and field angles
+    _, _, datas, _, field_angles = regex_mtf_parser(text)
+    report = parse_mtf_report(text)
+    rows = [row[1:] for row in report['mtf'].tolist()]
+    assert rows == [row for field_datas in datas for row in field_datas]
+    assert report['field_angles'][:, 1].tolist() == field_angles
+
+
+def benchmark_mtf(sizes=(3, 20, 100), number=20, captures=()):
+    """
+    :param captures: (name, text) of recorded CodeV MTF reports, timed and checked after the synthetic ones.
+    """
+    print("MTF parsing (ms per report)")
+    print(f"{'sample':>16}{'lines':>8}{'regex':>12}{'sections':>12}{'speed-up':>10}")
+    for name, text in [(f"{size} fields", synthetic_mtf_report(size)) for size in sizes] + list(captures):
+        check_mtf_report(text)
+        regex_time = min(timeit.repeat(lambda: regex_mtf_parser(text), number=number, repeat=3)) / number
+        section_time = min(timeit.repeat(lambda: parse_mtf_report(text), number=number, repeat=3)) / number
+        print(f"{name:>16}{text.count(chr(10)) + 1:>8}{regex_time * 1e3:>12.2f}{section_time * 1e3:>12.2f}{regex_time / section_time:>10.2f}")
+
+    # Tables of another length than the 0..406 grid are still split per field
+    report = parse_mtf_report(synthetic_mtf_report(4, max_frequency=250, step=10))
+    assert np.array_equal(np.bincount(report['mtf']['field']), [26] * 4)
+
+
+############## SP scan ##############
+
+
+# Lenses as (radius, thickness, material) per surface: singlets and a doublet followed by a singlet
+SCAN_LENSES = [
+    [(59.33336, 4, 'NBK7_SCHOTT'), (-391.44174, 97.7, None)],
+    [(40, 4, 'SF2'), (-200, 60, None)],
+    [(120, 4, 'NBK7'), (-80, 90, None)],
+    [(30, 4, 'NLAF2'), (60, 40, None)],
+    [(60, 5, 'NBK7'), (-45, 2, 'SF2'), (-150, 5, None), (80, 4, 'NSK16'), (-300, 60, None)],
+]
+
+
+def setup_scan_lens(system, lens):
+    # Start the session of the system and enter a lens of SCAN_LENSES with three fields and three wavelengths
+    system.start_session()
+    system.create_new_system()
+    system.set_wavelengths([486.1327, 587.5618, 656.2725])
+    system.set_fd(5)
+    system.set_dimensions('m')
+    system.set_fields([(0, 0), (0, 7), (0, 10)])
+    for number, (radius, thickness, material) in enumerate(lens, start=1):
+        system.Surface(system, number, radius, thickness, material)
+    system.set_paraxial_image_distance()
+    system.update_all_surfaces_from_codev()
+    return system
+
+
+def scan_lens_curves(system, lens, delta_curvature=0.00025, num_points=400, efl=1):
+    # Full perform_sp_scan sweeps (null surfaces after each surface but the first) of a lens set up by setup_scan_lens
+    curves = []
+    state = system.save_system_parameters()
+    for surface in range(2, len(lens) + 1):
+        system.load_system_parameters(state)
+        system.add_null_surfaces(surface)
+        system.switch_ref_mode('curvature')
+        initial_curvature = 1 / system.get_surface(surface).radius
+        curvatures = np.linspace(initial_curvature - delta_curvature * num_points / 2,
+                                 initial_curvature + delta_curvature * num_points / 2, num_points)
+        curves.append((curvatures, system.scan_merit_values(surface, curvatures, efl)))
+    return curves
+
+
+def record_merit_curves(delta_curvature=0.00025, num_points=400, efl=1):
+    # Sweeps of the SCAN_LENSES on the local backend
+    curves = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for lens in SCAN_LENSES:
+            curves += scan_lens_curves(setup_scan_lens(SystemSetup(LocalBackend()), lens), lens, delta_curvature, num_points, efl)
+    return curves
+
+
+def benchmark_sp_scan(coarse_steps=(8, 16, 32), delta_curvature=0.00025, captures=()):
+    """
+    Error function calls of the adaptive scan against the full sweep, and the saddle points it finds.
+    On the local backend curves, noisy, the adaptive threshold (computed from the evaluated points only)
+    admits more zeros than the full sweep: none of the full sweep may be missed. On the recorded CodeV
+    curves the adaptive scan must find the same zeros.
+    :param captures: (name, (curvatures, merit values)) of recorded CodeV sweeps.
+    """
+    print("SP scan (error_fct calls per scan; batches: evaluation rounds of the adaptive scan; zeros found)")
+    print(f"{'curve':>10}{'zeros':>7}{'full':>6}" + "".join(f"{'step ' + str(step):>10}{'batches':>9}{'zeros':>7}" for step in coarse_steps))
+    curves = [(f"local {k + 1}", curve, False) for k, curve in enumerate(record_merit_curves(delta_curvature))]
+    curves += [(name, curve, True) for name, curve in captures]
+    totals = np.zeros(len(coarse_steps))
+    for name, (curvatures, mf_values), recorded in curves:
+        step_curvature = (curvatures[-1] - curvatures[0]) / (len(curvatures) - 1)
+        zero_points = find_saddle_points(curvatures, mf_values, step_curvature)[0]
+        row = f"{name:>10}{len(zero_points):>7}{len(curvatures):>6}"
+        for j, step in enumerate(coarse_steps):
+            batches = []
+            values, evaluated = adaptive_merit_values(lambda indices: batches.append(len(indices)) or mf_values[indices], len(curvatures), step)
+            adaptive_zero_points = find_saddle_points(curvatures, values, step_curvature, evaluated=evaluated)[0]
+            # No zero of the full sweep is missed; on CodeV curves no other zero is found
+            assert all(np.isclose(zero_point, adaptive_zero_points).any() for zero_point in zero_points)
+            if recorded:
+                assert len(adaptive_zero_points) == len(zero_points)
+            assert sum(batches) == np.count_nonzero(evaluated)
+            totals[j] += np.count_nonzero(evaluated)
+            row += f"{np.count_nonzero(evaluated):>10}{len(batches):>9}{len(adaptive_zero_points):>7}"
+        print(row)
+    print(f"{'all':>10}{'':>7}{sum(len(curve[0]) for _, curve, _ in curves):>6}" + "".join(f"{int(total):>10}{'':>16}" for total in totals))
+
+
+if __name__ == "__main__":
+    if '--record' in sys.argv[1:]:
+        for path in record_captures():
+            print(f"Recorded {path}")
+    captures = load_captures()
+    if not any(captures.values()):
+        print(f"No CodeV captures in {CAPTURES_DIRECTORY}, synthetic outputs only (record them with --record)\n")
+    benchmark_lis(captures=captures['LIS'])
+    benchmark_spo(captures=captures['SPO'])
+    benchmark_mtf(captures=captures['MTF'])
+    benchmark_sp_scan(captures=captures['SP'])
@@ -355,8 +355,7 @@ class OpticalSystemConfigInterface:
                 final_data=optical_system_manager.evolve_and_optimize()
                 print(final_data)
                 for node in final_data:
-                        load_command=f'run "{node["SEQ File Path"]}"; GO'
-                        optical_system_manager.optical_system.cv.Command(load_command)
+                        optical_system_manager.optical_system.cv.load(node["SEQ File Path"])
                         optical_system_manager.optical_system.update_all_surfaces_from_codev
                         #system.load_system_parameters(node['Optical System State'])
                         file_path=data["base_file_path"]+'/figures'
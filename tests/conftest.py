@@ -0,0 +1,8 @@
+import os
+import sys
+
+import matplotlib
+
+# The modules of main_classes import each other by their flat names
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'main_classes'))
+matplotlib.use('Agg')
@@ -0,0 +1,165 @@
+import numpy as np
+import pytest
+
+from Backend_module import LocalBackend
+from benchmarks import CAPTURES_DIRECTORY, SCAN_LENSES, check_lis, check_mtf_report, check_spot_report, load_captures, \
+    setup_scan_lens, synthetic_mtf_report, synthetic_spot_report
+from CodeVOutput_module import LisSnapshot, parse_lis, parse_mtf_report, parse_spot_report
+from SystemSetup_module import SystemSetup
+
+# Listings laid out as CodeV prints them: flat surfaces as INFINITY, variable codes as integers,
+# solves (PIM) in the code columns, catalog-suffixed and quoted private glass names
+RADIUS_LISTING = """\
+                RDY                 THI    RMD          GLA            CCY     THC     GLC
+> OBJ:       INFINITY          INFINITY                                  100     100
+  STO:       40.94000           8.74000               SK16_SCHOTT          0     100
+    2:       INFINITY          11.05000                                  100       0
+    3:      -55.65000           2.78000               'F4_PRIVATE'         0     100
+    4:       39.75000           7.63000                                    0     100
+    5:      107.56000           9.54000               N-BK7_SCHOTT         0     100
+    6:      -43.33000          79.68245                                    0     PIM
+  IMG:       INFINITY           0.00000                                  100     100
+
+ SPECIFICATION DATA
+ EPD      12.50000
+ DIM            MM
+ WL        656.27      587.56      486.13
+
+ INFINITE CONJUGATES
+ EFL         100.0024
+ BFL          79.6825
+ FFL         -85.6514
+ FNO           8.0002
+ PARAXIAL IMAGE
+  HT          12.2804
+  THI         79.6825
+ ENTRANCE PUPIL
+  DIA         12.5000
+  THI          0.0000
+"""
+
+CURVATURE_LISTING = """\
+                CUY                 THI    RMD          GLA            CCY     THC     GLC
+> OBJ:       0.000000          INFINITY                                  100     100
+  STO:   2.442599E-02           8.74000               SK16_SCHOTT          0     100
+    2:       0.000000          11.05000                                  100       0
+    3:  -1.796945E-02           2.78000    REFL                            0     100
+  IMG:       0.000000           0.00000                                  100     100
+
+ SPECIFICATION DATA
+ EPD      12.50000
+"""
+
+CAPTURES = load_captures()
+
+
+def captured(kind):
+    # Recorded CodeV outputs of a kind, or a skipped case when none were recorded
+    return CAPTURES[kind] or [pytest.param(None, None, marks=pytest.mark.skip(reason=f"no {kind} capture in {CAPTURES_DIRECTORY}"))]
+
+
+def test_parse_lis_surfaces():
+    surfaces, _, mode = parse_lis(RADIUS_LISTING)
+    assert mode == 'radius'
+    assert surfaces['surface'].tolist() == [1, 2, 3, 4, 5, 6]
+    assert surfaces['value'].tolist() == [40.94, 0.0, -55.65, 39.75, 107.56, -43.33]
+    assert surfaces['thickness'].tolist() == [8.74, 11.05, 2.78, 7.63, 9.54, 79.68245]
+
+
+def test_parse_lis_glasses():
+    surfaces, _, _ = parse_lis(RADIUS_LISTING)
+    # The PIM solve of the last thickness is not a glass
+    assert surfaces['glass'].tolist() == ['SK16_SCHOTT', '', 'F4_PRIVATE', '', 'N-BK7_SCHOTT', '']
+
+
+def test_parse_lis_first_order_data():
+    _, system_data, _ = parse_lis(RADIUS_LISTING)
+    assert system_data['EFL'] == 100.0024
+    assert system_data['FNO'] == 8.0002
+    assert system_data['PARAXIAL IMAGE THI'] == 79.6825
+    assert system_data['ENTRANCE PUPIL DIA'] == 12.5
+    # The specification data is not read as first-order data
+    assert 'EPD' not in system_data
+
+
+def test_parse_lis_curvature_mode():
+    surfaces, system_data, mode = parse_lis(CURVATURE_LISTING)
+    assert mode == 'curvature'
+    assert surfaces['value'].tolist() == [2.442599e-02, 0.0, -1.796945e-02]
+    assert surfaces['glass'].tolist() == ['SK16_SCHOTT', '', '']
+    assert system_data == {}
+
+
+def test_parse_lis_local_listing():
+    # The listing of the local backend reads back as the lens that was entered
+    lens = SCAN_LENSES[0]
+    system = setup_scan_lens(SystemSetup(LocalBackend()), lens)
+    surfaces, system_data, _ = parse_lis(system.cv.list_system())
+    assert surfaces['value'].tolist() == pytest.approx([radius for radius, _, _ in lens])
+    assert surfaces['glass'].tolist() == [material or '' for _, _, material in lens]
+    assert system_data['EFL'] > 0
+
+
+def test_lis_snapshot_properties():
+    snapshot = LisSnapshot(RADIUS_LISTING, version=3)
+    assert snapshot.surface_count == 6
+    assert snapshot.efl == 100.0024
+    assert snapshot.thicknesses[6] == 79.68245
+    assert snapshot.lens_data().rstrip().endswith("IMG:       INFINITY           0.00000                                  100     100")
+
+
+@pytest.mark.parametrize('name, text', captured('LIS'))
+def test_parse_lis_captures(name, text):
+    # parse_lis agrees with the regex readers it replaced on recorded listings
+    check_lis(text)
+
+
+def test_parse_spot_report():
+    text = synthetic_spot_report(3, num_rays=8)
+    report = parse_spot_report(text)
+    assert report['field_angles'] == [(0.0, 0.0), (0.0, 2.5), (0.0, 5.0)]
+    assert [sorted(rays) for rays in report['rays']] == [[486.1, 587.6, 656.3]] * 3
+    assert all(points.shape == (8, 2) for rays in report['rays'] for points in rays.values())
+    assert len(report['rms']) == len(report['spot']) == 3
+    check_spot_report(text)
+
+
+def test_parse_spot_report_pairs_mixed_lines():
+    # Ray lines holding other text than the intercepts are paired within each line
+    text = """\
+ Field 1, (  0.000,   0.000) degrees
+ Wavelength  587.6
+  0.001000  -0.002000   0.003000  -0.004000  *
+  0.005000   0.006000   0.007000
+ The spot diagram is computed with the chief ray as reference."""
+    points = parse_spot_report(text)['rays'][0][587.6]
+    assert points.tolist() == [[0.001, -0.002], [0.003, -0.004], [0.005, 0.006]]
+
+
+def test_parse_mtf_report():
+    text = synthetic_mtf_report(3)
+    report = parse_mtf_report(text)
+    assert np.bincount(report['mtf']['field']).tolist() == [30, 30, 30]
+    assert report['field_angles'][:, 1].tolist() == [0.0, 2.5, 5.0]
+    assert report['wavelengths']['wavelength'].tolist() == [656.2725, 587.5618, 486.1327]
+    assert report['focal_lengths'].shape == report['f_numbers'].shape == (3, 2)
+    check_mtf_report(text)
+
+
+def test_parse_mtf_report_splits_any_frequency_grid():
+    # Tables that do not end at 406 cycles/mm are still split per field
+    report = parse_mtf_report(synthetic_mtf_report(2, max_frequency=250, step=10))
+    assert np.bincount(report['mtf']['field']).tolist() == [26, 26]
+    assert report['mtf']['frequency'][[0, 25, 26]].tolist() == [0, 250, 0]
+
+
+@pytest.mark.parametrize('name, text', captured('SPO'))
+def test_parse_spot_report_captures(name, text):
+    # parse_spot_report agrees with the extraction of get_spot_diagram_and_field_angles on recorded reports
+    check_spot_report(text)
+
+
+@pytest.mark.parametrize('name, text', captured('MTF'))
+def test_parse_mtf_report_captures(name, text):
+    # parse_mtf_report agrees with the line loop of get_mtf on recorded reports
+    check_mtf_report(text)
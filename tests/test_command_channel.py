@@ -0,0 +1,82 @@
+import pytest
+
+from Backend_module import OpticsBackend
+from CommandChannel_module import CommandChannel, is_write_only
+
+
+class ListBackend(OpticsBackend):
+    # Backend keeping the submissions it receives
+    def __init__(self):
+        self.received = []
+
+    def Command(self, command):
+        self.received.append(command)
+        return f"output {len(self.received)}"
+
+
+@pytest.fixture
+def channel():
+    return CommandChannel(ListBackend())
+
+
+@pytest.mark.parametrize('command', ["RDY S2 50", "THI S3 4.5; GLA S2 NBK7_SCHOTT", "WL 486.1 587.6 656.3",
+                                     "INS S2..3", "AUT; EFL Z1 = 15", "CCY S2 0", "gl1 S2 NBK7"])
+def test_write_only_commands(command):
+    assert is_write_only(command)
+
+
+@pytest.mark.parametrize('command', ["LIS", "GO", "EVA (EFL)", "RDY S2 50; LIS", "WRL lens.seq", 'run "lens.seq"; GO'])
+def test_queries(command):
+    assert not is_write_only(command)
+
+
+def test_commands_are_sent_at_once_outside_a_batch(channel):
+    assert channel.Command("RDY S2 50") == "output 1"
+    channel.Command("THI S2 5")
+    assert channel.backend.received == ["RDY S2 50", "THI S2 5"]
+    assert channel.submissions == 2
+
+
+def test_batch_is_flushed_at_its_end(channel):
+    with channel.batch():
+        assert channel.Command("RDY S2 50;") == ""
+        channel.Command("THI S2 5")
+        assert channel.backend.received == []
+        assert channel.pending == ["RDY S2 50", "THI S2 5"]
+    assert channel.backend.received == ["RDY S2 50; THI S2 5"]
+    assert channel.submissions == 1 and channel.pending == []
+
+
+def test_query_carries_the_queued_commands(channel):
+    with channel.batch():
+        channel.Command("RDY S2 50")
+        assert channel.Command("LIS") == "output 1"
+        channel.Command("THI S2 5")
+    assert channel.backend.received == ["RDY S2 50; LIS", "THI S2 5"]
+
+
+def test_nested_batches_flush_at_the_outermost_end(channel):
+    with channel.batch():
+        with channel.batch():
+            channel.Command("RDY S2 50")
+        assert channel.backend.received == []
+        channel.Command("RDY S3 -50")
+    assert channel.backend.received == ["RDY S2 50; RDY S3 -50"]
+
+
+def test_long_batches_are_split(channel):
+    channel.max_length = 30
+    with channel.batch():
+        for number in range(2, 7):
+            channel.Command(f"RDY S{number} 50")
+    assert all(len(command) <= 30 for command in channel.backend.received)
+    assert "; ".join(channel.backend.received) == "; ".join(f"RDY S{number} 50" for number in range(2, 7))
+
+
+def test_versions(channel):
+    channel.Command("LIS")
+    assert channel.state_version == 0
+    channel.Command("RDY S2 50")
+    assert (channel.state_version, channel.definition_version) == (1, 0)
+    channel.Command("AUT; GO")
+    assert (channel.state_version, channel.definition_version) == (2, 1)
@@ -0,0 +1,48 @@
+import contextlib
+import io
+
+from Backend_module import LocalBackend
+from SessionPool_module import SessionPool
+from SystemNode_module import SystemNode, SystemTree
+from SystemSetup_module import SystemSetup
+
+
+def singlet(first_radius):
+    system = SystemSetup(LocalBackend())
+    system.start_session()
+    system.create_new_system()
+    system.set_wavelengths([486.1327, 587.5618, 656.2725])
+    system.set_fd(5)
+    system.set_dimensions('m')
+    system.set_fields([(0, 0), (0, 7)])
+    system.Surface(system, 1, first_radius, 4, 'NBK7_SCHOTT')
+    system.Surface(system, 2, -391.44174, 97.7, None)
+    system.set_paraxial_image_distance()
+    system.update_all_surfaces_from_codev()
+    return system
+
+
+def test_leaves_without_seq_file_start_from_their_state(tmp_path):
+    with contextlib.redirect_stdout(io.StringIO()):
+        coordinator = singlet(59.33336)
+        root = SystemNode(system_params={}, optical_system_state=coordinator.save_system_parameters(), is_optimized=True)
+        tree = SystemTree(root)
+        leaves = []
+        for radius in (45.0, 70.0):
+            state = singlet(radius).save_system_parameters()
+            leaf = SystemNode(system_params={}, optical_system_state=state, parent=root, is_optimized=True, depth=1)
+            root.add_child(leaf)
+            tree.add_node(leaf)
+            leaves.append(leaf)
+        # Neither SEQ file nor state: skipped
+        lost = SystemNode(system_params={}, parent=root, is_optimized=True, depth=1)
+        root.add_child(lost)
+        tree.add_node(lost)
+
+        with SessionPool(coordinator.system_data(), LocalBackend, workers=2) as pool:
+            timings = tree.final_optimization(coordinator, 1, str(tmp_path), pool=pool)
+
+    assert sorted(timings) == sorted(leaf.id for leaf in leaves)
+    # The local engine does not optimize: each leaf keeps the first radius it started from
+    assert [leaf.optical_system_state['surfaces'][1]['radius'] for leaf in leaves] == [45.0, 70.0]
+    assert lost.seq_file_path is None
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from GlassCatalog_module import LAMBDA_C, LAMBDA_D, LAMBDA_F, SELLMEIER_COEFFICIENTS, GlassCatalog, glass_index, sellmeier_index
+
+
+def abbe_number(indices):
+    nf, nd, nc = indices
+    return (nd - 1) / (nf - nc)
+
+
+@pytest.mark.parametrize('glass, nd, vd', [
+    # Catalog nd and vd of the Schott data sheets
+    ('NBK7', 1.51680, 64.17),
+    ('SF2', 1.64769, 33.82),
+    ('NLAF2', 1.74397, 44.85),
+    ('NSK16', 1.62041, 60.32),
+    ('NFK5', 1.48749, 70.41),
+    ('NSF66', 1.92286, 20.88),
+])
+def test_sellmeier_index_matches_the_catalog(glass, nd, vd):
+    indices = sellmeier_index(SELLMEIER_COEFFICIENTS[glass], [LAMBDA_F, LAMBDA_D, LAMBDA_C])
+    assert indices[1] == pytest.approx(nd, abs=2e-5)
+    assert abbe_number(indices) == pytest.approx(vd, abs=0.05)
+    # Normal dispersion
+    assert indices[0] > indices[1] > indices[2]
+
+
+@pytest.mark.parametrize('material', ['N-BK7_SCHOTT', 'NBK7_SCHOTT', 'nbk7', 'BK7'])
+def test_catalog_names(material):
+    assert glass_index(material, [LAMBDA_D])[0] == pytest.approx(1.5168, abs=2e-5)
+
+
+@pytest.mark.parametrize('material, nd, vd', [(487490.704058, 1.48749, 70.4058), ('517642', 1.517, 64.2)])
+def test_glass_codes(material, nd, vd):
+    indices = glass_index(material, [LAMBDA_F, LAMBDA_D, LAMBDA_C])
+    assert indices[1] == pytest.approx(nd)
+    assert abbe_number(indices) == pytest.approx(vd)
+
+
+@pytest.mark.parametrize('material', ['UNOBTAINIUM', '123', '517000'])
+def test_unknown_glasses(material):
+    with pytest.raises(KeyError):
+        glass_index(material, [LAMBDA_D])
+
+
+def test_air():
+    assert glass_index(None, [LAMBDA_F, LAMBDA_D]).tolist() == [1.0, 1.0]
+
+
+def test_catalog_tables_follow_the_wavelengths():
+    catalog = GlassCatalog([LAMBDA_F, LAMBDA_D, LAMBDA_C])
+    table = catalog.index_table(['NBK7_SCHOTT', None, 'SF2'])
+    assert table.shape == (3, 3)
+    assert catalog.index('NBK7_SCHOTT') is catalog.index('NBK7_SCHOTT')
+    assert catalog.reference_indices(['NBK7_SCHOTT'])[0] == pytest.approx(1.5168, abs=2e-5)
+
+    catalog.set_wavelengths([LAMBDA_D])
+    assert catalog.index_table(['NBK7_SCHOTT', 'SF2']).shape == (1, 2)
+    assert np.allclose(catalog.tables['SF2'], glass_index('SF2', [LAMBDA_D]))
@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+
+from Backend_module import LocalBackend
+from CommandChannel_module import CommandChannel
+from Instrumentation_module import LATENCY_BINS, CommandProfiler, LatencyStats, submission_name
+from SessionPool_module import SessionPool
+from SystemSetup_module import SystemSetup
+
+
+def test_submission_name_keeps_every_verb_once():
+    assert submission_name(['AUT', 'IMP', 'EFL', 'AUT', 'GO']) == 'AUT+IMP+EFL+GO'
+    assert submission_name(['LIS']) == 'LIS'
+
+
+def test_batched_setup_is_recorded_with_its_query():
+    channel = CommandChannel(LocalBackend())
+    with channel.batch():
+        channel.Command("AUT")
+        channel.Command("IMP 1E-10")
+        channel.Command("GO")
+    channel.Command("LIS")
+    summary = channel.profiler.summary()
+    assert set(summary) == {'AUT+IMP+GO', 'LIS'}
+    assert summary['AUT+IMP+GO']['count'] == 1
+    assert summary['AUT+IMP+GO']['statements'] == 3
+    assert channel.profiler.calls == {'AUT': 1, 'IMP': 1, 'GO': 1, 'LIS': 1}
+
+
+def test_statistics_do_not_grow_with_the_round_trips():
+    profiler = CommandProfiler()
+    with profiler.phase('scan'):
+        for k in range(5000):
+            profiler.record(['GO'], 1e-3 * (1 + k % 10), "ERR. F. = 1")
+    assert list(profiler.stats) == [('GO', 'scan')]
+    stats = profiler.summary()['GO']
+    assert stats['count'] == 5000
+    assert stats['max'] == pytest.approx(1e-2)
+    assert stats['mean'] == pytest.approx(5.5e-3)
+    # Percentiles are good to one histogram bin (a factor 10**(1/8))
+    assert 5e-3 / 10 ** (1 / 8) <= stats['p50'] <= 6e-3 * 10 ** (1 / 8)
+    assert profiler.histogram('GO')[0].sum() == 5000
+
+
+def test_latencies_outside_the_bins_are_kept():
+    stats = LatencyStats()
+    stats.add(1, 1e-9, 0)
+    stats.add(1, 1e4, 0)
+    assert stats.histogram[0] == 1 and stats.histogram[-1] == 1
+    assert stats.percentile(100) == 1e4
+    assert len(LATENCY_BINS) == len(stats.histogram) + 1
+
+
+def test_merge_nests_the_phases():
+    coordinator, worker = CommandProfiler(), CommandProfiler()
+    coordinator.record(['LIS'], 1e-3, "x")
+    worker.record(['LIS'], 2e-3, "xy")
+    with worker.phase('scan'):
+        worker.record(['GO'], 5e-3, "")
+    worker.count(['GO'])
+    coordinator.merge(worker, phase='pool')
+    assert coordinator.by_phase().keys() == {'-', 'pool', 'pool/scan'}
+    assert coordinator.summary()['LIS']['count'] == 2
+    assert coordinator.summary()['LIS']['output'] == 3
+    assert coordinator.calls['GO'] == 1
+    assert "CodeV round trips: 3" in coordinator.report()
+
+
+def list_lens(session, delay):
+    return session.cv.Command("LIS")
+
+
+@pytest.mark.parametrize('processes', [False, True])
+def test_pool_collects_the_round_trips_of_its_sessions(processes):
+    system = SystemSetup(LocalBackend())
+    system.start_session()
+    system.create_new_system()
+    with SessionPool(system.system_data(), LocalBackend, workers=2, processes=processes) as pool:
+        pool.map(list_lens, range(6))
+    assert pool.profiler.summary()['LIS']['count'] >= 6
+    system.cv.profiler.merge(pool.profiler, phase='pool')
+    assert np.sum([stats['count'] for stats in system.cv.profiler.summary().values()]) > 6
@@ -0,0 +1,116 @@
+import os
+import time
+
+import pytest
+
+import JobBroker_module
+from JobBroker_module import CLAIMED, DONE, FAILED, QUEUED, FileJobBroker, JobBroker, open_broker
+
+
+@pytest.fixture(params=['sqlite', 'files'])
+def broker(request, tmp_path):
+    if request.param == 'sqlite':
+        return JobBroker(str(tmp_path / 'jobs.sqlite'), max_attempts=2)
+    return FileJobBroker(str(tmp_path / 'jobs'), max_attempts=2)
+
+
+def test_open_broker(tmp_path):
+    assert type(open_broker(str(tmp_path / 'jobs.db'))) is JobBroker
+    assert type(open_broker(str(tmp_path / 'jobs'))) is FileJobBroker
+
+
+def test_claim_in_order_and_complete(broker):
+    first = broker.put('expansion', {'surface': 2})
+    second = broker.put('expansion', {'surface': 3})
+    assert first != second
+
+    job = broker.claim('A')
+    assert (job.id, job.kind, job.payload, job.attempts) == (first, 'expansion', {'surface': 2}, 1)
+    assert broker.status([first, second]) == {first: (CLAIMED, None), second: (QUEUED, None)}
+
+    broker.complete(job.id, 'A', [1, 2])
+    assert broker.status([first]) == {first: (DONE, None)}
+    assert broker.result(first) == [1, 2]
+    assert broker.claim('B').id == second
+    assert broker.claim('B') is None
+
+
+def test_claim_filters_kinds(broker):
+    broker.put('expansion', 1)
+    other = broker.put('study', 2)
+    assert broker.claim('A', kinds=['study']).id == other
+    assert broker.claim('A', kinds=['study']) is None
+
+
+def test_renew_only_by_the_holder(broker):
+    job_id = broker.put('expansion', None)
+    broker.claim('A')
+    assert broker.renew(job_id, 'A')
+    assert not broker.renew(job_id, 'B')
+
+
+def test_expired_lease_is_requeued_without_error(broker):
+    job_id = broker.put('expansion', None)
+    broker.claim('A', lease=-1)
+    job = broker.claim('B')
+    assert (job.id, job.attempts) == (job_id, 2)
+    assert not broker.renew(job_id, 'A')
+    assert broker.renew(job_id, 'B')
+    assert broker.status([job_id]) == {job_id: (CLAIMED, None)}
+
+
+def test_expired_lease_fails_after_max_attempts(broker):
+    job_id = broker.put('expansion', None)
+    broker.claim('A', lease=-1)
+    broker.claim('B', lease=-1)
+    assert broker.claim('C') is None
+    assert broker.status([job_id]) == {job_id: (FAILED, 'lease expired')}
+    assert broker.wait([job_id], poll_interval=0) == {job_id: None}
+
+
+def test_fail_requeues_then_fails(broker):
+    job_id = broker.put('expansion', None)
+    broker.claim('A')
+    broker.fail(job_id, 'A', 'ValueError')
+    assert broker.status([job_id])[job_id][0] == QUEUED
+    broker.claim('B')
+    broker.fail(job_id, 'B', 'ValueError')
+    assert broker.status([job_id]) == {job_id: (FAILED, 'ValueError')}
+
+
+def test_late_completion_is_kept(broker):
+    job_id = broker.put('expansion', None)
+    broker.claim('A', lease=-1)
+    broker.claim('B')
+    broker.complete(job_id, 'A', 'from A')
+    assert broker.status([job_id]) == {job_id: (DONE, None)}
+    assert broker.result(job_id) == 'from A'
+    assert broker.counts() == {DONE: 1}
+
+
+def test_requeue_keeps_the_lease_of_a_new_claim(tmp_path, monkeypatch):
+    # Another worker claims the job between its move back to the queue and the removal of the stale lease
+    broker = FileJobBroker(str(tmp_path / 'jobs'))
+    other = FileJobBroker(str(tmp_path / 'jobs'))
+    job_id = broker.put('expansion', None)
+    broker.claim('A', lease=-1)
+
+    rename = os.rename
+    claims = []
+
+    def rename_then_claim(source, destination):
+        rename(source, destination)
+        if os.path.dirname(destination).endswith(QUEUED) and not claims:
+            claims.append(other.claim('B'))
+
+    monkeypatch.setattr(JobBroker_module.os, 'rename', rename_then_claim)
+    broker.requeue_expired(time.time())
+    monkeypatch.undo()
+
+    assert claims[0].id == job_id
+    assert broker.holds(job_id, 'B') == 2
+    assert broker.renew(job_id, 'B')
+    assert not broker.renew(job_id, 'A')
+    assert broker.claim('C') is None
+    # Only requeued: no failure recorded
+    assert not os.path.exists(broker.file(FAILED, f"{job_id:08d}.error"))
@@ -0,0 +1,50 @@
+from Backend_module import LocalBackend
+from CommandChannel_module import CommandChannel
+
+
+def lens_channel():
+    channel = CommandChannel(LocalBackend())
+    channel.Command("NEW; WL 486.1327 587.5618 656.2725; EPD 10; INS F1 0 0")
+    channel.Command("INS S1 50 5 NBK7_SCHOTT; INS S2 -50 45")
+    return channel
+
+
+def test_snapshot_is_kept_while_the_lens_is_unchanged():
+    channel = lens_channel()
+    snapshot = channel.snapshot()
+    submissions = channel.submissions
+    assert channel.snapshot() is snapshot
+    assert channel.list_system() == snapshot.text
+    assert channel.get_efl() == snapshot.efl
+    # Read-only commands do not change the lens
+    channel.Command("WRL")
+    assert channel.snapshot() is snapshot
+    assert channel.submissions == submissions + 1
+
+
+def test_snapshot_is_renewed_after_a_change():
+    channel = lens_channel()
+    snapshot = channel.snapshot()
+    channel.Command("RDY S1 40")
+    renewed = channel.snapshot()
+    assert renewed is not snapshot
+    assert renewed.version == channel.state_version
+    assert renewed.surfaces['value'][0] == 40.0
+    assert renewed.efl != snapshot.efl
+
+
+def test_snapshot_sends_the_queued_commands():
+    channel = lens_channel()
+    channel.snapshot()
+    with channel.batch():
+        channel.Command("THI S1 8")
+        # The LIS goes out with the queued thickness and reads it back
+        assert channel.snapshot().thicknesses[1] == 8.0
+        assert channel.pending == []
+
+
+def test_restarted_session_is_listed_again():
+    channel = lens_channel()
+    snapshot = channel.snapshot()
+    channel.start()
+    assert channel.snapshot() is not snapshot
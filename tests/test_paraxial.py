@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from Paraxial_module import first_order_properties
+
+
+def thick_lens_efl(c1, c2, thickness, index):
+    # Lensmaker's equation of a thick lens in air
+    return 1 / ((index - 1) * (c1 - c2 + (index - 1) * thickness * c1 * c2 / index))
+
+
+@pytest.mark.parametrize('radius_1, radius_2, thickness, index', [
+    (50, -50, 5, 1.5168),      # Biconvex
+    (40, np.inf, 4, 1.62),      # Plano-convex
+    (-30, 80, 3, 1.7),          # Biconcave
+    (25, 60, 6, 1.5168),        # Meniscus
+])
+def test_efl_matches_the_lensmaker_equation(radius_1, radius_2, thickness, index):
+    c1, c2 = 1 / radius_1, 1 / radius_2
+    properties = first_order_properties([c1, c2], [thickness, 0], [index, 1.0], epd=10)
+    efl = thick_lens_efl(c1, c2, thickness, index)
+    assert properties['efl'] == pytest.approx(efl)
+    # Back focal distance of a thick lens in air
+    assert properties['bfl'] == pytest.approx(efl * (1 - (index - 1) * thickness * c1 / index))
+    assert properties['pim'] == pytest.approx(properties['bfl'])
+
+
+def test_separated_thin_lenses():
+    # Two thin lenses of focal lengths f1 and f2 at distance d: 1/f = 1/f1 + 1/f2 - d / (f1 f2)
+    index, d = 1.5, 20.0
+    c = 1e-2
+    curvatures = [c, -c, 2 * c, -2 * c]
+    f1, f2 = 1 / ((index - 1) * 2 * c), 1 / ((index - 1) * 4 * c)
+    properties = first_order_properties(curvatures, [0, d, 0, 0], [index, 1.0, index, 1.0], epd=10)
+    assert properties['efl'] == pytest.approx(1 / (1 / f1 + 1 / f2 - d / (f1 * f2)))
+
+
+def test_batched_systems():
+    curvatures = np.array([[1 / 50, -1 / 50], [1 / 40, 0.0]])
+    thicknesses = np.array([[5.0, 0.0], [4.0, 0.0]])
+    indices = np.array([[1.5168, 1.0], [1.62, 1.0]])
+    properties = first_order_properties(curvatures, thicknesses, indices, fno=5)
+    assert properties['efl'].shape == (2,)
+    assert properties['efl'] == pytest.approx([thick_lens_efl(1 / 50, -1 / 50, 5, 1.5168),
+                                               thick_lens_efl(1 / 40, 0.0, 4, 1.62)])
+    assert properties['entrance_pupil_diameter'] == pytest.approx(np.abs(properties['efl']) / 5)
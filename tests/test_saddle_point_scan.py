@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+from Backend_module import LocalBackend, RecordingBackend
+from SaddlePointScan_module import adaptive_merit_values, find_saddle_points
+from benchmarks import SCAN_LENSES, captured_merit_curves, scan_lens_curves, setup_scan_lens
+from SystemSetup_module import SystemSetup
+
+
+def merit_curve(num_points=400):
+    # Smooth merit curve with several extrema over the sweep
+    curvatures = np.linspace(-0.05, 0.05, num_points)
+    return curvatures, np.sin(120 * curvatures) + 0.3 * np.cos(310 * curvatures) + 40 * curvatures ** 2
+
+
+@pytest.mark.parametrize('coarse_step', [8, 16, 32])
+def test_adaptive_scan_finds_the_zeros_of_the_full_sweep(coarse_step):
+    curvatures, mf_values = merit_curve()
+    delta_curvature = curvatures[1] - curvatures[0]
+    zero_points = find_saddle_points(curvatures, mf_values, delta_curvature)[0]
+
+    values, evaluated = adaptive_merit_values(lambda indices: mf_values[indices], len(curvatures), coarse_step)
+    adaptive_zero_points = find_saddle_points(curvatures, values, delta_curvature, evaluated=evaluated)[0]
+
+    assert len(zero_points) > 2
+    assert np.count_nonzero(evaluated) < len(curvatures)
+    assert np.allclose(adaptive_zero_points, zero_points)
+
+
+def test_threshold_ignores_interpolated_points():
+    curvatures, mf_values = merit_curve()
+    delta_curvature = curvatures[1] - curvatures[0]
+    values, evaluated = adaptive_merit_values(lambda indices: mf_values[indices], len(curvatures), 16)
+
+    _, derivatives, threshold = find_saddle_points(curvatures, values, delta_curvature, evaluated=evaluated)
+    valid = np.r_[True, evaluated[:-2] & evaluated[2:], True]
+    assert threshold == pytest.approx(3 * np.std(derivatives[valid]))
+    assert threshold != pytest.approx(3 * np.std(derivatives))
+
+
+def test_all_evaluated_is_the_full_sweep():
+    curvatures, mf_values = merit_curve()
+    delta_curvature = curvatures[1] - curvatures[0]
+    full = find_saddle_points(curvatures, mf_values, delta_curvature)
+    masked = find_saddle_points(curvatures, mf_values, delta_curvature, evaluated=np.ones(len(curvatures), dtype=bool))
+    assert np.allclose(masked[0], full[0]) and masked[2] == full[2]
+
+
+def test_captured_merit_curves(tmp_path):
+    # The sweeps read back from a recording are the ones the scan computed
+    path = str(tmp_path / 'lens.jsonl.gz')
+    lens = SCAN_LENSES[0]
+    backend = RecordingBackend(LocalBackend(), path)
+    system = setup_scan_lens(SystemSetup(backend), lens)
+    curves = scan_lens_curves(system, lens, num_points=120)
+    system.stop_session()
+
+    captured = captured_merit_curves(path)
+    assert len(captured) == len(curves)
+    for (curvatures, mf_values), (captured_curvatures, captured_values) in zip(curves, captured):
+        assert np.allclose(captured_curvatures, curvatures)
+        assert np.allclose(captured_values, mf_values)
+
+
+def test_captured_merit_curves_split_on_step_and_surface():
+    recording = []
+    for surface, curvature in [(2, 0.01), (2, 0.02), (2, 0.03), (2, 0.05), (3, 0.06)]:
+        recording += [(f"CUY S{surface} {curvature!r}", ""), ("AUT; GO", "ERR. F. = 1.5")]
+    runs = captured_merit_curves(recording, min_points=1)
+    assert [list(curvatures) for curvatures, _ in runs] == [[0.01, 0.02, 0.03], [0.05], [0.06]]
@@ -0,0 +1,64 @@
+import time
+
+import pytest
+
+from Backend_module import LocalBackend
+from SessionPool_module import SessionPool
+from SystemNode_module import NodeIdRangeExceeded, SystemNode
+from SystemSetup_module import SystemSetup
+
+
+@pytest.fixture
+def system_data():
+    system = SystemSetup(LocalBackend())
+    system.start_session()
+    system.create_new_system()
+    system.set_wavelengths([486.1327, 587.5618, 656.2725])
+    system.set_fields([(0, 0), (0, 7)])
+    return system.system_data()
+
+
+def echo(session, value, delay):
+    # Finish the jobs in the reverse order of their submission
+    time.sleep(delay)
+    return value, session.cv.list_system() is not None
+
+
+def create_nodes(session, count, delay):
+    time.sleep(delay)
+    return [SystemNode(system_params={}).id for _ in range(count)]
+
+
+@pytest.mark.parametrize('processes', [False, True])
+def test_map_returns_results_in_submission_order(system_data, processes):
+    with SessionPool(system_data, LocalBackend, workers=3, processes=processes) as pool:
+        results = pool.map(echo, range(6), [0.05 * (6 - k) for k in range(6)])
+    assert results == [(k, True) for k in range(6)]
+
+
+@pytest.mark.parametrize('processes', [False, True])
+def test_node_ids_follow_the_submission_order(system_data, processes):
+    with SessionPool(system_data, LocalBackend, workers=3, processes=processes) as pool:
+        base = SystemNode.id_counter
+        futures = [pool.submit(create_nodes, 3, 0.05 * (3 - k), node_ids=10) for k in range(3)]
+        ids = [future.result() for future in futures]
+    assert ids == [[base + 10 * k + 1, base + 10 * k + 2, base + 10 * k + 3] for k in range(3)]
+    # The coordinator keeps numbering after the reserved blocks
+    assert SystemNode(system_params={}).id == base + 31
+
+
+@pytest.mark.parametrize('processes', [False, True])
+def test_job_exceeding_its_ids_fails(system_data, processes):
+    with SessionPool(system_data, LocalBackend, workers=2, processes=processes) as pool:
+        future = pool.submit(create_nodes, 3, 0, node_ids=2)
+        with pytest.raises(NodeIdRangeExceeded):
+            future.result()
+
+
+def test_numbered_from_restores_the_counter():
+    base = SystemNode.reserve_ids(5)
+    with SystemNode.numbered_from(base, 5):
+        assert [SystemNode(system_params={}).id for _ in range(5)] == list(range(base + 1, base + 6))
+        with pytest.raises(NodeIdRangeExceeded):
+            SystemNode(system_params={})
+    assert SystemNode(system_params={}).id == base + 6